@@ -13,10 +13,10 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 """
-from deeppavlov.core.commands.utils import set_deeppavlov_root
+from deeppavlov.core.commands.utils import set_deeppavlov_root, expand_path
+from deeppavlov.core.common.cache import ComponentCache, stable_hash
 from deeppavlov.core.common.chainer import Chainer
 from deeppavlov.core.common.file import read_json
-from deeppavlov.core.common.registry import REGISTRY
 
 from deeppavlov.core.agent.agent import Agent
 from deeppavlov.core.common.params import from_params
@@ -30,7 +30,8 @@ def build_model_from_config(config, mode='infer', load_trained=False, as_compone
     set_deeppavlov_root(config)
     model_config = config['chainer']
 
-    model = Chainer(model_config['in'], model_config['out'], model_config.get('in_y'), as_component=as_component)
+    model = Chainer(model_config['in'], model_config['out'], model_config.get('in_y'), as_component=as_component,
+                    parallel=model_config.get('parallel', False))
 
     for component_config in model_config['pipe']:
         if load_trained and ('fit_on' in component_config or 'in_y' in component_config):
@@ -39,18 +40,73 @@ def build_model_from_config(config, mode='infer', load_trained=False, as_compone
             except KeyError:
                 log.warning('No "save_path" parameter for the {} component, so "load_path" will not be renewed'
                             .format(component_config.get('name', component_config.get('ref', 'UNKNOWN'))))
-        component = from_params(component_config, mode=mode)
+        cache_config = component_config.get('cache')
+        component = from_params({k: v for k, v in component_config.items() if k != 'cache'}, mode=mode)
 
         if 'in' in component_config:
             c_in = component_config['in']
             c_out = component_config['out']
             in_y = component_config.get('in_y', None)
             main = component_config.get('main', False)
-            model.append(component, c_in, c_out, in_y, main)
+            cache = _build_cache(cache_config, component_config) if cache_config and mode == 'infer' else None
+            model.append(component, c_in, c_out, in_y, main, cache=cache)
 
     return model
 
 
+def _build_cache(cache_config, component_config):
+    """
+    Build a cache of component outputs from the `cache` parameter of a pipe element:
+    either `true` or a dict with optional `size`, `path` and `disk_size` keys.
+    """
+    if not isinstance(cache_config, dict):
+        cache_config = {}
+    cache_config = dict(cache_config)
+    if cache_config.get('path'):
+        cache_config['path'] = expand_path(cache_config['path'])
+    config = {k: v for k, v in component_config.items() if k != 'cache'}
+    fingerprint = stable_hash([config, _files_fingerprint(_load_paths(config))])
+    namespace = '{} {}->{} {}'.format(component_config.get('name', component_config.get('config_path', '')),
+                                      component_config['in'], component_config['out'], fingerprint)
+    return ComponentCache(namespace, **cache_config)
+
+
+def _load_paths(config):
+    """
+    Find all `load_path` values in a (nested) component config.
+    """
+    if isinstance(config, dict):
+        paths = [config['load_path']] if isinstance(config.get('load_path'), str) else []
+        for value in config.values():
+            paths.extend(_load_paths(value))
+        return paths
+    if isinstance(config, list):
+        return [path for value in config for path in _load_paths(value)]
+    return []
+
+
+def _files_fingerprint(paths):
+    """
+    Get names, sizes and modification times of files at `paths`, so that a cache is invalidated
+    when a component is retrained. A path that doesn't exist is treated as a prefix of files
+    in its directory, like a TensorFlow checkpoint.
+    """
+    files = []
+    for path in paths:
+        path = expand_path(path)
+        if path.is_dir():
+            files.extend(p for p in path.rglob('*') if p.is_file())
+        elif path.is_file():
+            files.append(path)
+        elif path.parent.is_dir():
+            files.extend(p for p in path.parent.glob(path.name + '*') if p.is_file())
+    fingerprint = []
+    for file in sorted(set(files)):
+        stat = file.stat()
+        fingerprint.append([str(file), stat.st_size, stat.st_mtime_ns])
+    return fingerprint
+
+
 def build_agent_from_config(config_path: str):
     config = read_json(config_path)
     skill_configs = config['skills']
@@ -92,6 +148,7 @@ def interact_model(config_path):
             args.append(input('{}::'.format(in_x)))
             # check for exit command
             if args[-1] == 'exit' or args[-1] == 'stop' or args[-1] == 'quit' or args[-1] == 'q':
+                model.destroy()
                 return
 
         if len(args) == 1:
@@ -102,22 +159,19 @@ def interact_model(config_path):
         print('>>', *pred)
 
 
-def predict_on_stream(config_path, batch_size=1, file_path=None):
+def _open_input(file_path=None):
     import sys
-    import json
-    from itertools import islice
 
     if file_path is None or file_path == '-':
         if sys.stdin.isatty():
             raise RuntimeError('To process data from terminal please use interact mode')
-        f = sys.stdin
-    else:
-        f = open(file_path)
+        return sys.stdin
+    return open(file_path)
 
-    config = read_json(config_path)
-    model: Chainer = build_model_from_config(config)
 
-    args_count = len(model.in_x)
+def _gen_input_batches(f, batch_size, args_count):
+    from itertools import islice
+
     while True:
         batch = (l.strip() for l in islice(f, batch_size*args_count))
         if args_count > 1:
@@ -126,13 +180,137 @@ def predict_on_stream(config_path, batch_size=1, file_path=None):
 
         if not batch:
             break
+        yield batch
+
+
+def _format_predictions(predictions) -> list:
+    import json
+
+    lines = []
+    for res in predictions:
+        if type(res).__module__ == 'numpy':
+            res = res.tolist()
+        if not isinstance(res, str):
+            res = json.dumps(res, ensure_ascii=False)
+        lines.append(res)
+    return lines
+
+
+def _prefetch(iterable, size):
+    """
+    Iterate over `iterable` in a background thread, keeping up to `size` items ready.
+    """
+    from queue import Queue
+    from threading import Thread
+
+    queue = Queue(maxsize=size)
+    end = object()
+
+    def fill():
+        try:
+            for item in iterable:
+                queue.put((item, None))
+        except Exception as e:
+            queue.put((None, e))
+        queue.put((end, None))
+
+    Thread(target=fill, daemon=True).start()
+    while True:
+        item, error = queue.get()
+        if error is not None:
+            raise error
+        if item is end:
+            break
+        yield item
+
+
+_worker_model = None
+
+
+def _init_predict_worker(config):
+    global _worker_model
+    _worker_model = build_model_from_config(config)
+
+
+def _predict_batch(batch):
+    return _format_predictions(_worker_model(batch))
 
-        for res in model(batch):
-            if type(res).__module__ == 'numpy':
-                res = res.tolist()
-            if not isinstance(res, str):
-                res = json.dumps(res, ensure_ascii=False)
-            print(res, flush=True)
+
+def predict_on_stream(config_path, batch_size=1, file_path=None, instrument=False, n_jobs=1, start_line=0):
+    """
+    Print predictions of a model for every sample of an input stream as JSON lines.
+
+    Input batches are read in a background thread. With `n_jobs` > 1 the model is built in every one of
+    `n_jobs` worker processes and batches are distributed between them, predictions are printed
+    in the order of input lines.
+    `start_line` input lines are skipped, e.g. to resume an interrupted run.
+    """
+    import sys
+    import json
+    from collections import deque
+    from itertools import islice
+
+    config = read_json(config_path)
+    in_x = config['chainer']['in']
+    args_count = 1 if isinstance(in_x, str) else len(in_x)
+    if start_line % args_count:
+        raise ValueError('Start line has to be a multiple of the number of model inputs ({})'.format(args_count))
+
+    f = _open_input(file_path)
+    batches = _prefetch(_gen_input_batches(islice(f, start_line, None), batch_size, args_count), 16)
+
+    def write(lines):
+        if lines:
+            sys.stdout.write('\n'.join(lines) + '\n')
+            sys.stdout.flush()
+
+    instrumentation = None
+    if n_jobs > 1:
+        from multiprocessing import Pool
+
+        if instrument:
+            log.warning('Latency statistics are not collected with more than one worker')
+        with Pool(n_jobs, initializer=_init_predict_worker, initargs=(config,)) as pool:
+            in_flight = deque()
+            for batch in batches:
+                in_flight.append(pool.apply_async(_predict_batch, (batch,)))
+                if len(in_flight) >= 2 * n_jobs:
+                    write(in_flight.popleft().get())
+            while in_flight:
+                write(in_flight.popleft().get())
+    else:
+        model: Chainer = build_model_from_config(config)
+        instrumentation = model.enable_instrumentation() if instrument else None
+        for batch in batches:
+            write(_format_predictions(model(batch)))
+        model.destroy()
 
     if f is not sys.stdin:
         f.close()
+
+    if instrumentation is not None:
+        # stdout is taken by predictions
+        print(json.dumps({'latency': instrumentation.summary()}, ensure_ascii=False), file=sys.stderr)
+
+
+def profile_on_stream(config_path, batch_size=1, file_path=None, output_prefix='profile'):
+    """
+    Run a model over sample data and save a timeline of all component calls
+    as Chrome trace events and as collapsed stacks for flame graphs.
+    """
+    import sys
+
+    f = _open_input(file_path)
+
+    config = read_json(config_path)
+    model: Chainer = build_model_from_config(config)
+    tracer = model.enable_tracing()
+
+    for batch in _gen_input_batches(f, batch_size, len(model.in_x)):
+        model(batch)
+
+    if f is not sys.stdin:
+        f.close()
+
+    for path in tracer.save(output_prefix):
+        log.info('Profile is saved to {}'.format(path))
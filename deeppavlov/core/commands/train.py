@@ -70,7 +70,7 @@ def fit_chainer(config: dict, iterator: Union[DataLearningIterator, DataFittingI
     chainer_config: dict = config['chainer']
     chainer = Chainer(chainer_config['in'], chainer_config['out'], chainer_config.get('in_y'))
     for component_config in chainer_config['pipe']:
-        component = from_params(component_config, mode='train')
+        component = from_params({k: v for k, v in component_config.items() if k != 'cache'}, mode='train')
         if 'fit_on' in component_config:
             component: Estimator
 
@@ -96,7 +96,8 @@ def fit_chainer(config: dict, iterator: Union[DataLearningIterator, DataFittingI
     return chainer
 
 
-def train_evaluate_model_from_config(config: [str, Path, dict], to_train=True, to_validate=True) -> None:
+def train_evaluate_model_from_config(config: [str, Path, dict], to_train=True, to_validate=True,
+                                     instrument=False) -> None:
     if isinstance(config, (str, Path)):
         config = read_json(config)
     set_deeppavlov_root(config)
@@ -173,11 +174,16 @@ def train_evaluate_model_from_config(config: [str, Path, dict], to_train=True, t
         model = build_model_from_config(config, load_trained=True)
         log.info('Testing the best saved model')
 
+        instrumentation = model.enable_instrumentation() if instrument else None
+
         if train_config['validate_best']:
             report = {
                 'valid': _test_model(model, metrics_functions, iterator,
                                      train_config.get('batch_size', -1), 'valid')
             }
+            if instrumentation is not None:
+                report['valid']['latency'] = instrumentation.summary()
+                instrumentation.reset()
 
             print(json.dumps(report, ensure_ascii=False))
 
@@ -186,6 +192,9 @@ def train_evaluate_model_from_config(config: [str, Path, dict], to_train=True, t
                 'test': _test_model(model, metrics_functions, iterator,
                                     train_config.get('batch_size', -1), 'test')
             }
+            if instrumentation is not None:
+                report['test']['latency'] = instrumentation.summary()
+                instrumentation.reset()
 
             print(json.dumps(report, ensure_ascii=False))
 
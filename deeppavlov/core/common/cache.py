@@ -0,0 +1,280 @@
+"""
+Copyright 2017 Neural Networks and Deep Learning lab, MIPT
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import copy
+import hashlib
+import pickle
+import sqlite3
+import struct
+import time
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Any, Hashable, Union, Optional
+
+MISSING = object()
+
+
+class LRUCache:
+    """
+    A thread-safe mapping that keeps at most `maxsize` recently used items.
+    `maxsize` of zero disables caching.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+def _update_hash(h, obj) -> None:
+    if obj is None or isinstance(obj, bool):
+        h.update(repr(obj).encode())
+    elif isinstance(obj, str):
+        h.update(b's%d:' % len(obj.encode('utf8')))
+        h.update(obj.encode('utf8'))
+    elif isinstance(obj, bytes):
+        h.update(b'b%d:' % len(obj))
+        h.update(obj)
+    elif isinstance(obj, int):
+        h.update(b'i' + str(obj).encode() + b';')
+    elif isinstance(obj, float):
+        h.update(b'f' + struct.pack('<d', obj))
+    elif isinstance(obj, (list, tuple)):
+        h.update(b'l%d[' % len(obj))
+        for item in obj:
+            _update_hash(h, item)
+        h.update(b']')
+    elif isinstance(obj, dict):
+        h.update(b'd%d{' % len(obj))
+        for key in sorted(obj, key=repr):
+            _update_hash(h, key)
+            _update_hash(h, obj[key])
+        h.update(b'}')
+    elif hasattr(obj, 'tobytes') and hasattr(obj, 'dtype'):
+        # numpy arrays and scalars
+        h.update('a{}{}:'.format(obj.dtype.str, getattr(obj, 'shape', ())).encode())
+        h.update(obj.tobytes())
+    else:
+        h.update(b'r' + repr(obj).encode('utf8'))
+
+
+def stable_hash(obj: Any) -> str:
+    """
+    Get a hash of a (nested) value that doesn't change between processes and runs,
+    unlike the builtin `hash()` of strings.
+    """
+    h = hashlib.sha1()
+    _update_hash(h, obj)
+    return h.hexdigest()
+
+
+class SqliteCache:
+    """
+    A persistent key-value store of pickled values, bounded by `maxsize` items.
+    The oldest inserted items are evicted first.
+    """
+
+    def __init__(self, path: Union[str, Path], maxsize: int = 1000000, table: str = 'cache'):
+        self.maxsize = maxsize
+        self.table = table
+        self._puts = 0
+        self._lock = Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        # losing the last writes of a cache on a crash is fine
+        self.conn.execute("PRAGMA synchronous = OFF")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS {} (key TEXT PRIMARY KEY, value BLOB)".format(table))
+        self.conn.commit()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM {} WHERE key = ?".format(self.table), (key,)).fetchone()
+        if row is None:
+            return default
+        return pickle.loads(row[0])
+
+    def put(self, key: str, value: Any) -> None:
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self.conn.execute("INSERT OR REPLACE INTO {} (key, value) VALUES (?, ?)".format(self.table),
+                              (key, blob))
+            self._puts += 1
+            if self._puts % 1000 == 0:
+                self._evict()
+            self.conn.commit()
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM {} WHERE key = ?".format(self.table), (key,)).fetchone()
+            if row is None:
+                return default
+            self.conn.execute("DELETE FROM {} WHERE key = ?".format(self.table), (key,))
+            self.conn.commit()
+        return pickle.loads(row[0])
+
+    def _evict(self) -> None:
+        count = self.conn.execute("SELECT COUNT(*) FROM {}".format(self.table)).fetchone()[0]
+        if count > self.maxsize:
+            self.conn.execute("DELETE FROM {0} WHERE rowid IN (SELECT rowid FROM {0} ORDER BY rowid LIMIT ?)"
+                              .format(self.table), (count - self.maxsize,))
+
+
+class ComponentCache:
+    """
+    Memoize per-sample outputs of a deterministic pipe component, keyed by a stable hash of its inputs.
+    Recently used outputs are kept in memory; an optional sqlite file keeps them between runs.
+    Outputs are copied when they are put and got, so callers can't change cached values.
+    """
+
+    def __init__(self, namespace: str = '', size: int = 10000, path: Optional[Union[str, Path]] = None,
+                 disk_size: int = 1000000):
+        """
+        :param namespace: a string to distinguish keys of different components
+        :param size: a number of samples to keep in memory
+        :param path: a path to an sqlite file to store outputs on disk
+        :param disk_size: a maximum number of samples to store on disk
+        """
+        self.namespace = namespace
+        self.memory = LRUCache(size)
+        self.disk = SqliteCache(path, disk_size) if path else None
+
+    def key(self, sample: Any) -> str:
+        return stable_hash([self.namespace, sample])
+
+    def get(self, key: str) -> Any:
+        value = self.memory.get(key, MISSING)
+        if value is MISSING and self.disk is not None:
+            value = self.disk.get(key, MISSING)
+            if value is not MISSING:
+                self.memory.put(key, value)
+        return value if value is MISSING else copy.deepcopy(value)
+
+    def put(self, key: str, value: Any) -> None:
+        self.memory.put(key, copy.deepcopy(value))
+        if self.disk is not None:
+            self.disk.put(key, value)
+
+    @property
+    def containers(self) -> Optional[list]:
+        """
+        Types of batches of every output returned by the component, e.g. `list` or `numpy.ndarray`.
+        """
+        value = self.get(self.key(('__containers__',)))
+        return None if value is MISSING else value
+
+    @containers.setter
+    def containers(self, value: list) -> None:
+        self.put(self.key(('__containers__',)), value)
+
+
+class SessionStore:
+    """
+    A thread-safe store of per-session states. A session expires `ttl` seconds after its state was last put.
+    At most `maxsize` least recently put states are kept in memory, older ones are moved to an sqlite file
+    if `path` is set and dropped otherwise.
+    """
+
+    def __init__(self, ttl: float = 3600., maxsize: int = 10000, path: Optional[Union[str, Path]] = None,
+                 disk_size: int = 1000000):
+        """
+        :param ttl: seconds of inactivity after which a session is forgotten
+        :param maxsize: a number of sessions to keep in memory
+        :param path: a path to an sqlite file to move sessions that don't fit in memory to
+        :param disk_size: a maximum number of sessions to store on disk
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = Lock()
+        self.disk = SqliteCache(path, disk_size, table='sessions') if path else None
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            item = self._data.get(key)
+        if item is None and self.disk is not None:
+            # a state on disk is older than any state of the same session in memory
+            item = self.disk.get(str(key))
+        if item is None or item[0] < now - self.ttl:
+            return default
+        return item[1]
+
+    def put(self, key: Hashable, state: Any) -> None:
+        now = time.time()
+        with self._lock:
+            self._data[key] = (now, state)
+            self._data.move_to_end(key)
+            self._expire(now)
+            self._spill()
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.pop(key, None)
+        if self.disk is not None:
+            disk_item = self.disk.pop(str(key))
+            item = item or disk_item
+        return default if item is None else item[1]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, MISSING) is not MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _expire(self, now: float) -> None:
+        # states are ordered by the time they were put
+        while self._data:
+            timestamp, _ = next(iter(self._data.values()))
+            if timestamp >= now - self.ttl:
+                break
+            self._data.popitem(last=False)
+
+    def _spill(self) -> None:
+        while len(self._data) > self.maxsize:
+            key, item = self._data.popitem(last=False)
+            if self.disk is not None:
+                self.disk.put(str(key), item)
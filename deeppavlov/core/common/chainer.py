@@ -14,15 +14,28 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 import inspect
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import ExitStack
 
+import numpy as np
+
+from deeppavlov.core.common.cache import ComponentCache, MISSING
 from deeppavlov.core.common.errors import ConfigError
+from deeppavlov.core.common.instrumentation import Instrumentation
+from deeppavlov.core.common.tracing import Tracer
 from deeppavlov.core.models.component import Component
 from deeppavlov.core.models.nn_model import NNModel
 
 
 class Chainer(Component):
     def __init__(self, in_x: [str, list]=None, out_params: [str, list]=None, in_y: [str, list]=None,
-                 *args, as_component: bool=False, **kwargs):
+                 *args, as_component: bool=False, parallel: [bool, int]=False, **kwargs):
+        """
+        :param parallel: run pipe components that don't depend on each other's outputs concurrently
+            in a thread pool; a number sets a maximum number of threads
+        """
         self.pipe = []
         self.train_pipe = []
         if isinstance(in_x, str):
@@ -39,12 +52,20 @@ class Chainer(Component):
         self.train_map = self.forward_map.union(self.in_y)
 
         self.main = None
+        self.instrumentation = None
+        self.tracer = None
+        self._trace_root = False
+        self._labels = {}
+        self._caches = {}
+
+        self.parallel = parallel
+        self._executor = None
 
         if as_component:
             self._predict = self._predict_as_component
 
     def append(self, component: Component, in_x: [str, list, dict]=None, out_params: [str, list]=None,
-               in_y: [str, list, dict]=None, main=False):
+               in_y: [str, list, dict]=None, main=False, cache: ComponentCache=None):
         if isinstance(in_x, str):
             in_x = [in_x]
         if isinstance(in_y, str):
@@ -89,6 +110,8 @@ class Chainer(Component):
             self.process_event = component.process_event
         if main:
             self.main = component
+        if cache is not None:
+            self._caches[id(component)] = cache
         if self.forward_map.issuperset(in_x):
             self.pipe.append(((x_keys, in_x), out_params, component))
             self.forward_map = self.forward_map.union(out_params)
@@ -99,6 +122,9 @@ class Chainer(Component):
             raise ConfigError('Arguments {} are expected but only {} are set'.format(in_x, self.train_map))
 
     def __call__(self, *args, **kwargs):
+        if self._trace_root:
+            with self.tracer.span(type(self).__name__):
+                return self._predict(*args, **kwargs)
         return self._predict(*args, **kwargs)
 
     def _predict(self, x, y=None, to_return=None):
@@ -129,16 +155,7 @@ class Chainer(Component):
         mem = dict(zip(in_params, args))
         del args, x, y
 
-        for (in_keys, in_params), out_params, component in pipe:
-            x = [mem[k] for k in in_params]
-            if in_keys:
-                res = component(**dict(zip(in_keys, x)))
-            else:
-                res = component(*x)
-            if len(out_params) == 1:
-                mem[out_params[0]] = res
-            else:
-                mem.update(zip(out_params, res))
+        self._run_pipe(pipe, mem)
 
         res = [mem[k] for k in to_return]
         if len(res) == 1:
@@ -148,29 +165,188 @@ class Chainer(Component):
     def _predict_as_component(self, *args):
         mem = dict(zip(self.in_x, args))
 
-        for (in_keys, in_params), out_params, component in self.pipe:
-            x = [mem[k] for k in in_params]
-            if in_keys:
-                res = component(**dict(zip(in_keys, x)))
-            else:
-                res = component(*x)
-
-            if len(out_params) == 1:
-                mem[out_params[0]] = res
-            else:
-                mem.update(zip(out_params, res))
+        self._run_pipe(self.pipe, mem)
 
         res = [mem[k] for k in self.out_params]
         if len(res) == 1:
             res = res[0]
         return res
 
+    def _run_pipe(self, pipe, mem: dict):
+        if self.parallel and len(pipe) > 1:
+            return self._run_pipe_parallel(pipe, mem)
+
+        for (in_keys, in_params), out_params, component in pipe:
+            x = [mem[k] for k in in_params]
+            res = self._call_component(component, in_keys, x, len(out_params))
+            self._store(mem, out_params, res)
+
+    @staticmethod
+    def _store(mem: dict, out_params, res) -> None:
+        if len(out_params) == 1:
+            mem[out_params[0]] = res
+        else:
+            mem.update(zip(out_params, res))
+
+    @staticmethod
+    def _dependencies(pipe) -> list:
+        """
+        For every pipe element get a set of indexes of previous elements that have to finish before it starts:
+        the ones that write its inputs, read or write its outputs or share the same component object.
+        """
+        deps = []
+        for i, ((_, in_params), out_params, component) in enumerate(pipe):
+            in_params, out_params = set(in_params), set(out_params)
+            deps.append({j for j, ((_, prev_in), prev_out, prev_component) in enumerate(pipe[:i])
+                         if prev_component is component
+                         or in_params.intersection(prev_out)
+                         or out_params.intersection(prev_in)
+                         or out_params.intersection(prev_out)})
+        return deps
+
+    def _run_pipe_parallel(self, pipe, mem: dict):
+        """
+        Run every pipe element as soon as all the elements it depends on are finished.
+        Memory is only read and written from the calling thread.
+        """
+        if self._executor is None:
+            max_workers = None if self.parallel is True else int(self.parallel)
+            self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+        parent_span = self.tracer.current() if self.tracer is not None else None
+        deps = self._dependencies(pipe)
+        pending = list(range(len(pipe)))
+        running = {}
+        finished = set()
+        try:
+            while pending or running:
+                for i in [i for i in pending if deps[i] <= finished]:
+                    pending.remove(i)
+                    (in_keys, in_params), out_params, component = pipe[i]
+                    x = [mem[k] for k in in_params]
+                    future = self._executor.submit(self._call_component, component, in_keys, x, len(out_params),
+                                                   parent_span)
+                    running[future] = i
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = running.pop(future)
+                    self._store(mem, pipe[i][1], future.result())
+                    finished.add(i)
+        finally:
+            for future in running:
+                future.cancel()
+
+    def _call_component(self, component, in_keys, x: list, n_out: int=1, parent_span=None):
+        cache = self._caches.get(id(component))
+        if cache is not None and x and all(isinstance(arg, (list, tuple)) for arg in x):
+            invoke = lambda c, k, args: self._invoke_cached(cache, c, k, args, n_out)
+        else:
+            invoke = self._invoke
+
+        if self.instrumentation is None and self.tracer is None:
+            return invoke(component, in_keys, x)
+
+        index, name = self._labels.get(id(component), ('-', type(component).__name__))
+        batch_size = len(x[0]) if x and hasattr(x[0], '__len__') else 1
+        with ExitStack() as stack:
+            if self.tracer is not None:
+                stack.enter_context(self.tracer.span('{} {}'.format(index, name), parent=parent_span,
+                                                     batch_size=batch_size))
+            start = time.perf_counter()
+            res = invoke(component, in_keys, x)
+            if self.instrumentation is not None:
+                self.instrumentation.observe(index, name, time.perf_counter() - start, batch_size)
+        return res
+
+    @staticmethod
+    def _invoke(component, in_keys, x: list):
+        if in_keys:
+            return component(**dict(zip(in_keys, x)))
+        return component(*x)
+
+    def _invoke_cached(self, cache: ComponentCache, component, in_keys, x: list, n_out: int):
+        """
+        Call a component only on samples of the batch which outputs aren't cached yet.
+        """
+        keys = [cache.key(sample) for sample in zip(*x)]
+        outputs = [cache.get(key) for key in keys]
+
+        missing = OrderedDict()
+        for i, (key, output) in enumerate(zip(keys, outputs)):
+            if output is MISSING:
+                missing.setdefault(key, []).append(i)
+
+        containers = cache.containers
+        if missing:
+            first = [positions[0] for positions in missing.values()]
+            res = self._invoke(component, in_keys, [[arg[i] for i in first] for arg in x])
+            new_containers = [type(res)] if n_out == 1 else [type(out) for out in res]
+            if new_containers != containers:
+                cache.containers = containers = new_containers
+            samples = res if n_out == 1 else zip(*res)
+            for (key, positions), sample in zip(missing.items(), samples):
+                cache.put(key, sample)
+                for i in positions:
+                    outputs[i] = sample
+
+        containers = containers or [list] * n_out
+        if n_out == 1:
+            return self._restore_container(containers[0], outputs)
+        columns = list(zip(*outputs)) if outputs else [[] for _ in range(n_out)]
+        return [self._restore_container(container, column) for container, column in zip(containers, columns)]
+
+    @staticmethod
+    def _restore_container(container: type, samples: list):
+        """
+        Put cached samples in the same type of batch the component returns.
+        """
+        if issubclass(container, np.ndarray):
+            return np.array(samples)
+        if issubclass(container, tuple):
+            return tuple(samples)
+        return list(samples)
+
+    def _nested_chainers(self, prefix: str):
+        for i, (_, _, component) in enumerate(self.pipe):
+            index = '{}{}'.format(prefix, i)
+            self._labels[id(component)] = (index, type(component).__name__)
+            if isinstance(component, Chainer):
+                yield component, index + '.'
+
+    def enable_instrumentation(self, instrumentation: Instrumentation=None, prefix: str='') -> Instrumentation:
+        """
+        Record latency of every pipe component call, including components of nested chainers.
+        """
+        self.instrumentation = instrumentation or Instrumentation()
+        for chainer, chainer_prefix in self._nested_chainers(prefix):
+            chainer.enable_instrumentation(self.instrumentation, prefix=chainer_prefix)
+        return self.instrumentation
+
+    def enable_tracing(self, tracer: Tracer=None, prefix: str='') -> Tracer:
+        """
+        Record a nested timeline of every pipe component call, including components of nested chainers.
+        """
+        self.tracer = tracer or Tracer()
+        self._trace_root = tracer is None
+        for chainer, chainer_prefix in self._nested_chainers(prefix):
+            chainer.enable_tracing(self.tracer, prefix=chainer_prefix)
+        return self.tracer
+
     def get_main_component(self):
         return self.main or self.pipe[-1][-1]
 
     def save(self):
         self.get_main_component().save()
 
+    def destroy(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        for _, _, component in self.pipe:
+            if callable(getattr(component, 'destroy', None)):
+                component.destroy()
+
     def load(self):
         for component in self.pipe:
             if inspect.ismethod(getattr(component, 'load', None)):
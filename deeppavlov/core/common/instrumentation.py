@@ -0,0 +1,133 @@
+"""
+Copyright 2017 Neural Networks and Deep Learning lab, MIPT
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Tuple, Dict, Optional
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class LatencyHistogram:
+    """
+    Counts of component calls by wall time, with cumulative totals.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.
+        self.samples = 0
+
+    def observe(self, seconds: float, batch_size: int) -> None:
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+                break
+        self.count += 1
+        self.sum += seconds
+        self.samples += batch_size
+
+    def cumulative_counts(self):
+        total = 0
+        for count in self.bucket_counts:
+            total += count
+            yield total
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile of call times as the upper bound of the bucket it falls into
+        (None if it is above the largest bucket).
+        """
+        rank = q * self.count
+        for bound, count in zip(self.buckets, self.cumulative_counts()):
+            if count >= rank:
+                return bound
+        return None
+
+
+class Instrumentation:
+    """
+    Latency histograms of chainer pipe components.
+
+    Components are identified by their position in the pipe (dot-separated for nested chainers)
+    and their class name.
+    """
+
+    metric_name = 'deeppavlov_component_latency_seconds'
+    samples_metric_name = 'deeppavlov_component_samples_total'
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.histograms = OrderedDict()
+        self._lock = Lock()
+
+    def observe(self, index: str, name: str, seconds: float, batch_size: int) -> None:
+        with self._lock:
+            key = (index, name)
+            if key not in self.histograms:
+                self.histograms[key] = LatencyHistogram(self.buckets)
+            self.histograms[key].observe(seconds, batch_size)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms.clear()
+
+    def to_prometheus(self) -> str:
+        """
+        Export histograms in the Prometheus text exposition format.
+        """
+        lines = ['# HELP {} Wall time of chainer pipe component calls.'.format(self.metric_name),
+                 '# TYPE {} histogram'.format(self.metric_name)]
+        with self._lock:
+            histograms = list(self.histograms.items())
+
+        for (index, name), hist in histograms:
+            labels = 'index="{}",component="{}"'.format(index, name)
+            for bound, count in zip(hist.buckets, hist.cumulative_counts()):
+                lines.append('{}_bucket{{{},le="{}"}} {}'.format(self.metric_name, labels, bound, count))
+            lines.append('{}_bucket{{{},le="+Inf"}} {}'.format(self.metric_name, labels, hist.count))
+            lines.append('{}_sum{{{}}} {}'.format(self.metric_name, labels, hist.sum))
+            lines.append('{}_count{{{}}} {}'.format(self.metric_name, labels, hist.count))
+
+        lines += ['# HELP {} Number of samples passed to chainer pipe components.'.format(self.samples_metric_name),
+                  '# TYPE {} counter'.format(self.samples_metric_name)]
+        for (index, name), hist in histograms:
+            lines.append('{}{{index="{}",component="{}"}} {}'.format(self.samples_metric_name, index, name,
+                                                                     hist.samples))
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get a JSON-serializable summary of component calls.
+        """
+        summary = OrderedDict()
+        with self._lock:
+            histograms = list(self.histograms.items())
+
+        for (index, name), hist in histograms:
+            summary['{} {}'.format(index, name)] = OrderedDict([
+                ('calls', hist.count),
+                ('samples', hist.samples),
+                ('total_seconds', round(hist.sum, 6)),
+                ('mean_seconds', round(hist.sum / hist.count, 6) if hist.count else 0.),
+                ('mean_batch_size', round(hist.samples / hist.count, 2) if hist.count else 0.),
+                ('p50_seconds', hist.quantile(0.5)),
+                ('p90_seconds', hist.quantile(0.9)),
+                ('p99_seconds', hist.quantile(0.99))
+            ])
+        return summary
@@ -1,5 +1,6 @@
 from deeppavlov.core.common.errors import ConfigError
 from deeppavlov.core.common.log import get_logger
+from deeppavlov.core.common.registry import import_registered
 
 
 log = get_logger(__name__)
@@ -18,6 +19,9 @@ def register_metric(metric_name):
 
 
 def get_metrics_by_names(names: list):
+    for name in names:
+        if name not in _REGISTRY:
+            import_registered(name, 'metrics')
     not_found = [name for name in names if name not in _REGISTRY]
     if not_found:
         raise ConfigError('Names {} are not registered as metrics'.format(not_found))
@@ -19,7 +19,7 @@ from typing import Dict
 
 from deeppavlov.core.commands.utils import expand_path, get_deeppavlov_root, set_deeppavlov_root
 from deeppavlov.core.common.file import read_json
-from deeppavlov.core.common.registry import REGISTRY
+from deeppavlov.core.common.registry import model as get_model
 from deeppavlov.core.common.errors import ConfigError
 from deeppavlov.core.common.log import get_logger
 from deeppavlov.core.models.component import Component
@@ -100,9 +100,8 @@ def from_params(params: Dict, mode='infer', **kwargs) -> Component:
             log.exception(e)
             raise e
         try:
-            cls = REGISTRY[cls_name]
-        except KeyError:
-            e = ConfigError('Class {} is not registered.'.format(cls_name))
+            cls = get_model(cls_name)
+        except ConfigError as e:
             log.exception(e)
             raise e
 
@@ -23,11 +23,20 @@ Example:
      @registry.register_model('my_model')
      class MyModel(TModel)
 
-Note that you should import _REGISTRY variable and all your custom models in the entry point of
-your training/inference script.
+Registered names of the library components are listed in the generated registry.json manifest together
+with their modules, so a module is only imported when a component from it is requested.
+Regenerate the manifest after adding or renaming components:
+
+    python -m deeppavlov.core.common.registry
+
+Custom components from outside the library are registered as soon as their module is imported.
 """
 
-from typing import Type, List
+import ast
+import importlib
+import json
+from pathlib import Path
+from typing import Type, List, Dict, Union
 
 from deeppavlov.core.common.log import get_logger
 from deeppavlov.core.common.errors import ConfigError
@@ -36,6 +45,40 @@ logger = get_logger(__name__)
 
 REGISTRY = {}
 
+MANIFESTS = {
+    'models': (Path(__file__).parent / 'registry.json', 'register'),
+    'metrics': (Path(__file__).parent / 'metrics_registry.json', 'register_metric')
+}
+
+_manifests = {}
+
+
+def read_manifest(kind: str) -> Dict[str, str]:
+    """
+    Get a cached mapping of registered names to `module.submodules:Name` strings from a manifest
+    of one of the MANIFESTS kinds, e.g. `models` or `metrics`.
+    """
+    path = MANIFESTS[kind][0]
+    if path not in _manifests:
+        try:
+            with path.open(encoding='utf8') as f:
+                _manifests[path] = json.load(f)
+        except FileNotFoundError:
+            logger.warning('Registry manifest {} is not found, only imported components are available'
+                           .format(path))
+            _manifests[path] = {}
+    return _manifests[path]
+
+
+def import_registered(name: str, kind: str) -> bool:
+    """Import the module of a registered name from a manifest. Return False if there is no such name."""
+    try:
+        module_name = read_manifest(kind)[name].split(':')[0]
+    except KeyError:
+        return False
+    importlib.import_module(module_name)
+    return True
+
 
 def register(name: str = None) -> Type:
     """Register model. If name is not passed, the model class name is converted to snake-case."""
@@ -56,10 +99,67 @@ def short_name(cls: Type) -> str:
 
 
 def model(name: str) -> type:
-    if name not in REGISTRY:
+    if name not in REGISTRY and not import_registered(name, 'models'):
         raise ConfigError("Model {} is not registered.".format(name))
+    if name not in REGISTRY:
+        raise ConfigError("Model {} is listed in the registry manifest but its module does not register it."
+                          " Regenerate the manifest.".format(name))
     return REGISTRY[name]
 
 
 def list_models() -> List:
-    return list(REGISTRY)
+    return sorted(set(REGISTRY).union(read_manifest('models')))
+
+
+def _str_value(node: ast.AST) -> Union[str, None]:
+    # string literals are ast.Str before python 3.8 and ast.Constant after
+    value = getattr(node, 's', getattr(node, 'value', None))
+    return value if isinstance(value, str) else None
+
+
+def _decorator_name(node: ast.AST, decorator: str, default: str) -> Union[str, None]:
+    if isinstance(node, ast.Call):
+        func = node.func
+        if getattr(func, 'id', None) == decorator or getattr(func, 'attr', None) == decorator:
+            args = node.args + [keyword.value for keyword in node.keywords]
+            if args and _str_value(args[0]) is not None:
+                return _str_value(args[0])
+            return default
+    elif getattr(node, 'id', None) == decorator or getattr(node, 'attr', None) == decorator:
+        return default
+    return None
+
+
+def collect_registered(package_path: Path, decorator: str) -> Dict[str, str]:
+    """Find names registered with a decorator in the source code of a package without importing it."""
+    package_path = Path(package_path)
+    registered = {}
+    for path in sorted(package_path.rglob('*.py')):
+        module_name = '.'.join(path.relative_to(package_path.parent).with_suffix('').parts)
+        tree = ast.parse(path.read_text(encoding='utf8'), str(path))
+        for node in ast.walk(tree):
+            if not isinstance(node, (ast.ClassDef, ast.FunctionDef)):
+                continue
+            for decorator_node in node.decorator_list:
+                name = _decorator_name(decorator_node, decorator, node.name)
+                if name is None:
+                    continue
+                target = '{}:{}'.format(module_name, node.name)
+                if name in registered and registered[name] != target:
+                    logger.warning('"{}" is registered both as {} and {}'.format(name, registered[name], target))
+                registered[name] = target
+    return dict(sorted(registered.items()))
+
+
+def generate_manifests(package_path: Path = Path(__file__).parents[2]) -> None:
+    for path, decorator in MANIFESTS.values():
+        registered = collect_registered(package_path, decorator)
+        with path.open('w', encoding='utf8') as f:
+            json.dump(registered, f, indent=4)
+            f.write('\n')
+        _manifests.pop(path, None)
+        logger.info('{} names are saved to {}'.format(len(registered), path))
+
+
+if __name__ == '__main__':
+    generate_manifests()
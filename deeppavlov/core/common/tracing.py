@@ -0,0 +1,120 @@
+"""
+Copyright 2017 Neural Networks and Deep Learning lab, MIPT
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Dict, Optional, Union
+
+
+class _Span:
+    def __init__(self, name: str, parent: '_Span' = None):
+        self.name = name
+        self.stack = (parent.stack if parent else ()) + (name,)
+        self.children_time = 0.
+
+
+class Tracer:
+    """
+    Record a nested timeline of chainer component calls.
+
+    The timeline can be exported as Chrome trace events (open it in chrome://tracing or Perfetto)
+    and as collapsed stacks of self time in microseconds (the input format of flamegraph.pl
+    and speedscope).
+    """
+
+    def __init__(self):
+        self.events = []
+        self.collapsed = OrderedDict()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def _stack(self) -> List[_Span]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def current(self) -> Optional[_Span]:
+        """
+        Get the innermost open span of the current thread.
+        """
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def span(self, name: str, parent: Optional[_Span] = None, **args):
+        """
+        Record a span nested in the innermost open span of the current thread or, if there is none,
+        in `parent`, e.g. a span of the thread that submitted the work to a pool.
+        """
+        stack = self._stack()
+        parent = stack[-1] if stack else parent
+        span = _Span(name, parent)
+        stack.append(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            duration = time.perf_counter() - start
+            stack.pop()
+            if parent is not None:
+                with self._lock:
+                    parent.children_time += duration
+            self._record(span, start, duration, args)
+
+    def _record(self, span: _Span, start: float, duration: float, args: dict) -> None:
+        event = {
+            'name': span.name,
+            'ph': 'X',
+            'ts': round((start - self._origin) * 1e6, 3),
+            'dur': round(duration * 1e6, 3),
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': args
+        }
+        self_time = max(duration - span.children_time, 0.)
+        with self._lock:
+            self.events.append(event)
+            self.collapsed[span.stack] = self.collapsed.get(span.stack, 0.) + self_time
+
+    def to_chrome_trace(self) -> Dict[str, List[dict]]:
+        with self._lock:
+            return {'traceEvents': list(self.events), 'displayTimeUnit': 'ms'}
+
+    def to_collapsed_stacks(self) -> str:
+        with self._lock:
+            items = list(self.collapsed.items())
+        return '\n'.join('{} {}'.format(';'.join(stack), int(round(seconds * 1e6)))
+                         for stack, seconds in items) + '\n'
+
+    def save(self, path_prefix: Union[str, Path]) -> List[Path]:
+        """
+        Save the timeline to `<path_prefix>.trace.json` and `<path_prefix>.folded`.
+        """
+        path_prefix = str(path_prefix)
+        trace_path = Path(path_prefix + '.trace.json')
+        folded_path = Path(path_prefix + '.folded')
+        with trace_path.open('w', encoding='utf8') as f:
+            json.dump(self.to_chrome_trace(), f)
+        with folded_path.open('w', encoding='utf8') as f:
+            f.write(self.to_collapsed_stacks())
+        return [trace_path, folded_path]
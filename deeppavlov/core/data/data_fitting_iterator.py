@@ -46,6 +46,9 @@ class DataFittingIterator:
     def get_doc_content(self, doc_id: Any) -> Optional[str]:
         return self.data[doc_id]
 
+    def get_docs_content(self, doc_ids: List[Any]) -> List[Optional[str]]:
+        return [self.get_doc_content(doc_id) for doc_id in doc_ids]
+
     def gen_batches(self, batch_size: int, shuffle: bool = None)\
             -> Generator[Tuple[List[list], List[int]], Any, None]:
 
@@ -67,5 +70,5 @@ class DataFittingIterator:
             # DEBUG
             # logger.info(
             #     "Processing batch # {} of {} ({} documents)".format(i, len_batches, len(doc_index)))
-            docs = [self.get_doc_content(doc_id) for doc_id in doc_ids]
+            docs = self.get_docs_content(doc_ids)
             yield docs, doc_ids
@@ -0,0 +1,129 @@
+"""
+Copyright 2017 Neural Networks and Deep Learning lab, MIPT
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+"""Batch tensorization for TensorFlow and Keras models.
+
+All samples of a batch are concatenated into one flat array and copied into a preallocated
+padded array with a single masked assignment instead of element by element Python loops.
+"""
+
+from itertools import chain
+from typing import Sequence, List, Optional, Tuple
+
+import numpy as np
+
+
+def _lengths(batch: Sequence[Sequence]) -> np.ndarray:
+    return np.fromiter((len(sample) for sample in batch), dtype=np.int64, count=len(batch))
+
+
+def round_length(length: int, bucket: Optional[int] = None) -> int:
+    """
+    Round a length up to a multiple of `bucket`, so that models see fewer distinct input shapes.
+    """
+    if not bucket:
+        return length
+    return -(-length // bucket) * bucket
+
+
+def _truncate(batch: Sequence[Sequence], max_len: int, truncating: str) -> List[Sequence]:
+    if truncating == 'post':
+        return [sample[:max_len] for sample in batch]
+    return [sample[len(sample) - max_len:] if len(sample) > max_len else sample for sample in batch]
+
+
+def _scatter(flat: np.ndarray, lengths: np.ndarray, max_len: int, value, padding: str) -> np.ndarray:
+    padded = np.full((len(lengths), max_len) + flat.shape[1:], value, dtype=flat.dtype)
+    positions = np.arange(max_len)
+    if padding == 'post':
+        mask = positions < lengths[:, None]
+    else:
+        mask = positions >= (max_len - lengths)[:, None]
+    padded[mask] = flat
+    return padded
+
+
+def pad_sequences(batch: Sequence[Sequence], max_len: Optional[int] = None, value=0, dtype=None,
+                  padding: str = 'post', truncating: str = 'post', bucket: Optional[int] = None,
+                  feature_shape: Tuple[int, ...] = ()) -> np.ndarray:
+    """
+    Pad a batch of sequences of numbers or of feature vectors to an array of shape
+    [batch_size, max_len] or [batch_size, max_len, *feature_shape].
+
+    :param batch: a list of sequences
+    :param max_len: a length to pad or truncate to, the maximum length in the batch by default
+    :param value: a value to pad with
+    :param dtype: a type of the output array, inferred from values by default
+    :param padding: 'post' to pad after sequences or 'pre' to pad before them
+    :param truncating: 'post' to drop the ends of longer sequences or 'pre' to drop their beginnings
+    :param bucket: round the maximum length in the batch up to a multiple of this number
+    :param feature_shape: a shape of a single sequence element, only used if all sequences are empty
+    """
+    lengths = _lengths(batch)
+    if max_len is None:
+        max_len = round_length(int(lengths.max()) if len(lengths) else 0, bucket)
+    elif (lengths > max_len).any():
+        batch = _truncate(batch, max_len, truncating)
+        lengths = np.minimum(lengths, max_len)
+
+    if lengths.any():
+        first = next(sample for sample in batch if len(sample))[0]
+        if np.ndim(first) == 0:
+            flat = np.fromiter(chain.from_iterable(batch), dtype=dtype or np.asarray(first).dtype,
+                               count=int(lengths.sum()))
+        else:
+            flat = np.asarray(list(chain.from_iterable(batch)), dtype=dtype)
+    else:
+        flat = np.zeros((0,) + tuple(feature_shape), dtype=dtype or np.float32)
+    return _scatter(flat, lengths, max_len, value, padding)
+
+
+def pad_nested(batch: Sequence[Sequence[Sequence]], max_len: Optional[int] = None,
+               max_token_len: Optional[int] = None, value=0, token_value=None, dtype=None,
+               bucket: Optional[int] = None) -> np.ndarray:
+    """
+    Pad a batch of sequences of tokens that are sequences themselves (e.g. of character indices)
+    to an array of shape [batch_size, max_len, max_token_len(, *feature_shape)].
+
+    :param batch: a list of lists of tokens
+    :param max_len: a number of tokens to pad or truncate to, the maximum in the batch by default
+    :param max_token_len: a token length to pad or truncate to, the maximum in the batch by default
+    :param value: a value to pad tokens with
+    :param token_value: a value to fill padding tokens with, `value` by default
+    :param dtype: a type of the output array, inferred from values by default
+    :param bucket: round maximum lengths in the batch up to a multiple of this number
+    """
+    lengths = _lengths(batch)
+    if max_len is None:
+        max_len = round_length(int(lengths.max()) if len(lengths) else 0, bucket)
+    elif (lengths > max_len).any():
+        batch = _truncate(batch, max_len, 'post')
+        lengths = np.minimum(lengths, max_len)
+
+    tokens = pad_sequences(list(chain.from_iterable(batch)), max_token_len, value, dtype, bucket=bucket)
+    if token_value is None:
+        token_value = value
+    return _scatter(tokens, lengths, max_len, token_value, 'post')
+
+
+def bucket_by_length(lengths: Sequence[int], batch_size: int) -> List[np.ndarray]:
+    """
+    Split indexes of samples into batches of samples with similar lengths to reduce padding.
+    """
+    indexes = np.argsort(lengths)
+    if batch_size < 0:
+        batch_size = len(indexes)
+    return [indexes[start:start + batch_size] for start in range(0, len(indexes), batch_size)]
@@ -25,6 +25,7 @@ from deeppavlov.core.common.errors import ConfigError
 from deeppavlov.core.common.log import get_logger
 from deeppavlov.core.models.estimator import Estimator
 from deeppavlov.core.data.utils import zero_pad, zero_pad_char
+from deeppavlov.core.data.token_index import TokenIndex, containers_nbytes
 
 log = get_logger(__name__)
 
@@ -37,9 +38,15 @@ class SimpleVocabulary(Estimator):
                  min_freq=1,
                  pad_with_zeros=False,
                  unk_token=None,
+                 compact=False,
                  *args,
                  **kwargs):
+        """
+        :param compact: whether to keep tokens in a :class:`~deeppavlov.core.data.token_index.TokenIndex`
+            instead of Python dicts after fitting or loading and to save them in a binary format
+        """
         super().__init__(**kwargs)
+        self.compact = compact
         self.special_tokens = special_tokens
         self._max_tokens = max_tokens
         self._min_freq = min_freq
@@ -61,6 +68,14 @@ class SimpleVocabulary(Estimator):
                 self._t2i[token] = self.count
                 self._i2t.append(token)
                 self.count += 1
+        if self.compact:
+            self._compact()
+
+    def _compact(self):
+        counts = [self.freqs[token] for token in self._i2t]
+        self._index = TokenIndex.from_tokens(self._i2t, counts, default=self._unk_index())
+        self._t2i = self._i2t = self._index
+        self.freqs = None
 
     def _add_tokens_with_freqs(self, tokens, freqs):
         self.freqs = Counter()
@@ -72,6 +87,12 @@ class SimpleVocabulary(Estimator):
                 self.count += 1
 
     def __call__(self, batch, **kwargs):
+        if self._index is not None and isinstance(self._first_token(batch), str):
+            indices_batch = self._index.lookup_nested(batch, 2)
+            if self._pad_with_zeros:
+                indices_batch = zero_pad(indices_batch)
+            return indices_batch
+
         indices_batch = []
         for sample in batch:
             indices_batch.append([self[token] for token in sample])
@@ -81,6 +102,12 @@ class SimpleVocabulary(Estimator):
 
     def save(self):
         log.info("[saving vocabulary to {}]".format(self.save_path))
+        if self.compact:
+            if self._index is None:
+                self._compact()
+            with self.save_path.open('wb') as f:
+                self._index.save(f)
+            return
         with self.save_path.open('wt') as f:
             for n in range(len(self)):
                 token = self._i2t[n]
@@ -92,12 +119,24 @@ class SimpleVocabulary(Estimator):
         if self.load_path:
             if self.load_path.is_file():
                 log.info("[loading vocabulary from {}]".format(self.load_path))
-                tokens, counts = [], []
-                for ln in self.load_path.open('r'):
-                    token, cnt = ln.split('\t', 1)
-                    tokens.append(token)
-                    counts.append(int(cnt))
+                if TokenIndex.is_binary(self.load_path):
+                    with self.load_path.open('rb') as f:
+                        index = TokenIndex.load(f, default=self._unk_index())
+                    if self.compact:
+                        self._index = self._t2i = self._i2t = index
+                        self.freqs = None
+                        self.count = len(index)
+                        return
+                    tokens, counts = list(index), index.counts.tolist()
+                else:
+                    tokens, counts = [], []
+                    for ln in self.load_path.open('r'):
+                        token, cnt = ln.split('\t', 1)
+                        tokens.append(token)
+                        counts.append(int(cnt))
                 self._add_tokens_with_freqs(tokens, counts)
+                if self.compact:
+                    self._compact()
             elif isinstance(self.load_path, Path):
                 if not self.load_path.parent.is_dir():
                     raise ConfigError("Provided `load_path` for {} doesn't exist!".format(
@@ -116,8 +155,18 @@ class SimpleVocabulary(Estimator):
         return list(range(self.len))
 
     def items(self):
+        if self._index is not None:
+            return self._index.most_common()
         return self.freqs.most_common()
 
+    def memory_usage(self):
+        """
+        Approximate memory used by tokens of the vocabulary in bytes.
+        """
+        if self._index is not None:
+            return self._index.nbytes
+        return containers_nbytes(self._t2i, self._i2t, self.freqs)
+
     def __getitem__(self, key):
         if isinstance(key, (int, np.integer)):
             return self._i2t[key]
@@ -145,15 +194,29 @@ class SimpleVocabulary(Estimator):
         else:
             return False
 
+    def _unk_index(self):
+        if self.unk_token in self.special_tokens:
+            return self.special_tokens.index(self.unk_token)
+        return 0
+
     def reset(self):
         self.freqs = None
-        unk_index = 0
-        if self.unk_token in self.special_tokens:
-            unk_index = self.special_tokens.index(self.unk_token)
+        unk_index = self._unk_index()
         self._t2i = defaultdict(lambda: unk_index)
         self._i2t = []
+        self._index = None
         self.count = 0
 
+    @classmethod
+    def _first_token(cls, batch):
+        for item in batch:
+            if isinstance(item, (str, int, np.integer)):
+                return item
+            token = cls._first_token(item)
+            if token is not None:
+                return token
+        return None
+
     @staticmethod
     def is_empty(batch):
         non_empty = [item for item in batch if len(item) > 0]
@@ -167,6 +230,12 @@ class CharacterVocab(SimpleVocabulary):
         super().fit(chars)
 
     def __call__(self, batch, **kwargs):
+        if self._index is not None and isinstance(self._first_token(batch), str):
+            indices_batch = self._index.lookup_nested(batch, 3)
+            if self._pad_with_zeros:
+                indices_batch = zero_pad_char(indices_batch)
+            return indices_batch
+
         indices_batch = []
         for sample in batch:
             tokens = []
@@ -185,6 +254,12 @@ class DialogVocab(SimpleVocabulary):
         super().fit(tokens)
 
     def __call__(self, batch, **kwargs):
+        if self._index is not None and isinstance(self._first_token(batch), str):
+            indices_batch = self._index.lookup_nested(batch, 3)
+            if self._pad_with_zeros:
+                indices_batch = zero_pad_char(indices_batch)
+            return indices_batch
+
         indices_batch = []
         for dialog in batch:
             tokens = []
@@ -0,0 +1,191 @@
+"""
+Copyright 2017 Neural Networks and Deep Learning lab, MIPT
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import sys
+from itertools import chain, islice
+from typing import Sequence, List, Tuple, Iterator, Union, BinaryIO, Optional
+
+import numpy as np
+
+BINARY_MAGIC = b'PK\x03\x04'
+
+
+class TokenIndex:
+    """
+    An immutable mapping between tokens and consecutive ids backed by a few numpy arrays
+    instead of Python dicts and lists of strings.
+
+    Tokens are stored in id order as a single utf-8 blob with offsets. For token to id lookups
+    tokens of up to `max_width` bytes are also kept in a sorted fixed width bytes array, so a whole
+    batch of tokens is translated with one vectorized binary search. Longer tokens are kept in a dict.
+
+    Indexing with a string returns its id (or `default` for unknown tokens), indexing with
+    an integer returns a token, like `_t2i` and `_i2t` of vocabularies.
+    """
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray, counts: Optional[np.ndarray] = None,
+                 default: int = 0, max_width: int = 32):
+        """
+        :param blob: utf-8 encoded tokens concatenated in id order
+        :param offsets: start positions of tokens in the blob and the length of the blob
+        :param counts: token frequencies in id order
+        :param default: an id to return for unknown tokens
+        :param max_width: a maximum length in bytes of tokens in the sorted array
+        """
+        self.blob = blob
+        self.offsets = offsets
+        self.counts = counts if counts is not None else np.zeros(len(offsets) - 1, dtype=np.int64)
+        self.default = default
+
+        lengths = np.diff(offsets)
+        self.width = int(min(lengths.max() if len(lengths) else 1, max_width)) or 1
+        # fixed width bytes drop trailing zero bytes, so such tokens can't be compared there
+        last_bytes = blob[np.maximum(offsets[1:] - 1, 0)] if len(blob) else np.zeros(len(lengths), np.uint8)
+        is_long = (lengths > self.width) | ((lengths > 0) & (last_bytes == 0))
+
+        short_ids = np.flatnonzero(~is_long)
+        matrix = np.zeros((len(short_ids), self.width), dtype=np.uint8)
+        short_lengths = lengths[short_ids]
+        rows = np.repeat(np.arange(len(short_ids)), short_lengths)
+        starts = np.repeat(offsets[short_ids], short_lengths)
+        columns = np.arange(len(rows)) - np.repeat(np.cumsum(short_lengths) - short_lengths, short_lengths)
+        matrix[rows, columns] = blob[starts + columns]
+        fixed = matrix.view('S{}'.format(self.width)).ravel()
+
+        order = np.argsort(fixed, kind='mergesort')
+        self.sorted_tokens = fixed[order]
+        self.sorted_ids = short_ids[order]
+        self.long_tokens = {self.token(i): int(i) for i in np.flatnonzero(is_long)}
+
+    @classmethod
+    def from_tokens(cls, tokens: Sequence[str], counts: Optional[Sequence[int]] = None, default: int = 0,
+                    max_width: int = 32) -> 'TokenIndex':
+        """
+        Build an index of tokens in id order.
+        """
+        encoded = [token.encode('utf8') for token in tokens]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(e) for e in encoded])
+        blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        if counts is not None:
+            counts = np.asarray(counts, dtype=np.int64)
+        return cls(blob, offsets, counts, default, max_width)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def token(self, i: int) -> str:
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode('utf8')
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self.token(i)
+
+    def __getitem__(self, key: Union[str, int]) -> Union[int, str]:
+        if isinstance(key, str):
+            return int(self.lookup([key])[0])
+        return self.token(key)
+
+    def __contains__(self, token: str) -> bool:
+        return int(self.lookup([token], default=-1)[0]) >= 0
+
+    def lookup(self, tokens: Sequence[str], default: Optional[int] = None) -> np.ndarray:
+        """
+        Get ids of a flat sequence of tokens.
+        """
+        if default is None:
+            default = self.default
+        if not len(tokens):
+            return np.zeros(0, dtype=np.int64)
+        encoded = [token.encode('utf8') for token in tokens]
+        queries = np.array(encoded, dtype=self.sorted_tokens.dtype)
+        ids = np.full(len(encoded), default, dtype=np.int64)
+        if len(self.sorted_tokens):
+            positions = np.minimum(np.searchsorted(self.sorted_tokens, queries), len(self.sorted_tokens) - 1)
+            found = self.sorted_tokens[positions] == queries
+            ids[found] = self.sorted_ids[positions[found]]
+
+        # truncated tokens and tokens with trailing zero bytes are shorter in the fixed width array
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        for i in np.flatnonzero(lengths != np.char.str_len(queries)):
+            ids[i] = self.long_tokens.get(tokens[i], default)
+        return ids
+
+    def lookup_nested(self, batch: Sequence, depth: int = 2) -> list:
+        """
+        Get ids of tokens in nested lists, e.g. with `depth` of 2 for a batch of lists of tokens
+        and of 3 for a batch of lists of words split to characters.
+        """
+        lengths = []
+        flat = batch
+        for _ in range(depth - 1):
+            lengths.append([len(item) for item in flat])
+            flat = list(chain.from_iterable(flat))
+        ids = self.lookup(flat).tolist()
+        for level_lengths in reversed(lengths):
+            it = iter(ids)
+            ids = [list(islice(it, n)) for n in level_lengths]
+        return ids
+
+    def most_common(self) -> List[Tuple[str, int]]:
+        order = np.argsort(-self.counts, kind='mergesort')
+        return [(self.token(i), int(self.counts[i])) for i in order]
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Approximate memory used by the index in bytes.
+        """
+        arrays = [self.blob, self.offsets, self.counts, self.sorted_tokens, self.sorted_ids]
+        return sum(a.nbytes for a in arrays) + containers_nbytes(self.long_tokens)
+
+    def save(self, f: BinaryIO) -> None:
+        np.savez(f, blob=self.blob, offsets=self.offsets, counts=self.counts)
+
+    @classmethod
+    def load(cls, f: BinaryIO, default: int = 0, max_width: int = 32) -> 'TokenIndex':
+        data = np.load(f)
+        return cls(data['blob'], data['offsets'], data['counts'], default, max_width)
+
+    @staticmethod
+    def is_binary(path) -> bool:
+        with open(str(path), 'rb') as f:
+            return f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+
+def containers_nbytes(*containers) -> int:
+    """
+    Approximate memory in bytes used by dicts, lists and counters of tokens, including their items.
+    Objects shared between containers are counted once.
+    """
+    seen = set()
+    total = 0
+
+    def add(obj):
+        nonlocal total
+        if id(obj) not in seen:
+            seen.add(id(obj))
+            total += sys.getsizeof(obj)
+
+    for container in containers:
+        if container is None:
+            continue
+        add(container)
+        items = container.items() if isinstance(container, dict) else ((item,) for item in container)
+        for item in items:
+            for obj in item:
+                add(obj)
+    return total
@@ -26,6 +26,7 @@ import zipfile
 import shutil
 
 from deeppavlov.core.common.log import get_logger
+from deeppavlov.core.data.padding import pad_sequences, pad_nested
 
 
 log = get_logger(__name__)
@@ -188,40 +189,17 @@ def tokenize_reg(s):
 def zero_pad(batch, dtype=np.float32):
     if len(batch) == 1 and len(batch[0]) == 0:
         return np.array([], dtype=dtype)
-    batch_size = len(batch)
-    max_len = max(len(utterance) for utterance in batch)
-    if isinstance(batch[0][0], (int, np.int)):
-        padded_batch = np.zeros([batch_size, max_len], dtype=np.int32)
-        for n, utterance in enumerate(batch):
-            padded_batch[n, :len(utterance)] = utterance
-    else:
-        n_features = len(batch[0][0])
-        padded_batch = np.zeros([batch_size, max_len, n_features], dtype=dtype)
-        for n, utterance in enumerate(batch):
-            for k, token_features in enumerate(utterance):
-                padded_batch[n, k] = token_features
-    return padded_batch
+    if isinstance(batch[0][0], (int, np.integer)):
+        dtype = np.int32
+    return pad_sequences(batch, dtype=dtype)
 
 
 def zero_pad_char(batch, dtype=np.float32):
     if len(batch) == 1 and len(batch[0]) == 0:
         return np.array([], dtype=dtype)
-    batch_size = len(batch)
-    max_len = max(len(utterance) for utterance in batch)
-    max_token_len = max(len(ch) for token in batch for ch in token)
-    if isinstance(batch[0][0][0], (int, np.int)):
-        padded_batch = np.zeros([batch_size, max_len, max_token_len], dtype=np.int32)
-        for n, utterance in enumerate(batch):
-            for k, token in enumerate(utterance):
-                padded_batch[n, k, :len(token)] = token
-    else:
-        n_features = len(batch[0][0][0])
-        padded_batch = np.zeros([batch_size, max_len, max_token_len, n_features], dtype=dtype)
-        for n, utterance in enumerate(batch):
-            for k, token in enumerate(utterance):
-                for q, char_features in enumerate(token):
-                    padded_batch[n, k, q] = char_features
-    return padded_batch
+    if isinstance(batch[0][0][0], (int, np.integer)):
+        dtype = np.int32
+    return pad_nested(batch, dtype=dtype)
 
 
 def get_all_elems_from_json(search_json, search_key):
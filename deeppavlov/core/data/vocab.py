@@ -25,6 +25,8 @@ from deeppavlov.core.common.attributes import check_attr_true
 from deeppavlov.core.common.errors import ConfigError
 from deeppavlov.core.common.log import get_logger
 from deeppavlov.core.models.estimator import Estimator
+from deeppavlov.core.data.padding import pad_sequences
+from deeppavlov.core.data.token_index import TokenIndex, containers_nbytes
 
 log = get_logger(__name__)
 
@@ -33,12 +35,17 @@ log = get_logger(__name__)
 class DefaultVocabulary(Estimator):
     def __init__(self, save_path, load_path, level='token',
                  special_tokens=tuple(), default_token=None,
-                 tokenizer=None, min_freq=0, **kwargs):
+                 tokenizer=None, min_freq=0, compact=False, **kwargs):
+        """
+        :param compact: whether to keep tokens in a :class:`~deeppavlov.core.data.token_index.TokenIndex`
+            instead of Python dicts after fitting or loading and to save them in a binary format
+        """
 
         super().__init__(load_path=load_path,
                          save_path=save_path,
                          **kwargs)
 
+        self.compact = compact
         self.special_tokens = special_tokens
         self.default_token = default_token
         self.min_freq = min_freq
@@ -95,22 +102,35 @@ class DefaultVocabulary(Estimator):
         return len(self._t2i)
 
     def keys(self):
-        return (k for k, v in self.freqs.most_common() if k in self._t2i)
+        return (k for k, v in self.items())
 
     def values(self):
-        return (v for k, v in self.freqs.most_common() if k in self._t2i)
+        return (v for k, v in self.items())
 
     def items(self):
+        if self._index is not None:
+            return iter(self._index.most_common())
         return ((k, v) for k, v in self.freqs.most_common() if k in self._t2i)
 
-    def reset(self):
+    def memory_usage(self):
+        """
+        Approximate memory used by tokens of the vocabulary in bytes.
+        """
+        if self._index is not None:
+            return self._index.nbytes
+        return containers_nbytes(self._t2i, self._i2t, self.freqs)
+
+    def _default_index(self):
         # default index is the position of default_token
         if self.default_token is not None:
-            default_ind = self.special_tokens.index(self.default_token)
-        else:
-            default_ind = 0
+            return self.special_tokens.index(self.default_token)
+        return 0
+
+    def reset(self):
+        default_ind = self._default_index()
         self._t2i = defaultdict(lambda: default_ind)
         self._i2t = dict()
+        self._index = None
         self.freqs = Counter()
 
         for i, token in enumerate(self.special_tokens):
@@ -126,6 +146,15 @@ class DefaultVocabulary(Estimator):
             counts=None,
             update=True
         )
+        if self.compact:
+            self._compact()
+
+    def _compact(self):
+        tokens = [self._i2t[i] for i in range(len(self._i2t))]
+        counts = [self.freqs[token] for token in tokens]
+        self._index = TokenIndex.from_tokens(tokens, counts, default=self._default_index())
+        self._t2i = self._i2t = self._index
+        self.freqs = None
 
     def _train(self, tokens, counts=None, update=True):
         counts = counts or itertools.repeat(1)
@@ -144,13 +173,21 @@ class DefaultVocabulary(Estimator):
         return
 
     def __call__(self, samples, **kwargs):
+        if self._index is not None and samples and all(isinstance(s, str) for s in samples):
+            return self._index.lookup(samples).tolist()
         return [self[s] for s in samples]
 
     def save(self):
         log.info("[saving vocabulary to {}]".format(self.save_path))
+        if self.compact:
+            if self._index is None:
+                self._compact()
+            with self.save_path.open('wb') as f:
+                self._index.save(f)
+            return
 
         with self.save_path.open('wt', encoding="utf8") as f:
-            for n in range(len(self._t2i)):
+            for n in range(len(self._i2t)):
                 token = self._i2t[n]
                 cnt = self.freqs[token]
                 f.write('{}\t{:d}\n'.format(token, cnt))
@@ -160,12 +197,25 @@ class DefaultVocabulary(Estimator):
         if self.load_path:
             if self.load_path.is_file():
                 log.info("[loading vocabulary from {}]".format(self.load_path))
-                tokens, counts = [], []
-                for ln in self.load_path.open('r', encoding="utf8"):
-                    token, cnt = ln.split('\t', 1)
-                    tokens.append(token)
-                    counts.append(int(cnt))
+                if self._index is not None:
+                    self.reset()
+                if TokenIndex.is_binary(self.load_path):
+                    with self.load_path.open('rb') as f:
+                        index = TokenIndex.load(f, default=self._default_index())
+                    if self.compact:
+                        self._index = self._t2i = self._i2t = index
+                        self.freqs = None
+                        return
+                    tokens, counts = list(index), index.counts.tolist()
+                else:
+                    tokens, counts = [], []
+                    for ln in self.load_path.open('r', encoding="utf8"):
+                        token, cnt = ln.split('\t', 1)
+                        tokens.append(token)
+                        counts.append(int(cnt))
                 self._train(tokens=tokens, counts=counts, update=True)
+                if self.compact:
+                    self._compact()
             elif isinstance(self.load_path, Path):
                 if not self.load_path.parent.is_dir():
                     raise ConfigError("Provided `load_path` for {} doesn't exist!".format(
@@ -187,17 +237,16 @@ class DefaultVocabulary(Estimator):
         return self._t2i[tok]
 
     def toks2idxs(self, toks):
+        if self._index is not None:
+            return self._index.lookup(toks).tolist()
         return [self._t2i[tok] for tok in toks]
 
     def batch_toks2batch_idxs(self, b_toks):
-        max_len = max(len(toks) for toks in b_toks)
-        # Create array filled with paddings
-        # batch = np.ones([len(b_toks), max_len]) * self.tok2idx('<PAD>')
-        batch = np.zeros([len(b_toks), max_len])
-        for n, tokens in enumerate(b_toks):
-            idxs = self.toks2idxs(tokens)
-            batch[n, :len(idxs)] = idxs
-        return batch
+        if self._index is not None:
+            b_idxs = self._index.lookup_nested(b_toks, 2)
+        else:
+            b_idxs = [self.toks2idxs(tokens) for tokens in b_toks]
+        return pad_sequences(b_idxs, dtype=np.float64)
 
     def batch_idxs2batch_toks(self, b_idxs, filter_paddings=False):
         return [self.idxs2toks(idxs, filter_paddings) for idxs in b_idxs]
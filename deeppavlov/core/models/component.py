@@ -24,3 +24,9 @@ class Component(metaclass=ABCMeta):
 
     def reset(self):
         pass
+
+    def destroy(self):
+        """
+        Release resources held by the component, like worker processes or threads.
+        """
+        pass
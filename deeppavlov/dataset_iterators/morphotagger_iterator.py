@@ -15,10 +15,10 @@ limitations under the License.
 """
 
 import random
-import numpy as np
 
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.data.data_learning_iterator import DataLearningIterator
+from deeppavlov.core.data.padding import bucket_by_length
 
 
 def process_word(word, to_lower=False, append_case=None):
@@ -85,12 +85,7 @@ class MorphoTaggerDatasetIterator(DataLearningIterator):
         if shuffle:
             random.shuffle(data)
         lengths = [len(x[0]) for x in data]
-        indexes = np.argsort(lengths)
-        L = len(data)
-        if batch_size < 0:
-            batch_size = L
-        for start in range(0, L, batch_size):
-            indexes_to_yield = indexes[start:start+batch_size]
+        for indexes_to_yield in bucket_by_length(lengths, batch_size):
             data_to_yield = tuple(zip(*([data[i] for i in indexes_to_yield])))
             if return_indexes:
                 yield indexes_to_yield, data_to_yield
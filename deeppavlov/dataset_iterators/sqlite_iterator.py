@@ -15,11 +15,13 @@ limitations under the License.
 """
 
 import sqlite3
+import threading
 from typing import List, Any, Dict, Optional, Generator, Tuple
 from random import Random
 
 from overrides import overrides
 
+from deeppavlov.core.common.cache import LRUCache
 from deeppavlov.core.common.log import get_logger
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.data.utils import download
@@ -30,6 +32,9 @@ logger = get_logger(__name__)
 
 DB_URL = 'http://lnsigo.mipt.ru/export/datasets/wikipedia/enwiki.db'
 
+# default SQLITE_MAX_VARIABLE_NUMBER
+MAX_VARIABLES = 999
+
 
 @register('sqlite_iterator')
 class SQLiteDataIterator(DataFittingIterator):
@@ -38,11 +43,12 @@ class SQLiteDataIterator(DataFittingIterator):
     """
 
     def __init__(self, data_dir: str = '', data_url: str = DB_URL, batch_size: int = None,
-                 shuffle: bool = None, seed: int = None, **kwargs):
+                 shuffle: bool = None, seed: int = None, cache_size: int = 0, **kwargs):
         """
         :param data_dir: a directory name where DB is located
         :param data_url: an URL to SQLite DB
         :param batch_size: a batch size for reading from the database
+        :param cache_size: a number of recently fetched documents to keep in memory
         """
         download_dir = expand_path(data_dir)
         download_path = download_dir.joinpath(data_url.split("/")[-1])
@@ -52,7 +58,12 @@ class SQLiteDataIterator(DataFittingIterator):
         #     logger.info('[downloading wiki.db from {} to {}]'.format(data_url, download_path))
         #     download(download_path, data_url)
 
+        self.db_path = download_path
         self.connect = sqlite3.connect(str(download_path), check_same_thread=False)
+        self.local = threading.local()
+        self._read_connections = {}
+        self._read_connections_lock = threading.Lock()
+        self.cache = LRUCache(cache_size)
         self.db_name = self.get_db_name()
         self.doc_ids = self.get_doc_ids()
         self.doc2index = self.map_doc2idx()
@@ -82,13 +93,65 @@ class SQLiteDataIterator(DataFittingIterator):
             "SQLite iterator: The size of the database is {} documents".format(len(doc2idx)))
         return doc2idx
 
+    def get_read_connection(self) -> sqlite3.Connection:
+        """
+        Get a read-only connection of the current thread.
+        Connections of finished threads are closed when a new one is opened.
+        """
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            uri = '{}?mode=ro'.format(self.db_path.resolve().as_uri())
+            connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            self.local.connection = connection
+            with self._read_connections_lock:
+                for thread in [t for t in self._read_connections if not t.is_alive()]:
+                    self._read_connections.pop(thread).close()
+                self._read_connections[threading.current_thread()] = connection
+        return connection
+
+    def close(self) -> None:
+        """
+        Close the database connection and read connections of all threads.
+        """
+        with self._read_connections_lock:
+            for connection in self._read_connections.values():
+                connection.close()
+            self._read_connections.clear()
+            self.local = threading.local()
+        self.connect.close()
+
     @overrides
     def get_doc_content(self, doc_id: Any) -> Optional[str]:
-        cursor = self.connect.cursor()
-        cursor.execute(
-            "SELECT text FROM {} WHERE id = ?".format(self.db_name),
-            (doc_id,)
-        )
-        result = cursor.fetchone()
+        return self.get_docs_content([doc_id])[0]
+
+    @overrides
+    def get_docs_content(self, doc_ids: List[Any]) -> List[Optional[str]]:
+        """
+        Get contents of several documents, using a single query for those which aren't cached.
+        :param doc_ids: document ids
+        :return: document contents, None for missing documents
+        """
+        contents = {}
+        missing = []
+        for doc_id in doc_ids:
+            content = self.cache.get(doc_id)
+            if content is None:
+                missing.append(doc_id)
+            else:
+                contents[doc_id] = content
+
+        missing = list(set(missing))
+        cursor = self.get_read_connection().cursor()
+        for i in range(0, len(missing), MAX_VARIABLES):
+            chunk = missing[i:i + MAX_VARIABLES]
+            cursor.execute(
+                "SELECT id, text FROM {} WHERE id IN ({})".format(self.db_name,
+                                                                  ','.join('?' * len(chunk))),
+                chunk
+            )
+            for doc_id, content in cursor.fetchall():
+                contents[doc_id] = content
+                self.cache.put(doc_id, content)
         cursor.close()
-        return result if result is None else result[0]
+
+        return [contents.get(doc_id) for doc_id in doc_ids]
@@ -23,7 +23,7 @@ p = (Path(__file__) / ".." / "..").resolve()
 sys.path.append(str(p))
 
 from deeppavlov.core.commands.train import train_evaluate_model_from_config
-from deeppavlov.core.commands.infer import interact_model, predict_on_stream
+from deeppavlov.core.commands.infer import interact_model, predict_on_stream, profile_on_stream
 from deeppavlov.core.common.log import get_logger
 from deeppavlov.download import deep_download
 from utils.telegram_utils.telegram_ui import interact_model_by_telegram
@@ -35,12 +35,21 @@ log = get_logger(__name__)
 parser = argparse.ArgumentParser()
 
 parser.add_argument("mode", help="select a mode, train or interact", type=str,
-                    choices={'train', 'evaluate', 'interact', 'predict', 'interactbot', 'riseapi', 'download'})
+                    choices={'train', 'evaluate', 'interact', 'predict', 'profile', 'interactbot', 'riseapi',
+                             'download'})
 parser.add_argument("config_path", help="path to a pipeline json config", type=str)
 parser.add_argument("-t", "--token", help="telegram bot token", type=str)
 parser.add_argument("-b", "--batch-size", dest="batch_size", default=1, help="inference batch size", type=int)
 parser.add_argument("-f", "--input-file", dest="file_path", default=None, help="Path to the input file", type=str)
 parser.add_argument("-d", "--download", action="store_true", help="download model components")
+parser.add_argument("--latency", action="store_true",
+                    help="report per-component latency statistics in predict and evaluate modes")
+parser.add_argument("-j", "--jobs", dest="n_jobs", default=1,
+                    help="number of worker processes in predict mode", type=int)
+parser.add_argument("--start-line", dest="start_line", default=0,
+                    help="number of input lines to skip in predict mode", type=int)
+parser.add_argument("-o", "--profile-output", dest="profile_output", default="profile",
+                    help="path prefix for trace files in profile mode", type=str)
 
 
 def find_config(pipeline_config_path: str):
@@ -63,7 +72,8 @@ def main():
     if args.mode == 'train':
         train_evaluate_model_from_config(pipeline_config_path)
     elif args.mode == 'evaluate':
-        train_evaluate_model_from_config(pipeline_config_path, to_train=False, to_validate=False)
+        train_evaluate_model_from_config(pipeline_config_path, to_train=False, to_validate=False,
+                                         instrument=args.latency)
     elif args.mode == 'interact':
         interact_model(pipeline_config_path)
     elif args.mode == 'interactbot':
@@ -74,7 +84,10 @@ def main():
     elif args.mode == 'riseapi':
         start_model_server(pipeline_config_path)
     elif args.mode == 'predict':
-        predict_on_stream(pipeline_config_path, args.batch_size, args.file_path)
+        predict_on_stream(pipeline_config_path, args.batch_size, args.file_path, instrument=args.latency,
+                          n_jobs=args.n_jobs, start_line=args.start_line)
+    elif args.mode == 'profile':
+        profile_on_stream(pipeline_config_path, args.batch_size, args.file_path, args.profile_output)
 
 
 if __name__ == "__main__":
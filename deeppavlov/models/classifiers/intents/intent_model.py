@@ -28,6 +28,7 @@ from keras.regularizers import l2
 
 from deeppavlov.core.common.errors import ConfigError
 from deeppavlov.core.common.registry import register
+from deeppavlov.core.data.padding import pad_sequences
 from deeppavlov.core.models.keras_model import KerasModel
 from deeppavlov.models.classifiers.intents.utils import labels2onehot, proba2labels
 from deeppavlov.models.embedders.fasttext_embedder import FasttextEmbedder
@@ -158,12 +159,9 @@ class KerasIntentModel(KerasModel):
         Returns:
             array of embedded texts
         """
-        pad = np.zeros(self.opt['embedding_size'])
-
         embeddings_batch = self.fasttext_model([sen[:self.opt['text_size']] for sen in sentences])
-        embeddings_batch = [[pad] * (self.opt['text_size'] - len(tokens)) + tokens for tokens in embeddings_batch]
-
-        embeddings_batch = np.asarray(embeddings_batch)
+        embeddings_batch = pad_sequences(embeddings_batch, self.opt['text_size'], padding='pre', dtype=np.float32,
+                                         feature_shape=(self.opt['embedding_size'],))
         return embeddings_batch
 
     def train_on_batch(self, texts, labels):
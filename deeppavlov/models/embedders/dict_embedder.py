@@ -22,7 +22,7 @@ from deeppavlov.core.common.registry import register
 from deeppavlov.core.models.component import Component
 from deeppavlov.core.common.log import get_logger
 from deeppavlov.core.models.serializable import Serializable
-from typing import List
+from deeppavlov.models.embedders.embedding_store import EmbeddingStore
 
 log = get_logger(__name__)
 
@@ -33,6 +33,7 @@ class DictEmbedder(Component, Serializable):
         super().__init__(save_path=save_path, load_path=load_path)
         self.tok2emb = {}
         self.dim = dim
+        self.store = None
 
         self.load()
 
@@ -41,13 +42,16 @@ class DictEmbedder(Component, Serializable):
 
     def load(self):
         """
-        Load dictionary of embeddings from file.
+        Load dictionary of embeddings from file or open an embedding store from a directory.
         """
 
         if not Path(self.load_path).exists():
             raise FileNotFoundError(
                 'There is no dictionary of embeddings <<{}>> file provided.'.format(
                     self.load_path))
+        elif Path(self.load_path).is_dir():
+            log.info('Opening embedding store {}'.format(self.load_path))
+            self.store = EmbeddingStore(self.load_path)
         else:
             log.info('Loading existing dictionary of embeddings from {}'.format(self.load_path))
 
@@ -64,6 +68,8 @@ class DictEmbedder(Component, Serializable):
         """
         Embed data
         """
+        if self.store is not None:
+            return self.store.embed([sentence.split() for sentence in batch], self.dim, mean=mean)
         return [self._encode(sentence, mean) for sentence in batch]
 
     def _encode(self, sentence: str, mean):
@@ -74,7 +80,6 @@ class DictEmbedder(Component, Serializable):
                 emb = self.tok2emb[t]
             except KeyError:
                 emb = np.zeros(self.dim, dtype=np.float32)
-                self.tok2emb[t] = emb
             embedded_tokens.append(emb)
 
         if mean:
@@ -0,0 +1,241 @@
+"""
+Copyright 2017 Neural Networks and Deep Learning lab, MIPT
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import argparse
+import json
+import zlib
+from itertools import chain
+from pathlib import Path
+from typing import List, Iterable, Iterator, Callable, Optional, Union
+
+import numpy as np
+
+from deeppavlov.core.common.log import get_logger
+
+log = get_logger(__name__)
+
+
+def _hash(token: bytes) -> int:
+    return zlib.crc32(token)
+
+
+class EmbeddingStore:
+    """
+    Read-only token embeddings stored in a directory of numpy arrays:
+    a float32 matrix of vectors, tokens as a single utf-8 blob with offsets and
+    an open addressing hash table of token rows.
+
+    All arrays are memory-mapped, so opening a store takes milliseconds and the pages are
+    shared between processes that use the same files.
+    """
+
+    def __init__(self, path: Union[str, Path], mmap: bool = True):
+        """
+        :param path: a directory created with :meth:`EmbeddingStore.build`
+        :param mmap: whether to memory-map the arrays instead of reading them to memory
+        """
+        path = Path(path)
+        mmap_mode = 'r' if mmap else None
+        with (path / 'meta.json').open(encoding='utf8') as f:
+            meta = json.load(f)
+        self.dim = meta['dim']
+        self.vectors = np.load(path / 'vectors.npy', mmap_mode=mmap_mode)
+        self.blob = np.load(path / 'tokens.npy', mmap_mode=mmap_mode)
+        self.offsets = np.load(path / 'offsets.npy', mmap_mode=mmap_mode)
+        self.table = np.load(path / 'table.npy', mmap_mode=mmap_mode)
+        self._mask = len(self.table) - 1
+
+    @staticmethod
+    def build(path: Union[str, Path], tokens: Iterable[str], vectors: np.ndarray) -> None:
+        """
+        Save tokens and their vectors (rows of `vectors` in the same order) as a store.
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        encoded = [token.encode('utf8') for token in tokens]
+        if len(encoded) != len(vectors):
+            raise ValueError('Got {} tokens for {} vectors'.format(len(encoded), len(vectors)))
+
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(e) for e in encoded])
+
+        # a power of two that keeps the table at most half full
+        table = np.full(1 << max(int(2 * len(encoded)).bit_length(), 1), -1, dtype=np.int64)
+        mask = len(table) - 1
+        for row, token in enumerate(encoded):
+            slot = _hash(token) & mask
+            while table[slot] >= 0:
+                if encoded[table[slot]] == token:
+                    break
+                slot = (slot + 1) & mask
+            else:
+                table[slot] = row
+
+        np.save(path / 'tokens.npy', np.frombuffer(b''.join(encoded), dtype=np.uint8))
+        np.save(path / 'offsets.npy', offsets)
+        np.save(path / 'table.npy', table)
+        vectors_path = path / 'vectors.npy'
+        if isinstance(vectors, np.memmap) and Path(vectors.filename).resolve() == vectors_path.resolve():
+            vectors.flush()
+        else:
+            np.save(vectors_path, np.asarray(vectors, dtype=np.float32))
+        with (path / 'meta.json').open('w', encoding='utf8') as f:
+            json.dump({'dim': int(vectors.shape[1]), 'n_tokens': len(encoded)}, f)
+
+    @classmethod
+    def from_text(cls, src: Union[str, Path], path: Union[str, Path], header: bool = True,
+                  dim: Optional[int] = None) -> 'EmbeddingStore':
+        """
+        Convert a text file with a token and its vector values on every line (the word2vec text
+        format if `header` is set, like the one used by :class:`GloVeEmbedder`, or the format
+        of :class:`DictEmbedder` otherwise) to a store.
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        with open(str(src), encoding='utf8') as f:
+            if header:
+                n_tokens, dim = map(int, f.readline().split())
+            else:
+                n_tokens = sum(1 for _ in f)
+                f.seek(0)
+                if dim is None:
+                    dim = len(f.readline().rstrip().split(' ')) - 1
+                    f.seek(0)
+
+            vectors = np.lib.format.open_memmap(str(path / 'vectors.npy'), mode='w+', dtype=np.float32,
+                                                shape=(n_tokens, dim))
+            tokens = []
+            for row, line in enumerate(f):
+                token, *values = line.rstrip().rsplit(' ', dim)
+                tokens.append(token)
+                vectors[row] = np.asarray(values, dtype=np.float32)
+        cls.build(path, tokens, vectors)
+        del vectors
+        return cls(path)
+
+    @classmethod
+    def from_fasttext(cls, src: Union[str, Path], path: Union[str, Path]) -> 'EmbeddingStore':
+        """
+        Save vectors of the vocabulary of a fastText binary model as a store.
+        """
+        import fastText as Fasttext
+
+        model = Fasttext.load_model(str(src))
+        tokens = model.get_words()
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        vectors = np.lib.format.open_memmap(str(path / 'vectors.npy'), mode='w+', dtype=np.float32,
+                                            shape=(len(tokens), model.get_dimension()))
+        for row, token in enumerate(tokens):
+            vectors[row] = model.get_word_vector(token)
+        cls.build(path, tokens, vectors)
+        del vectors
+        return cls(path)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def token(self, row: int) -> str:
+        return self.blob[self.offsets[row]:self.offsets[row + 1]].tobytes().decode('utf8')
+
+    def __iter__(self) -> Iterator[str]:
+        for row in range(len(self)):
+            yield self.token(row)
+
+    def index(self, token: str) -> int:
+        """
+        Get a row of the token vector or -1 if there is no such token.
+        """
+        encoded = token.encode('utf8')
+        slot = _hash(encoded) & self._mask
+        while True:
+            row = self.table[slot]
+            if row < 0:
+                return -1
+            if self.blob[self.offsets[row]:self.offsets[row + 1]].tobytes() == encoded:
+                return int(row)
+            slot = (slot + 1) & self._mask
+
+    def __contains__(self, token: str) -> bool:
+        return self.index(token) >= 0
+
+    def embed(self, batch: List[List[str]], dim: Optional[int] = None, mean: bool = False, pad: bool = False,
+              oov: Optional[Callable[[str], np.ndarray]] = None) -> Union[list, np.ndarray]:
+        """
+        Embed a batch of tokenized samples. Vectors of every distinct token of the batch are gathered
+        from the matrix at once.
+
+        :param batch: a list of lists of tokens
+        :param dim: a number of first vector components to use, all of them by default
+        :param mean: whether to return a mean of nonzero token vectors for every sample
+        :param pad: whether to return a zero padded array of shape [batch_size, max_len, dim]
+        :param oov: a function to get vectors of unknown tokens, zero vectors are used by default
+        :return: a list of lists of token vectors, a list of mean vectors or a padded array
+        """
+        dim = dim or self.dim
+        if not batch:
+            return np.zeros((0, 0, dim), dtype=np.float32) if pad and not mean else []
+
+        positions = {}
+        flat = np.fromiter((positions.setdefault(token, len(positions)) for token in chain.from_iterable(batch)),
+                           dtype=np.int64)
+        unique = list(positions)
+        rows = np.fromiter((self.index(token) for token in unique), dtype=np.int64, count=len(unique))
+
+        vectors = np.zeros((len(unique), dim), dtype=np.float32)
+        known = rows >= 0
+        if known.any():
+            vectors[known] = self.vectors[rows[known], :dim]
+        if oov is not None:
+            for i in np.flatnonzero(~known):
+                vectors[i] = oov(unique[i])[:dim]
+
+        lengths = [len(sample) for sample in batch]
+        if not (pad or mean):
+            tokens = vectors[flat]
+            bounds = np.cumsum(lengths)[:-1]
+            return [list(sample) for sample in np.split(tokens, bounds)]
+
+        padded = np.zeros((len(batch), max(lengths, default=0), dim), dtype=np.float32)
+        sample_ids = np.repeat(np.arange(len(batch)), lengths)
+        token_ids = np.arange(len(flat)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        padded[sample_ids, token_ids] = vectors[flat]
+        if not mean:
+            return padded
+
+        counts = np.any(padded, axis=2).sum(axis=1)
+        means = padded.sum(axis=1) / np.maximum(counts, 1).astype(np.float32)[:, None]
+        return list(means)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert embeddings to a memory-mapped embedding store')
+    parser.add_argument('src', help='a fastText .bin model or a text file with embeddings')
+    parser.add_argument('path', help='an output directory')
+    parser.add_argument('--format', choices=['fasttext', 'word2vec', 'dict'], default='word2vec',
+                        help='fastText binary, text with a "<n_tokens> <dim>" header line or text without a header')
+    parser.add_argument('--dim', type=int, default=None, help='vectors dimensionality of a text file without header')
+    args = parser.parse_args()
+
+    if args.format == 'fasttext':
+        store = EmbeddingStore.from_fasttext(args.src, args.path)
+    else:
+        store = EmbeddingStore.from_text(args.src, args.path, header=args.format == 'word2vec', dim=args.dim)
+    log.info('Saved {} vectors of dimensionality {} to {}'.format(len(store), store.dim, args.path))
+
+
+if __name__ == '__main__':
+    main()
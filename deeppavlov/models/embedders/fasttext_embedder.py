@@ -21,11 +21,14 @@ from typing import List
 import numpy as np
 import fastText as Fasttext
 
+from deeppavlov.core.commands.utils import expand_path
+from deeppavlov.core.common.cache import LRUCache
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.models.component import Component
 from deeppavlov.core.common.log import get_logger
 from deeppavlov.core.models.serializable import Serializable
 from deeppavlov.core.data.utils import zero_pad
+from deeppavlov.models.embedders.embedding_store import EmbeddingStore
 
 log = get_logger(__name__)
 
@@ -35,20 +38,27 @@ class FasttextEmbedder(Component, Serializable):
     """
     Class implements fastText embedding model
     """
-    def __init__(self, load_path, save_path=None, dim=100, pad_zero=False, **kwargs):
+    def __init__(self, load_path, save_path=None, dim=100, pad_zero=False, oov_load_path=None, cache_size=10000,
+                 **kwargs):
         """
         Initialize embedder with given parameters
         Args:
-            load_path: path where to load pre-trained embedding model from
+            load_path: path where to load pre-trained embedding model from: a fastText binary model
+                or a directory of an embedding store
             save_path: is not used because model is not trainable; therefore, it is unchangable
             dim: dimensionality of fastText model
             pad_zero: whether to pad samples or not
+            oov_load_path: path to a fastText binary model to compute vectors of tokens missing
+                in the embedding store from their subwords (zero vectors are used otherwise)
+            cache_size: number of computed vectors of tokens to keep in memory
             **kwargs: additional arguments
         """
         super().__init__(save_path=save_path, load_path=load_path)
-        self.tok2emb = {}
+        self.cache = LRUCache(cache_size)
         self.dim = dim
         self.pad_zero = pad_zero
+        self.oov_load_path = expand_path(oov_load_path) if oov_load_path else None
+        self.store = None
         self.model = self.load()
 
     def save(self, *args, **kwargs):
@@ -65,7 +75,14 @@ class FasttextEmbedder(Component, Serializable):
             fastText pre-trained model
         """
 
-        if self.load_path and self.load_path.is_file():
+        if self.load_path and self.load_path.is_dir():
+            log.info("[opening embedding store `{}`]".format(self.load_path))
+            self.store = EmbeddingStore(self.load_path)
+            model = None
+            if self.oov_load_path:
+                log.info("[loading embeddings for unknown tokens from `{}`]".format(self.oov_load_path))
+                model = Fasttext.load_model(str(self.oov_load_path))
+        elif self.load_path and self.load_path.is_file():
             log.info("[loading embeddings from `{}`]".format(self.load_path))
             model_file = str(self.load_path)
             model = Fasttext.load_model(model_file)
@@ -89,6 +106,10 @@ class FasttextEmbedder(Component, Serializable):
         Returns:
             embedded batch
         """
+        if self.store is not None:
+            oov = self._get_word_vector if self.model is not None else None
+            return self.store.embed(batch, self.dim, mean=mean, pad=self.pad_zero, oov=oov)
+
         batch = [self._encode(sample, mean) for sample in batch]
         if self.pad_zero:
             batch = zero_pad(batch)
@@ -100,7 +121,20 @@ class FasttextEmbedder(Component, Serializable):
         Returns:
             iterator
         """
-        yield from self.model.get_words()
+        if self.store is not None:
+            yield from self.store
+        else:
+            yield from self.model.get_words()
+
+    def _get_word_vector(self, token: str) -> np.ndarray:
+        emb = self.cache.get(token)
+        if emb is None:
+            try:
+                emb = self.model.get_word_vector(token)[:self.dim]
+            except KeyError:
+                emb = np.zeros(self.dim, dtype=np.float32)
+            self.cache.put(token, emb)
+        return emb
 
     def _encode(self, tokens: List[str], mean: bool):
         """
@@ -112,17 +146,7 @@ class FasttextEmbedder(Component, Serializable):
         Returns:
             list of embedded tokens
         """
-        embedded_tokens = []
-        for t in tokens:
-            try:
-                emb = self.tok2emb[t]
-            except KeyError:
-                try:
-                    emb = self.model.get_word_vector(t)[:self.dim]
-                except KeyError:
-                    emb = np.zeros(self.dim, dtype=np.float32)
-                self.tok2emb[t] = emb
-            embedded_tokens.append(emb)
+        embedded_tokens = [self._get_word_vector(t) for t in tokens]
 
         if mean:
             filtered = [et for et in embedded_tokens if np.any(et)]
@@ -26,7 +26,7 @@ from deeppavlov.core.models.component import Component
 from deeppavlov.core.common.log import get_logger
 from deeppavlov.core.models.serializable import Serializable
 from deeppavlov.core.data.utils import zero_pad
-from typing import List
+from deeppavlov.models.embedders.embedding_store import EmbeddingStore
 
 log = get_logger(__name__)
 
@@ -35,9 +35,9 @@ log = get_logger(__name__)
 class GloVeEmbedder(Component, Serializable):
     def __init__(self, load_path, save_path=None, dim=100, pad_zero=False, **kwargs):
         super().__init__(save_path=save_path, load_path=load_path)
-        self.tok2emb = {}
         self.dim = dim
         self.pad_zero = pad_zero
+        self.store = None
         self.model = self.load()
 
     def save(self, *args, **kwargs):
@@ -45,9 +45,14 @@ class GloVeEmbedder(Component, Serializable):
 
     def load(self, *args, **kwargs):
         """
-        Load dict of embeddings from file
+        Load dict of embeddings from file or open an embedding store from a directory
         """
 
+        if self.load_path and self.load_path.is_dir():
+            log.info("[opening embedding store `{}`]".format(self.load_path))
+            self.store = EmbeddingStore(self.load_path)
+            return None
+
         # Check that header with n_words emb_dim present
         with open(self.load_path) as f:
             header = f.readline()
@@ -68,13 +73,19 @@ class GloVeEmbedder(Component, Serializable):
         return model
 
     def __iter__(self):
-        yield from self.model.vocab
+        if self.store is not None:
+            yield from self.store
+        else:
+            yield from self.model.vocab
 
     @overrides
     def __call__(self, batch, mean=False, *args, **kwargs):
         """
         Embed data
         """
+        if self.store is not None:
+            return self.store.embed(batch, self.dim, mean=mean, pad=self.pad_zero)
+
         embedded = []
         for n, sample in enumerate(batch):
             embedded.append(self._encode(sample, mean))
@@ -86,13 +97,9 @@ class GloVeEmbedder(Component, Serializable):
         embedded_tokens = []
         for t in tokens:
             try:
-                emb = self.tok2emb[t]
+                emb = self.model[t][:self.dim]
             except KeyError:
-                try:
-                    emb = self.model[t][:self.dim]
-                except KeyError:
-                    emb = np.zeros(self.dim, dtype=np.float32)
-                self.tok2emb[t] = emb
+                emb = np.zeros(self.dim, dtype=np.float32)
             embedded_tokens.append(emb)
 
         if mean:
@@ -24,6 +24,7 @@ import keras.regularizers as kreg
 from keras import Model
 
 from deeppavlov.core.common.log import get_logger
+from deeppavlov.core.data.padding import pad_sequences, pad_nested
 from deeppavlov.core.data.vocab import DefaultVocabulary
 from .common_tagger import *
 from .cells import Highway
@@ -164,9 +165,11 @@ class CharacterTagger:
 
     def _transform_batch(self, data, labels=None, transform_to_one_hot=True):
         L = max(len(x) for x in data)
-        X = np.array([self._make_sent_vector(x, L) for x in data])
+        begin, end, pad = self.tags.tok2idx("BEGIN"), self.tags.tok2idx("END"), self.tags.tok2idx("PAD")
+        X = pad_nested([[self._make_word_vector(word, begin, end) for word in sent] for sent in data], L,
+                       MAX_WORD_LENGTH+2, value=pad, token_value=0, dtype=np.int32)
         if labels is not None:
-            Y = np.array([self._make_tags_vector(y, L) for y in labels])
+            Y = pad_sequences([[self.tags.tok2idx(tag) for tag in y] for y in labels], L, dtype=np.int32)
             if transform_to_one_hot:
                 Y = to_one_hot(Y, len(self.tags))
             return X, Y
@@ -201,24 +204,9 @@ class CharacterTagger:
             answer[i] = elem if return_indexes else self.tags.idxs2toks(elem)
         return answer
 
-    def _make_sent_vector(self, sent, bucket_length=None):
-        bucket_length = bucket_length or len(sent)
-        answer = np.zeros(shape=(bucket_length, MAX_WORD_LENGTH+2), dtype=np.int32)
-        for i, word in enumerate(sent):
-            answer[i, 0] = self.tags.tok2idx("BEGIN")
-            m = min(len(word), MAX_WORD_LENGTH)
-            for j, x in enumerate(word[-m:]):
-                answer[i, j+1] = self.symbols.tok2idx(x)
-            answer[i, m+1] = self.tags.tok2idx("END")
-            answer[i, m+2:] = self.tags.tok2idx("PAD")
-        return answer
-
-    def _make_tags_vector(self, tags, bucket_length=None):
-        bucket_length = bucket_length or len(tags)
-        answer = np.zeros(shape=(bucket_length,), dtype=np.int32)
-        for i, tag in enumerate(tags):
-            answer[i] = self.tags.tok2idx(tag)
-        return answer
+    def _make_word_vector(self, word, begin, end):
+        m = min(len(word), MAX_WORD_LENGTH)
+        return [begin] + [self.symbols.tok2idx(x) for x in word[-m:]] + [end]
 
     def save(self, outfile):
         """
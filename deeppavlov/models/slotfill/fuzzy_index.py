@@ -0,0 +1,78 @@
+"""
+Copyright 2017 Neural Networks and Deep Learning lab, MIPT
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from typing import Sequence, List
+
+import numpy as np
+
+
+class NgramIndex:
+    """
+    A character n-gram inverted index of a fixed list of strings. For a query it counts
+    how many n-grams of every string occur in the query, so that expensive fuzzy matching
+    is only run for strings that share enough characters with it.
+    """
+
+    def __init__(self, strings: Sequence[str], n: int = 3):
+        """
+        :param strings: strings to index
+        :param n: length of character n-grams
+        """
+        self.n = n
+        self.gram_ids = {}
+        ids, owners = [], []
+        for i, s in enumerate(strings):
+            for gram in self.ngrams(s):
+                ids.append(self.gram_ids.setdefault(gram, len(self.gram_ids)))
+                owners.append(i)
+        ids = np.array(ids, dtype=np.int64)
+        owners = np.array(owners, dtype=np.int64)
+
+        # a number of n-gram positions in every string
+        self.lengths = np.bincount(owners, minlength=len(strings))
+        # owners of n-gram positions grouped by n-gram
+        order = np.argsort(ids, kind='mergesort')
+        self.postings = owners[order]
+        self.offsets = np.searchsorted(ids[order], np.arange(len(self.gram_ids) + 1))
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def ngrams(self, s: str) -> List[str]:
+        return [s[i:i + self.n] for i in range(len(s) - self.n + 1)]
+
+    def overlap(self, query: str) -> np.ndarray:
+        """
+        Count n-gram positions of every indexed string whose n-grams occur in the query.
+        """
+        grams = {self.gram_ids[gram] for gram in self.ngrams(query) if gram in self.gram_ids}
+        if not grams:
+            return np.zeros(len(self), dtype=np.int64)
+        owners = np.concatenate([self.postings[self.offsets[g]:self.offsets[g + 1]] for g in grams])
+        return np.bincount(owners, minlength=len(self))
+
+    def most_similar(self, query: str, k: int) -> np.ndarray:
+        """
+        Get sorted indices of at most `k` strings with the largest share of n-grams in common with the query,
+        and of all strings too short to have n-grams.
+        """
+        overlap = self.overlap(query)
+        n_query = max(len(query) - self.n + 1, 1)
+        similarity = overlap / np.maximum(np.minimum(self.lengths, n_query), 1)
+        candidates = np.flatnonzero(overlap)
+        if len(candidates) > k:
+            candidates = candidates[np.argsort(-similarity[candidates], kind='mergesort')[:k]]
+        return np.union1d(candidates, np.flatnonzero(self.lengths == 0))
@@ -14,7 +14,7 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 import json
-from fuzzywuzzy import process
+from fuzzywuzzy import process, utils
 from overrides import overrides
 
 from deeppavlov.core.common.registry import register
@@ -22,15 +22,22 @@ from deeppavlov.core.data.utils import download
 from deeppavlov.core.common.log import get_logger
 from deeppavlov.core.models.serializable import Serializable
 from deeppavlov.core.models.component import Component
+from deeppavlov.models.slotfill.fuzzy_index import NgramIndex
 
 log = get_logger(__name__)
 
 
 @register('dstc_slotfilling')
 class DstcSlotFillingNetwork(Component, Serializable):
-    def __init__(self, threshold=0.8, **kwargs):
+    def __init__(self, threshold=0.8, max_candidates=None, **kwargs):
+        """
+        :param threshold: minimal similarity of a named entity and a slot value to fill the slot
+        :param max_candidates: if set, an entity is only compared to this number of slot values
+            that share most character trigrams with it instead of all values of the slot
+        """
         super().__init__(**kwargs)
         self.threshold = threshold
+        self.max_candidates = max_candidates
         # Check existance of file with slots, slot values, and corrupted (misspelled) slot values
         self.load()
 
@@ -60,14 +67,29 @@ class DstcSlotFillingNetwork(Component, Serializable):
         # Given named entity return normalized slot value
         if isinstance(input_entity, list):
             input_entity = ' '.join(input_entity)
-        entities = []
-        normalized_slot_vals = []
-        for entity_name in self._slot_vals[slot]:
-            for entity in self._slot_vals[slot][entity_name]:
-                entities.append(entity)
-                normalized_slot_vals.append(entity_name)
-        best_match, score = process.extract(input_entity, entities, limit=2 ** 20)[0]
-        return normalized_slot_vals[entities.index(best_match)], score
+        entities, normalized_slot_vals, index = self._slot_index[slot]
+        if self.max_candidates:
+            candidates = index.most_similar(utils.full_process(input_entity), self.max_candidates)
+        else:
+            candidates = range(len(entities))
+        # the first of equally good matches is chosen
+        match = process.extractOne(input_entity, {i: entities[i] for i in candidates})
+        if match is None:
+            return None, 0
+        _, score, i = match
+        return normalized_slot_vals[i], score
+
+    def _build_index(self):
+        self._slot_index = {}
+        for slot, slot_vals in self._slot_vals.items():
+            entities = []
+            normalized_slot_vals = []
+            for entity_name in slot_vals:
+                for entity in slot_vals[entity_name]:
+                    entities.append(entity)
+                    normalized_slot_vals.append(entity_name)
+            index = NgramIndex([utils.full_process(e) for e in entities]) if self.max_candidates else None
+            self._slot_index[slot] = (entities, normalized_slot_vals, index)
 
     @staticmethod
     def _chunk_finder(tokens, tags):
@@ -117,4 +139,5 @@ class DstcSlotFillingNetwork(Component, Serializable):
             self._download_slot_vals()
         with open(self.load_path) as f:
             self._slot_vals = json.load(f)
+        self._build_index()
 
@@ -17,13 +17,14 @@ import json
 from math import exp
 from collections import defaultdict
 
-
+import numpy as np
 
 from deeppavlov.core.common.log import get_logger
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.data.utils import tokenize_reg
 from deeppavlov.core.models.component import Component
 from deeppavlov.core.models.serializable import Serializable
+from deeppavlov.models.slotfill.fuzzy_index import NgramIndex
 from overrides import overrides
 
 log = get_logger(__name__)
@@ -73,6 +74,22 @@ class SlotFillingComponent(Component, Serializable):
     def load(self, *args, **kwargs):
         with open(self.load_path) as f:
             self._slot_vals = json.load(f)
+        self._build_index()
+
+    def _build_index(self):
+        # all slot values are indexed together in the order they are searched
+        self._entities = [(slot, entity_name, entity.lower())
+                          for slot, tag_dict in self._slot_vals.items()
+                          for entity_name, entity_list in tag_dict.items()
+                          for entity in entity_list]
+        self._index = NgramIndex([entity for _, _, entity in self._entities])
+        lengths = np.array([len(entity) for _, _, entity in self._entities], dtype=np.int64)
+        max_dist = np.zeros(len(lengths), dtype=np.int64)
+        for d in range(1, (int(lengths.max()) if len(lengths) else 0) + 1):
+            ratio = exp(-d / 5) * ((lengths - d) / np.maximum(lengths, 1))
+            max_dist[ratio >= self.threshold - 1e-9] = d
+        # a value found in a text with at most `max_dist` edits keeps at least that many of its n-grams
+        self._min_overlap = self._index.lengths - max_dist * self._index.n
 
     def save(self):
         with open(self.save_path, 'w') as f:
@@ -82,6 +99,8 @@ class SlotFillingComponent(Component, Serializable):
         global input_entity
         if isinstance(tokens, list):
             input_entity = ' '.join(tokens)
+        if slot_dict is self._slot_vals:
+            return self._indexed_fuzzy_finder(input_entity)
         entities = []
         slots = []
         for slot, tag_dict in slot_dict.items():
@@ -92,6 +111,24 @@ class SlotFillingComponent(Component, Serializable):
                     slots.append(slot)
         return entities, slots
 
+    def _indexed_fuzzy_finder(self, input_text):
+        # the same as _fuzzy_finder, but only slot values that share enough n-grams with the text are compared
+        text = input_text.lower()
+        slot_candidates = defaultdict(list)
+        for i in np.flatnonzero(self._index.overlap(text) >= self._min_overlap):
+            slot, entity_name, entity = self._entities[i]
+            ratio, j = self.get_ratio(entity, text)
+            if ratio >= self.threshold:
+                slot_candidates[slot].append((j, entity_name))
+        entities = []
+        slots = []
+        for slot in self._slot_vals:
+            for _, candidate in sorted(slot_candidates[slot]):
+                if candidate not in entities:
+                    entities.append(candidate)
+                    slots.append(slot)
+        return entities, slots
+
     def get_candidate(self, input_text, tag_dict, score_function):
         candidates = []
         positions = []
@@ -123,7 +160,8 @@ class SlotFillingComponent(Component, Serializable):
 
         # base cases
         if m == 1:
-            return needle not in haystack
+            j = haystack.find(needle)
+            return (0, j + 1) if j >= 0 else (1, 0)
         if not n:
             return m
 
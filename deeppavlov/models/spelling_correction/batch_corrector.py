@@ -0,0 +1,121 @@
+"""
+Copyright 2017 Neural Networks and Deep Learning lab, MIPT
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import os
+from multiprocessing import Pool
+from threading import Lock
+from typing import Callable, List, Sequence
+
+from deeppavlov.core.common.cache import LRUCache
+
+FIND_CANDIDATES = None
+
+
+def _init_worker(find_candidates: Callable[[str], list]) -> None:
+    global FIND_CANDIDATES
+    FIND_CANDIDATES = find_candidates
+
+
+class PartialCandidates(list):
+    """
+    Candidates of a word found by a search stopped early, e.g. by a time limit.
+    They are returned as usual but not memoized.
+    """
+
+
+def _find_candidates_chunk(words: List[str]) -> List[list]:
+    return [FIND_CANDIDATES(word) for word in words]
+
+
+class BatchCorrector:
+    """
+    Finds correction candidates for a batch of tokenized sentences, computing them once for every
+    distinct word of the batch.
+
+    Candidates of recently seen words are kept in a bounded memo between calls, and other words
+    can be split between a pool of worker processes. `find_candidates` may return
+    :class:`PartialCandidates` for words that must not be memoized.
+
+    The pool is started by the first batch that needs it in the current process, so a corrector
+    built before the process is forked, e.g. by a prefork server, starts its own pool in every child.
+    It is stopped by :meth:`close`. Workers get a copy of `find_candidates` when the pool is started,
+    so :meth:`reset` has to be called after the underlying model changes.
+    """
+
+    def __init__(self, find_candidates: Callable[[str], list], cache_size: int = 0, n_jobs: int = 0,
+                 chunk_size: int = 64):
+        """
+        :param find_candidates: a function that returns a list of candidates for a word
+        :param cache_size: a maximum number of words to memoize candidates for, zero to disable memoization
+        :param n_jobs: a number of worker processes, candidates are found in the current process if zero
+        :param chunk_size: a number of words sent to a worker at once, batches with fewer new words
+         are processed in the current process
+        """
+        self.find_candidates = find_candidates
+        self.memo = LRUCache(cache_size)
+        self.n_jobs = n_jobs
+        self.chunk_size = chunk_size
+        self.pool = None
+        self.pool_pid = None
+        self.pool_lock = Lock()
+
+    def _get_pool(self) -> Pool:
+        with self.pool_lock:
+            if self.pool_pid != os.getpid():
+                # a pool inherited from the parent process has no handler threads here and can't be used
+                self.pool = Pool(self.n_jobs, initializer=_init_worker, initargs=(self.find_candidates,))
+                self.pool_pid = os.getpid()
+            return self.pool
+
+    def close(self) -> None:
+        """
+        Stop worker processes started by the current process, a new pool is started by the next batch
+        that needs it.
+        """
+        with self.pool_lock:
+            if self.pool is not None and self.pool_pid == os.getpid():
+                self.pool.close()
+                self.pool.join()
+            self.pool = None
+            self.pool_pid = None
+
+    def _find_all(self, words: List[str]) -> List[list]:
+        if not self.n_jobs or len(words) <= self.chunk_size:
+            return [self.find_candidates(word) for word in words]
+        chunks = [words[i:i + self.chunk_size] for i in range(0, len(words), self.chunk_size)]
+        pool = self._get_pool()
+        return [candidates for chunk in pool.map(_find_candidates_chunk, chunks) for candidates in chunk]
+
+    def __call__(self, batch: Sequence[Sequence[str]]) -> List[List[list]]:
+        found = {}
+        for sentence in batch:
+            for word in sentence:
+                if word not in found:
+                    found[word] = self.memo.get(word)
+        missing = [word for word, candidates in found.items() if candidates is None]
+        for word, candidates in zip(missing, self._find_all(missing)):
+            found[word] = candidates
+            if not isinstance(candidates, PartialCandidates):
+                self.memo.put(word, candidates)
+        return [[list(found[word]) for word in sentence] for sentence in batch]
+
+    def reset(self) -> None:
+        """
+        Forget memoized candidates and stop running worker processes, so that the next pool gets
+        the current model.
+        """
+        self.memo.clear()
+        self.close()
@@ -16,11 +16,13 @@ limitations under the License.
 
 import csv
 import itertools
-from typing import List
+from multiprocessing import Pool
+from typing import List, Dict, Tuple, Sequence
 from collections import defaultdict, Counter
 from heapq import heappop, heappushpop, heappush
 from math import log, exp
 
+import numpy as np
 from tqdm import tqdm
 
 from deeppavlov.core.common.registry import register
@@ -28,16 +30,116 @@ from deeppavlov.core.models.estimator import Estimator
 from deeppavlov.vocabs.typos import StaticDictionary
 from deeppavlov.core.common.errors import ConfigError
 from deeppavlov.core.common.log import get_logger
+from ..batch_corrector import BatchCorrector
 
 
 logger = get_logger(__name__)
 
 
+def _edit_alignments(pairs: Sequence[Tuple[str, str]]) -> List[Tuple[int, list]]:
+    """
+    Compute Damerau-Levenstein distances and alignments of pairs of strings with a single
+    dynamic programming table for all pairs.
+    Pairs of similar lengths should be batched together to avoid computing padded cells.
+    """
+    if not pairs:
+        return []
+    n = len(pairs)
+    lengths1 = np.array([len(a) for a, _ in pairs])
+    lengths2 = np.array([len(b) for _, b in pairs])
+    max1, max2 = int(lengths1.max()), int(lengths2.max())
+    # padding codes differ between the two sides, so padded positions never match
+    seq1 = np.full((n, max1), -1, dtype=np.int64)
+    seq2 = np.full((n, max2), -2, dtype=np.int64)
+    for k, (a, b) in enumerate(pairs):
+        seq1[k, :len(a)] = [ord(c) for c in a]
+        seq2[k, :len(b)] = [ord(c) for c in b]
+
+    rows = np.arange(n)
+    no_edit = max1 + max2 + 1
+    d = np.zeros((n, max1 + 1, max2 + 1), dtype=np.int32)
+    d[:, :, 0] = np.arange(max1 + 1)
+    d[:, 0, :] = np.arange(max2 + 1)
+    # 0 for a deletion, 1 for an insertion, 2 for a substitution and 3 for a transposition
+    choices = np.zeros((n, max1 + 1, max2 + 1), dtype=np.int8)
+    options = np.full((4, n), no_edit, dtype=np.int32)
+    for i in range(1, max1 + 1):
+        for j in range(1, max2 + 1):
+            changed = seq1[:, i - 1] != seq2[:, j - 1]
+            options[0] = d[:, i - 1, j] + 1
+            options[1] = d[:, i, j - 1] + 1
+            options[2] = d[:, i - 1, j - 1] + changed
+            if i > 1 and j > 1:
+                swapped = (seq1[:, i - 1] == seq2[:, j - 2]) & (seq1[:, i - 2] == seq2[:, j - 1])
+                options[3] = np.where(swapped, d[:, i - 2, j - 2] + changed, no_edit)
+            else:
+                options[3] = no_edit
+            # argmin takes the first of equal options like min() in _distance_edits
+            choice = options.argmin(axis=0)
+            choices[:, i, j] = choice
+            d[:, i, j] = options[choice, rows]
+
+    result = []
+    for k, (a, b) in enumerate(pairs):
+        i, j = int(lengths1[k]), int(lengths2[k])
+        distance = int(d[k, i, j])
+        path = choices[k].tolist()
+        ops = []
+        while i > 0 and j > 0:
+            choice = path[i][j]
+            if choice == 0:
+                ops.append((a[i - 1], ''))
+                i -= 1
+            elif choice == 1:
+                ops.append(('', b[j - 1]))
+                j -= 1
+            elif choice == 2:
+                ops.append((a[i - 1], b[j - 1]))
+                i, j = i - 1, j - 1
+            else:
+                ops.append((a[i - 2:i], b[j - 2:j]))
+                i, j = i - 2, j - 2
+        ops.reverse()
+        result.append((distance, ops))
+    return result
+
+
+def _count_changes(pairs: Sequence[Tuple[str, str]], window: int = 4, max_distance: int = 2,
+                   batch_size: int = 1024) -> Tuple[list, np.ndarray]:
+    """
+    Count substring changes of up to `window` + 1 alignment steps in pairs of (correct, error) strings
+    with at most `max_distance` edits.
+
+    :return: a list of distinct (correct substring, error substring) changes and an array of their counts
+    """
+    order = sorted(range(len(pairs)), key=lambda k: (len(pairs[k][0]), len(pairs[k][1])))
+    counts = Counter()
+    for start in range(0, len(order), batch_size):
+        batch = [pairs[k] for k in order[start:start + batch_size]]
+        for distance, ops in _edit_alignments(batch):
+            if distance > max_distance:
+                continue
+            left = [op[0] for op in ops]
+            right = [op[1] for op in ops]
+            # windows of up to `window` + 1 steps that end before the last step
+            for l in range(len(ops)):
+                for r in range(l + 1, min(len(ops), l + window + 2)):
+                    counts[(''.join(left[l:r]), ''.join(right[l:r]))] += 1
+    changes = list(counts)
+    return changes, np.fromiter(counts.values(), dtype=np.int64, count=len(changes))
+
+
 @register('spelling_error_model')
 class ErrorModel(Estimator):
-    def __init__(self, dictionary: StaticDictionary, window=1, candidates_count=1, *args, **kwargs):
+    fit_chunk_size = 10000
+
+    def __init__(self, dictionary: StaticDictionary, window=1, candidates_count=1, cache_size: int = 0,
+                 n_jobs: int = 0, binary: bool = False, *args, **kwargs):
 
         super().__init__(*args, **kwargs)
+        self.n_jobs = n_jobs
+        self.binary = binary
+        self.corrector = BatchCorrector(self._infer_word, cache_size=cache_size, n_jobs=n_jobs)
         self.costs = defaultdict(itertools.repeat(float('-inf')).__next__)
         self.dictionary = dictionary
         self.window = window
@@ -56,9 +158,21 @@ class ErrorModel(Estimator):
 
         self.candidates_count = candidates_count
 
+    def _children(self, prefix: str, nodes: Dict[str, int]) -> List[str]:
+        """
+        Get dictionary prefixes one letter longer than `prefix` and remember their trie nodes in `nodes`.
+        """
+        children = []
+        for letter, child in self.dictionary.trie.children(nodes[prefix]):
+            nodes[prefix + letter] = child
+            children.append(prefix + letter)
+        return children
+
     def _find_candidates_window_0(self, word, prop_threshold=1e-6):
         threshold = log(prop_threshold)
         d = {}
+        trie = self.dictionary.trie
+        nodes = {'': trie.root}
         prefixes_heap = [(0, {''})]
         candidates = [(float('-inf'), '') for _ in range(self.candidates_count)]
         word = '⟬{}⟭'.format(word.lower().replace('ё', 'е'))
@@ -77,11 +191,11 @@ class ErrorModel(Estimator):
                         if prefix and i else float('-inf')
                     ) if i or prefix else 0)
                 d[prefix] = res
-                if prefix in self.dictionary.words_set:
+                if trie.is_final(nodes[prefix]):
                     heappushpop(candidates, (res[-1], prefix))
                 potential = max(res)
                 if potential > threshold:
-                    heappush(prefixes_heap, (-potential, self.dictionary.words_trie[prefix]))
+                    heappush(prefixes_heap, (-potential, self._children(prefix, nodes)))
         return [(w.strip('⟬⟭'), score) for score, w in sorted(candidates, reverse=True) if
                 score > threshold]
 
@@ -92,7 +206,9 @@ class ErrorModel(Estimator):
         inf = float('-inf')
         d = defaultdict(list)
         d[''] = [0.] + [inf] * (word_len - 1)
-        prefixes_heap = [(0, self.dictionary.words_trie[''])]
+        trie = self.dictionary.trie
+        nodes = {'': trie.root}
+        prefixes_heap = [(0, self._children('', nodes))]
         candidates = [(inf, '')] * self.candidates_count
         while prefixes_heap and -prefixes_heap[0][0] > candidates[0][0]:
             _, prefixes = heappop(prefixes_heap)
@@ -110,92 +226,80 @@ class ErrorModel(Estimator):
                                     c_res.append(prev +
                                                  self.costs[edit])
                     res.append(max(c_res))
-                if prefix in self.dictionary.words_set:
+                if trie.is_final(nodes[prefix]):
                     heappushpop(candidates, (res[-1], prefix))
                 potential = max(res)
                 # potential = max(
                 #     [e for i in range(self.window + 2) for e in d[prefix[:prefix_len - i]]])
                 if potential > threshold:
-                    heappush(prefixes_heap, (-potential, self.dictionary.words_trie[prefix]))
+                    heappush(prefixes_heap, (-potential, self._children(prefix, nodes)))
         return [(w.strip('⟬⟭'), score) for score, w in sorted(candidates, reverse=True) if
                 score > threshold]
 
-    def _infer_instance(self, instance: List[str]):
-        candidates = []
-        for incorrect in instance:
-            if any([c not in self.dictionary.alphabet for c in incorrect]):
-                candidates.append([(0, incorrect)])
-            else:
-                res = self.find_candidates(incorrect, prop_threshold=1e-6)
-                if res:
-                    candidates.append([(score, candidate) for candidate, score in res])
-                else:
-                    candidates.append([(0, incorrect)])
-        return candidates
+    def _infer_word(self, incorrect: str):
+        if any([c not in self.dictionary.alphabet for c in incorrect]):
+            return [(0, incorrect)]
+        res = self.find_candidates(incorrect, prop_threshold=1e-6)
+        if res:
+            return [(score, candidate) for candidate, score in res]
+        return [(0, incorrect)]
 
     def __call__(self, data, *args, **kwargs):
-        if len(data) > 1:
-            data = tqdm(data, desc='Infering a batch with the error model', leave=False)
-        return [self._infer_instance(instance) for instance in data]
+        return self.corrector(data)
 
     def reset(self):
         pass
 
-    @staticmethod
-    def _distance_edits(seq1, seq2):
-        l1, l2 = len(seq1), len(seq2)
-        d = [[(i, ()) for i in range(l2 + 1)]]
-        d += [[(i, ())] + [(0, ())] * l2 for i in range(1, l1 + 1)]
-
-        for i in range(1, l1 + 1):
-            for j in range(1, l2 + 1):
-                edits = [
-                    (d[i - 1][j][0] + 1, d[i - 1][j][1] + ((seq1[i - 1], ''),)),
-                    (d[i][j - 1][0] + 1, d[i][j - 1][1] + (('', seq2[j - 1]),)),
-                    (d[i - 1][j - 1][0] + (seq1[i - 1] != seq2[j - 1]),
-                     d[i - 1][j - 1][1] + ((seq1[i - 1], seq2[j - 1]),))
-                ]
-                if i > 1 and j > 1 and seq1[i - 1] == seq2[j - 2] and seq1[i - 2] == seq2[j - 1]:
-                    edits.append((d[i - 2][j - 2][0] + (seq1[i - 1] != seq2[j - 1]),
-                                  d[i - 2][j - 2][1] + ((seq1[i - 2:i], seq2[j - 2:j]),)))
-                d[i][j] = min(edits, key=lambda x: x[0])
-
-        return d[-1][-1]
+    def destroy(self):
+        self.corrector.close()
 
     def fit(self, x, y):
-        changes = []
-        entries = []
-        data = list(zip(x, y))
-        window = 4
-        for error, correct in tqdm(data, desc='Training the error model'):
-            correct = '⟬{}⟭'.format(' '.join(correct))
-            error = '⟬{}⟭'.format(' '.join(error))
-            d, ops = self._distance_edits(correct, error)
-            if d <= 2:
-                w_ops = set()
-                for pos in range(len(ops)):
-                    left, right = list(zip(*ops))
-                    for l in range(pos, max(0, pos - window) - 1, -1):
-                        for r in range(pos + 1, min(len(ops), l + 2 + window)):
-                            w_ops.add(((''.join(left[l:r]), ''.join(right[l:r])), l, r))
-                ops = [x[0] for x in w_ops]
-
-                entries += [op[0] for op in ops]
-                changes += [op for op in ops]
-
-        e_count = Counter(entries)
-        c_count = Counter(changes)
+        pairs = [('⟬{}⟭'.format(' '.join(correct)), '⟬{}⟭'.format(' '.join(error))) for error, correct in zip(x, y)]
+        chunks = [pairs[i:i + self.fit_chunk_size] for i in range(0, len(pairs), self.fit_chunk_size)]
+        if self.n_jobs and len(chunks) > 1:
+            with Pool(self.n_jobs) as pool:
+                results = list(tqdm(pool.imap(_count_changes, chunks), total=len(chunks),
+                                    desc='Training the error model'))
+        else:
+            results = [_count_changes(chunk) for chunk in tqdm(chunks, desc='Training the error model')]
+
+        # merge counts of chunks into arrays indexed by ids of distinct changes
+        change_ids = {}
+        ids = [np.fromiter((change_ids.setdefault(change, len(change_ids)) for change in changes),
+                           dtype=np.int64, count=len(changes)) for changes, _ in results]
+        c_count = np.bincount(np.concatenate(ids or [np.zeros(0, dtype=np.int64)]),
+                              weights=np.concatenate([counts for _, counts in results] or [np.zeros(0)]),
+                              minlength=len(change_ids))
+        changes = list(change_ids)
+        entry_ids = {}
+        entries = np.fromiter((entry_ids.setdefault(w, len(entry_ids)) for w, _ in changes),
+                              dtype=np.int64, count=len(changes))
+        e_count = np.bincount(entries, weights=c_count, minlength=len(entry_ids))
+
         incorrect_prior = 1
         correct_prior = 19
-        for (w, s), c in c_count.items():
-            c = c + (incorrect_prior if w != s else correct_prior)
-            e = e_count[w] + incorrect_prior + correct_prior
-            p = c / e
-            self.costs[(w, s)] = log(p)
+        is_correct = np.fromiter((w == s for w, s in changes), dtype=bool, count=len(changes))
+        c = c_count + np.where(is_correct, correct_prior, incorrect_prior)
+        e = e_count[entries] + incorrect_prior + correct_prior
+        for change, p in zip(changes, (c / e).tolist()):
+            self.costs[change] = log(p)
+        self.corrector.reset()
+
+    @staticmethod
+    def _binary_path(path):
+        return path.with_suffix('.npz')
 
     def save(self):
-        logger.info("[saving error_model to `{}`]".format(self.save_path))
+        if self.binary:
+            path = self._binary_path(self.save_path)
+            logger.info("[saving error_model to `{}`]".format(path))
+            changes, log_ps = zip(*self.costs.items()) if self.costs else ((), ())
+            np.savez(str(path), up=np.array([w for w, _ in changes], dtype=str),
+                     low=np.array([s for _, s in changes], dtype=str),
+                     log_p=np.array(log_ps, dtype=np.float64))
+            return
 
+        logger.info("[saving error_model to `{}`]".format(self.save_path))
         with open(self.save_path, 'w', newline='') as tsv_file:
             writer = csv.writer(tsv_file, delimiter='\t')
             for (w, s), log_p in self.costs.items():
@@ -203,12 +307,20 @@ class ErrorModel(Estimator):
 
     def load(self):
         if self.load_path:
-            if self.load_path.is_file():
+            binary_path = self._binary_path(self.load_path)
+            if self.binary and binary_path.is_file():
+                logger.info("loading error_model from `{}`".format(binary_path))
+                data = np.load(str(binary_path))
+                for w, s, log_p in zip(data['up'].tolist(), data['low'].tolist(), data['log_p'].tolist()):
+                    self.costs[(w, s)] = log_p
+                self.corrector.reset()
+            elif self.load_path.is_file():
                 logger.info("loading error_model from `{}`".format(self.load_path))
                 with open(self.load_path, 'r', newline='') as tsv_file:
                     reader = csv.reader(tsv_file, delimiter='\t')
                     for w, s, p in reader:
                         self.costs[(w, s)] = log(float(p))
+                self.corrector.reset()
             elif not self.load_path.parent.is_dir():
                 raise ConfigError("Provided `load_path` for {} doesn't exist!".format(
                     self.__class__.__name__))
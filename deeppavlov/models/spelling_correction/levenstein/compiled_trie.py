@@ -0,0 +1,213 @@
+"""
+Copyright 2017 Neural Networks and Deep Learning lab, MIPT
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import json
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+
+class _BuildNode:
+    __slots__ = ('final', 'edges', 'id')
+
+    def __init__(self):
+        self.final = False
+        self.edges = {}
+        self.id = -1
+
+    def signature(self):
+        return self.final, tuple((letter, child.id) for letter, child in sorted(self.edges.items()))
+
+
+class CompiledTrie:
+    """
+    An immutable minimal acyclic automaton (DAWG) of words stored in a few flat numpy arrays.
+
+    Outgoing edges of a node ``i`` are ``labels[offsets[i]:offsets[i+1]]`` (alphabet codes in
+    ascending order) and ``targets`` at the same positions. A single transition is found with a binary
+    search in the sorted array of ``node * len(alphabet) + label`` keys.
+
+    A trie is saved as a directory of ``.npy`` files that are memory-mapped on load, so it is
+    opened instantly and shared between processes. The class has the read-only interface of
+    :class:`~deeppavlov.models.spelling_correction.levenstein.tabled_trie.Trie`
+    used by :class:`~deeppavlov.models.spelling_correction.levenstein.levenstein_searcher.LevensteinSearcher`.
+    """
+    NO_NODE = -1
+
+    def __init__(self, alphabet: List[str], offsets: np.ndarray, labels: np.ndarray, targets: np.ndarray,
+                 final: np.ndarray, root: int, keys: Optional[np.ndarray] = None):
+        self.alphabet = list(alphabet)
+        self.alphabet_codes = {a: i for i, a in enumerate(self.alphabet)}
+        self.offsets = offsets
+        self.labels = labels
+        self.targets = targets
+        self.final = final
+        self.root = root
+        if keys is None:
+            sources = np.repeat(np.arange(len(final), dtype=np.int64), np.diff(offsets))
+            keys = sources * len(self.alphabet) + labels
+        self.keys = keys
+
+        self.nodes_number = len(final)
+        # attributes used to precompute future symbols of nodes for search heuristics
+        self.data = [None] * self.nodes_number
+        self.is_terminated = False
+        self.precompute_symbols = None
+
+    @classmethod
+    def build(cls, words: Iterable[str], alphabet: Optional[Iterable[str]] = None) -> 'CompiledTrie':
+        """
+        Build a minimal automaton of words with the incremental algorithm of Daciuk et al. for sorted input.
+        """
+        words = sorted(set(words))
+        alphabet = sorted(set(alphabet) if alphabet is not None else {a for word in words for a in word})
+
+        register = {}
+        compiled = []
+        root = _BuildNode()
+        path = []
+
+        def minimize(depth):
+            # replace nodes deeper than `depth` on the current path with their registered equivalents
+            while len(path) > depth:
+                parent, letter, child = path.pop()
+                signature = child.signature()
+                if signature in register:
+                    parent.edges[letter] = register[signature]
+                else:
+                    child.id = len(compiled)
+                    compiled.append(child)
+                    register[signature] = child
+
+        previous = ''
+        for word in words:
+            common = 0
+            for a, b in zip(word, previous):
+                if a != b:
+                    break
+                common += 1
+            minimize(common)
+            node = path[-1][2] if path else root
+            for letter in word[common:]:
+                child = _BuildNode()
+                node.edges[letter] = child
+                path.append((node, letter, child))
+                node = child
+            node.final = True
+            previous = word
+        minimize(0)
+        root.id = len(compiled)
+        compiled.append(root)
+
+        codes = {a: i for i, a in enumerate(alphabet)}
+        counts = np.array([len(node.edges) for node in compiled], dtype=np.int64)
+        offsets = np.zeros(len(compiled) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(counts)
+        labels = np.empty(offsets[-1], dtype=np.int32)
+        targets = np.empty(offsets[-1], dtype=np.int32)
+        for node in compiled:
+            edges = sorted((codes[letter], child.id) for letter, child in node.edges.items())
+            start = offsets[node.id]
+            for i, (code, child_id) in enumerate(edges, start):
+                labels[i] = code
+                targets[i] = child_id
+        final = np.array([node.final for node in compiled], dtype=bool)
+        return cls(alphabet, offsets, labels, targets, final, root.id)
+
+    @classmethod
+    def from_trie(cls, trie) -> 'CompiledTrie':
+        """
+        Compile a :class:`~deeppavlov.models.spelling_correction.levenstein.tabled_trie.Trie`.
+        """
+        return cls.build(trie.words(), trie.alphabet)
+
+    def save(self, path: Union[str, Path]) -> None:
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name in ['offsets', 'labels', 'targets', 'final', 'keys']:
+            np.save(path / '{}.npy'.format(name), getattr(self, name))
+        with (path / 'meta.json').open('w', encoding='utf8') as f:
+            json.dump({'alphabet': self.alphabet, 'root': int(self.root)}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: Union[str, Path], mmap: bool = True) -> 'CompiledTrie':
+        path = Path(path)
+        mmap_mode = 'r' if mmap else None
+        with (path / 'meta.json').open(encoding='utf8') as f:
+            meta = json.load(f)
+        arrays = {name: np.load(path / '{}.npy'.format(name), mmap_mode=mmap_mode)
+                  for name in ['offsets', 'labels', 'targets', 'final', 'keys']}
+        return cls(meta['alphabet'], root=meta['root'], **arrays)
+
+    @staticmethod
+    def exists(path: Union[str, Path]) -> bool:
+        return (Path(path) / 'meta.json').is_file()
+
+    def __len__(self) -> int:
+        return self.nodes_number
+
+    def is_final(self, index: int) -> bool:
+        return bool(self.final[index])
+
+    def _step(self, index: int, letter: str) -> int:
+        code = self.alphabet_codes.get(letter)
+        if code is None:
+            return self.NO_NODE
+        key = index * len(self.alphabet) + code
+        pos = int(np.searchsorted(self.keys, key))
+        if pos < len(self.keys) and self.keys[pos] == key:
+            return int(self.targets[pos])
+        return self.NO_NODE
+
+    def descend(self, index: int, s: str) -> int:
+        """
+        Get a node reached from the node `index` by the string `s` or NO_NODE.
+        """
+        answer = index
+        for a in s:
+            answer = self._step(answer, a)
+            if answer == self.NO_NODE:
+                break
+        return answer
+
+    def __contains__(self, word: str) -> bool:
+        node = self.descend(self.root, word)
+        return node != self.NO_NODE and self.is_final(node)
+
+    def children(self, index: int) -> List[Tuple[str, int]]:
+        """
+        Get letters and child nodes of the node `index` in alphabet order.
+        """
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return [(self.alphabet[code], child)
+                for code, child in zip(self.labels[start:end].tolist(), self.targets[start:end].tolist())]
+
+    def _get_letters(self, index: int, return_indexes: bool = False) -> list:
+        start, end = self.offsets[index], self.offsets[index + 1]
+        codes = self.labels[start:end].tolist()
+        return codes if return_indexes else [self.alphabet[code] for code in codes]
+
+    def _get_children(self, index: int) -> List[int]:
+        return self.targets[self.offsets[index]:self.offsets[index + 1]].tolist()
+
+    def words(self) -> Iterator[str]:
+        stack = [(self.root, '')]
+        while stack:
+            index, prefix = stack.pop()
+            if self.is_final(index):
+                yield prefix
+            stack.extend((child, prefix + letter) for letter, child in reversed(self.children(index)))
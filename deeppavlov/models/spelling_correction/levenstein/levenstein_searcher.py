@@ -1,10 +1,11 @@
 import itertools
-import copy
+import time
 import numpy as np
 
 from sortedcontainers import SortedListWithKey
 
-from .tabled_trie import Trie, make_trie
+from .compiled_trie import CompiledTrie
+from .tabled_trie import Trie, precompute_future_symbols
 
 
 class LevensteinSearcher:
@@ -14,9 +15,12 @@ class LevensteinSearcher:
 
     """
     def __init__(self, alphabet, dictionary, operation_costs=None,
-                 allow_spaces=False, euristics='none'):
+                 allow_spaces=False, euristics='none', max_expansions=None, timeout=None):
         self.alphabet = alphabet
         self.allow_spaces = allow_spaces
+        # ограничения на число раскрытых вершин и время поиска (в секундах) для одного слова
+        self.max_expansions = max_expansions
+        self.timeout = timeout
         if isinstance(euristics, int):
             if euristics < 0:
                 raise ValueError("Euristics should be non-negative integer or None")
@@ -30,9 +34,9 @@ class LevensteinSearcher:
             # словарь передан уже в виде бора
             self.dictionary = dictionary
         else:
-            self.dictionary = make_trie(alphabet, dictionary, make_cashed=True,
-                                        precompute_symbols=self.euristics,
-                                        allow_spaces=self.allow_spaces)
+            if not isinstance(dictionary, CompiledTrie):
+                dictionary = CompiledTrie.build(dictionary, alphabet)
+            self.dictionary = dictionary
         self.transducer = SegmentTransducer(
             alphabet, operation_costs=operation_costs, allow_spaces=allow_spaces)
         self._precompute_euristics()
@@ -41,22 +45,27 @@ class LevensteinSearcher:
     def __contains__(self, word):
         return word in self.dictionary
 
-    def search(self, word, d, allow_spaces=True, return_cost=True):
+    def search(self, word, d, allow_spaces=True, return_cost=True, return_truncated=False):
         """
-        Finds all dictionary words in d-window from word
+        Finds all dictionary words in d-window from word.
+        If return_truncated is True, also returns whether the search was stopped
+        by max_expansions or timeout before all such words were found
         """
         if not all((c in self.alphabet
                     or (c == " " and self.allow_spaces)) for c in word):
-            return []
+            return ([], False) if return_truncated else []
             # raise ValueError("{0} contains an incorrect symbol".format(word))
         return self._trie_search(
-            word, d, allow_spaces=allow_spaces, return_cost=return_cost)
+            word, d, allow_spaces=allow_spaces, return_cost=return_cost,
+            return_truncated=return_truncated)
 
     def _trie_search(self, word, d, transducer=None,
-                     allow_spaces=True, return_cost=True):
+                     allow_spaces=True, return_cost=True, return_truncated=False):
         """
         Находит все слова в префиксном боре, расстояние до которых
-        в соответствии с заданным преобразователем не превышает d
+        в соответствии с заданным преобразователем не превышает d.
+        При return_truncated=True также возвращает флаг того, что поиск
+        был остановлен по max_expansions или timeout
         """
         if transducer is None:
             # разобраться с пробелами
@@ -66,14 +75,23 @@ class LevensteinSearcher:
         #  инициализация переменных
         used_agenda_keys = set()
         agenda = SortedListWithKey(key=(lambda x:x[1]))
-        h = self.h_func(word, trie.root)
+        # кэши эвристик и переходов живут только в течение одного запроса
+        h_cache, descend_cache, children_cache = dict(), dict(), dict()
+        deadline = time.perf_counter() + self.timeout if self.timeout is not None else None
+        h = self.h_func(word, trie.root, h_cache)
         # agenda[self.agenda_key("", 0, trie.root)] = (0.0, 0.0, h)
         key, value = ("", 0, trie.root), (0.0, 0.0, h)
         agenda.add((key, value))
         answer = dict()
-        k = 0
+        k, truncated = 0, False
         # очередь с приоритетом с промежуточными результатами
         while len(agenda) > 0:
+            if self.max_expansions is not None and k >= self.max_expansions:
+                truncated = True
+                break
+            if deadline is not None and time.perf_counter() > deadline:
+                truncated = True
+                break
             key, value = agenda.pop(0)
             if key in used_agenda_keys:
                 continue
@@ -97,13 +115,16 @@ class LevensteinSearcher:
                         if allow_spaces and trie.is_final(index):
                             new_index = trie.root
                         else:
-                            new_index = Trie.NO_NODE
+                            new_index = trie.NO_NODE
                     else:
-                        new_index = trie.descend(index, curr_low)
-                    if new_index is Trie.NO_NODE:
+                        new_index = descend_cache.get((index, curr_low))
+                        if new_index is None:
+                            new_index = descend_cache[(index, curr_low)] = self._descend(
+                                index, curr_low, children_cache)
+                    if new_index == trie.NO_NODE:
                         continue
                     new_low = low + curr_low
-                    new_h = self.h_func(word[new_pos: ], new_index)
+                    new_h = self.h_func(word[new_pos: ], new_index, h_cache)
                     new_cost = new_g + new_h
                     if new_cost > d:
                         continue
@@ -115,10 +136,11 @@ class LevensteinSearcher:
                             answer[new_low] = new_g
                     agenda.add((new_key, new_value))
         answer = sorted(answer.items(), key=(lambda x: x[1]))
-        if return_cost:
-            return answer
-        else:
-            return [elem[0] for elem in answer]
+        if not return_cost:
+            answer = [elem[0] for elem in answer]
+        if return_truncated:
+            return answer, truncated
+        return answer
 
     def _precompute_euristics(self):
         """
@@ -146,14 +168,30 @@ class LevensteinSearcher:
                     insertion_cost = cost / len(low)
                     for a in low:
                         insertion_costs[a] = min(insertion_costs[a], insertion_cost)
-        # предвычисление возможных будущих символов в узлах дерева
-        # precompute_future_symbols(self.dictionary, self.euristics, self.allow_spaces)
+        # коды символов в таблице стоимостей
+        symbols = list(self.dictionary.alphabet) + ([' '] if self.allow_spaces else [])
+        self._symbol_codes = {a: i for i, a in enumerate(symbols)}
         # предвычисление стоимостей потери символа в узлах дерева
         self._absense_costs_by_node = _precompute_absense_costs(
             self.dictionary, removal_costs, insertion_costs,
             self.euristics, self.allow_spaces)
-        # массив для сохранения эвристик
-        self._temporary_euristics = [dict() for i in range(len(self.dictionary))]
+
+    def _descend(self, index, s, children_cache):
+        """
+        Переход из вершины index по строке s с сохранением потомков
+        пройденных вершин в children_cache
+        """
+        trie = self.dictionary
+        if not isinstance(trie, CompiledTrie):
+            return trie.descend(index, s)
+        for a in s:
+            children = children_cache.get(index)
+            if children is None:
+                children = children_cache[index] = dict(trie.children(index))
+            index = children.get(a, trie.NO_NODE)
+            if index == trie.NO_NODE:
+                break
+        return index
 
     def _define_h_function(self):
         if self.euristics in [None, 0]:
@@ -161,7 +199,7 @@ class LevensteinSearcher:
         else:
             self.h_func = self._euristic_h_function
 
-    def _euristic_h_function(self, suffix, index):
+    def _euristic_h_function(self, suffix, index, cache=None):
         """
         Вычисление h-эвристики из работы Hulden,2009 для текущей вершины словаря
 
@@ -171,6 +209,8 @@ class LevensteinSearcher:
             непрочитанный суффикс входного слова
         index : int
             индекс текущего узла в словаре
+        cache : dict or None
+            словарь для сохранения вычисленных значений в течение одного запроса
 
         Возвращает:
         -----------
@@ -183,19 +223,20 @@ class LevensteinSearcher:
         if self.euristics > 0:
             suffix = suffix[:self.euristics]
         # кэширование результатов
-        index_temporary_euristics = self._temporary_euristics[index]
-        cost = index_temporary_euristics.get(suffix, None)
+        if cache is None:
+            cache = dict()
+        cost = cache.get((suffix, index))
         if cost is not None:
             return cost
-        # извлечение нужных данных из массивов
-        absense_costs = self._absense_costs_by_node[index]
-        data = self.dictionary.data[index]
-        costs = np.zeros(dtype=np.float64, shape=(self.euristics,))
+        absense_costs = self._absense_costs_by_node
         # costs[j] --- оценка штрафа при предпросмотре вперёд на j символов
+        costs = [0.0] * self.euristics
         for i, a in enumerate(suffix):
-            costs[i:] += absense_costs[a][i:]
+            code = self._symbol_codes[a]
+            for j in range(i, self.euristics):
+                costs[j] += absense_costs.item(index, code, j)
         cost = max(costs)
-        index_temporary_euristics[suffix] = cost
+        cache[(suffix, index)] = cost
         return cost
 
     def _minimal_replacement_cost(self, first, second):
@@ -211,6 +252,54 @@ class LevensteinSearcher:
         return min(removal_cost, insertion_cost)
 
 
+def _precompute_future_symbols_table(dictionary, n, allow_spaces=False):
+    """
+    Вычисляет символы, которые могут встретиться в узлах словаря при предпросмотре вперёд
+
+    Аргументы:
+    ---------------
+    dictionary : CompiledTrie or Trie
+        словарь, хранящийся в виде ациклического автомата
+
+    n : int
+        глубина ``заглядывания вперёд'' в словаре
+
+    Возвращает
+    ---------------
+    answer : array, dtype=bool, shape=(число вершин, n, размер алфавита + allow_spaces)
+        answer[i, j, c] = True <-> символ с кодом c может встретиться
+        на расстоянии j от вершины с номером i (пробелу соответствует последний код)
+    """
+    symbols_number = len(dictionary.alphabet) + int(allow_spaces)
+    answer = np.zeros(dtype=bool, shape=(len(dictionary), n, symbols_number))
+    if not isinstance(dictionary, CompiledTrie):
+        if dictionary.data[dictionary.root] is None:
+            precompute_future_symbols(dictionary, n, allow_spaces)
+        codes = {a: i for i, a in enumerate(dictionary.alphabet)}
+        codes[' '] = symbols_number - 1
+        for index, node in enumerate(dictionary.data):
+            for j, symbols in enumerate(node):
+                answer[index, j, [codes[a] for a in symbols]] = True
+        return answer
+    # рёбра CompiledTrie упорядочены по исходящим вершинам
+    lengths = np.diff(dictionary.offsets)
+    has_children = lengths > 0
+    sources = np.repeat(np.arange(len(dictionary)), lengths)
+    final = np.asarray(dictionary.final, dtype=bool)
+    answer[sources, 0, dictionary.labels] = True
+    if allow_spaces:
+        answer[final, 0, -1] = True
+    for j in range(1, n):
+        children_symbols = answer[dictionary.targets, j - 1]
+        if len(children_symbols) > 0:
+            answer[has_children, j] = np.logical_or.reduceat(
+                children_symbols, dictionary.offsets[:-1][has_children], axis=0)
+        # в случае, если разрешён возврат по пробелу в стартовое состояние
+        if allow_spaces:
+            answer[final, j] |= answer[dictionary.root, j - 1]
+    return answer
+
+
 def _precompute_absense_costs(dictionary, removal_costs, insertion_costs, n,
                               allow_spaces=False):
     '''
@@ -219,7 +308,7 @@ def _precompute_absense_costs(dictionary, removal_costs, insertion_costs, n,
 
     Аргументы:
     ---------------
-    dictionary : Trie
+    dictionary : CompiledTrie or Trie
         словарь, хранящийся в виде ациклического автомата
 
     removal_costs : dict
@@ -233,40 +322,23 @@ def _precompute_absense_costs(dictionary, removal_costs, insertion_costs, n,
 
     Возвращает
     ---------------
-    answer : list of dicts, len(answer)=len(dictionary)
-        answer[i][a][j] равно минимальному штрафу за появление символа a
-        в j-ой позиции в вершине с номером i
+    answer : array, shape=(число вершин, размер алфавита + allow_spaces, n)
+        answer[i, c, j] равно минимальному штрафу за появление символа с кодом c
+        в j-ой позиции в вершине с номером i (пробелу соответствует последний код)
     '''
-    answer = [dict() for node in dictionary.data]
+    symbols = list(dictionary.alphabet) + ([' '] if allow_spaces else [])
     if n == 0:
-        return answer
-    curr_alphabet = copy.copy(dictionary.alphabet)
-    if allow_spaces:
-        curr_alphabet += [' ']
-    for l, (costs_in_node, node) in enumerate(zip(answer, dictionary.data)):
-        # определение минимальной стоимости удаления символов
-        curr_node_removal_costs = np.empty(dtype=np.float64, shape=(n,))
-        if len(node[0]) > 0:
-            curr_node_removal_costs[0] = min(removal_costs[symbol] for symbol in node[0])
-            for j, symbols in enumerate(node[1:], 1):
-                if len(symbols) == 0:
-                    curr_node_removal_costs[j:] = curr_node_removal_costs[j-1]
-                    break
-                curr_cost = min(removal_costs[symbol] for symbol in symbols)
-                curr_node_removal_costs[j] = min(curr_node_removal_costs[j-1], curr_cost)
-        else:
-            curr_node_removal_costs[:] = np.inf
-        # определение минимальной стоимости вставки
-        for a in curr_alphabet:
-            curr_symbol_costs = np.empty(dtype=np.float64, shape=(n,))
-            curr_symbol_costs.fill(insertion_costs[a])
-            for j, symbols in enumerate(node):
-                if a in symbols:
-                    curr_symbol_costs[j:] = 0.0
-                    break
-                curr_symbol_costs[j] = min(curr_symbol_costs[j], curr_node_removal_costs[j])
-            costs_in_node[a] = curr_symbol_costs
-    return answer
+        return np.zeros(dtype=np.float64, shape=(len(dictionary), len(symbols), 0))
+    future_symbols = _precompute_future_symbols_table(dictionary, n, allow_spaces)
+    symbol_removal_costs = np.array([removal_costs[a] for a in symbols], dtype=np.float64)
+    symbol_insertion_costs = np.array([insertion_costs[a] for a in symbols], dtype=np.float64)
+    # минимальная стоимость удаления символов, встречающихся на расстоянии не больше j
+    level_removal_costs = np.where(future_symbols, symbol_removal_costs, np.inf).min(axis=2)
+    node_removal_costs = np.minimum.accumulate(level_removal_costs, axis=1)
+    # минимальная стоимость вставки символа, если он не встречается на расстоянии не больше j
+    answer = np.minimum(symbol_insertion_costs[None, None, :], node_removal_costs[:, :, None])
+    answer[np.logical_or.accumulate(future_symbols, axis=1)] = 0.0
+    return np.ascontiguousarray(answer.transpose(0, 2, 1))
 
 
 class SegmentTransducer:
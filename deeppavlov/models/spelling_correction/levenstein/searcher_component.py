@@ -14,12 +14,15 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 from math import log10
-from typing import Iterable
+from typing import Iterable, Optional
 
+from deeppavlov.core.commands.utils import expand_path
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.models.component import Component
 from deeppavlov.core.common.log import get_logger
 
+from ..batch_corrector import BatchCorrector, PartialCandidates
+from .compiled_trie import CompiledTrie
 from .levenstein_searcher import LevensteinSearcher
 
 
@@ -28,28 +31,48 @@ logger = get_logger(__name__)
 
 @register('spelling_levenstein')
 class LevensteinSearcherComponent(Component):
-    def __init__(self, words: Iterable[str], max_distance=1, error_probability=1e-4, *args, **kwargs):
+    def __init__(self, words: Iterable[str], max_distance=1, error_probability=1e-4,
+                 trie_path: Optional[str] = None, cache_size: int = 0, n_jobs: int = 0,
+                 max_expansions: Optional[int] = None, timeout: Optional[float] = None, *args, **kwargs):
         """
 
         :param words: list of every correct word
         :param max_distance: maximum allowed Damerau-Levenstein distance between source words and candidates
         :param error_probability: assigned probability for every edit
+        :param trie_path: a directory to load a compiled dictionary trie from or to save it to after
+         it is built from `words`
+        :param cache_size: a number of words to remember candidates for between calls
+        :param n_jobs: a number of worker processes to search candidates for new words of large batches in
+        :param max_expansions: a maximum number of dictionary nodes to expand while searching candidates for a word
+        :param timeout: a maximum time in seconds to search candidates for a word
         """
-        words = list({word.strip().lower().replace('ё', 'е') for word in words})
-        alphabet = sorted({letter for word in words for letter in word})
         self.max_distance = max_distance
         self.error_probability = log10(error_probability)
         self.vocab_penalty = self.error_probability * 2
-        self.searcher = LevensteinSearcher(alphabet, words, allow_spaces=True, euristics=2)
 
-    def _infer_instance(self, tokens):
-        candidates = []
-        for word in tokens:
-            c = {candidate: self.error_probability * distance
-                 for candidate, distance in self.searcher.search(word, d=self.max_distance)}
-            c[word] = c.get(word, self.vocab_penalty)
-            candidates.append([(score, candidate) for candidate, score in c.items()])
-        return candidates
+        trie_path = trie_path and expand_path(trie_path)
+        if trie_path and CompiledTrie.exists(trie_path):
+            logger.info('Loading a dictionary trie from {}'.format(trie_path))
+            trie = CompiledTrie.load(trie_path)
+        else:
+            words = {word.strip().lower().replace('ё', 'е') for word in words}
+            trie = CompiledTrie.build(words)
+            if trie_path:
+                logger.info('Saving a dictionary trie to {}'.format(trie_path))
+                trie.save(trie_path)
+        self.searcher = LevensteinSearcher(trie.alphabet, trie, allow_spaces=True, euristics=2,
+                                           max_expansions=max_expansions, timeout=timeout)
+        self.corrector = BatchCorrector(self._find_candidates, cache_size=cache_size, n_jobs=n_jobs)
+
+    def _find_candidates(self, word):
+        found, truncated = self.searcher.search(word, d=self.max_distance, return_truncated=True)
+        c = {candidate: self.error_probability * distance for candidate, distance in found}
+        c[word] = c.get(word, self.vocab_penalty)
+        candidates = [(score, candidate) for candidate, score in c.items()]
+        return PartialCandidates(candidates) if truncated else candidates
 
     def __call__(self, batch, *args, **kwargs):
-        return [self._infer_instance(tokens) for tokens in batch]
+        return self.corrector(batch)
+
+    def destroy(self):
+        self.corrector.close()
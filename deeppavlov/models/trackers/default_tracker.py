@@ -64,5 +64,12 @@ class DefaultTracker(Component):
                 feats[i] = 1.
         return feats
 
+    def get_dialog_state(self):
+        return {'history': list(self.history), 'curr_feats': self.curr_feats.copy()}
+
+    def set_dialog_state(self, state):
+        self.history = list(state['history'])
+        self.curr_feats = state['curr_feats'].copy()
+
     def __call__(self):
         return self.curr_feats
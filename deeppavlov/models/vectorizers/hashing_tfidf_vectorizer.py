@@ -14,8 +14,13 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import json
+import shutil
+import tempfile
 from collections import Counter
-from typing import List, Any, Generator, Tuple, KeysView, ValuesView, Type, Dict
+from multiprocessing import Pool
+from pathlib import Path
+from typing import List, Any, Generator, Tuple, KeysView, ValuesView, Type, Dict, Union
 
 import scipy as sp
 from scipy import sparse
@@ -36,6 +41,141 @@ def hash_(token, hash_size):
     return murmurhash3_32(token, positive=True) % hash_size
 
 
+def _init_worker(tokenizer) -> None:
+    global TOKENIZER
+    TOKENIZER = tokenizer
+
+
+def _count_batch(docs: List[str], col_ids: List[int], hash_size: int, chunk_path: str) -> int:
+    """
+    Tokenize and hash a batch of documents in a worker process and save its ngram counts
+    to `chunk_path` as COO arrays.
+    :return: a number of nonzero counts in the chunk
+    """
+    rows, cols = [], []
+    for ngrams, col_id in zip(TOKENIZER(docs), col_ids):
+        rows.extend(hash_(gram, hash_size) for gram in ngrams)
+        cols.extend([col_id] * len(ngrams))
+
+    counts = sparse.coo_matrix((np.ones(len(rows), dtype=np.int32),
+                                (np.array(rows, dtype=np.int32), np.array(cols, dtype=np.int32))),
+                               shape=(hash_size, max(col_ids) + 1))
+    counts.sum_duplicates()
+    np.savez(chunk_path, row=counts.row, col=counts.col, data=counts.data)
+    return counts.nnz
+
+
+class DocIdsArray:
+    """
+    Read-only sequence of document ids stored as a single utf-8 blob plus an offsets array.
+    Both arrays can be memory-mapped, so index-to-doc lookups don't build a private Python dict.
+    """
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def from_doc_index(cls, doc_index: Dict[Any, int]) -> 'DocIdsArray':
+        doc_ids = sorted(doc_index, key=doc_index.get)
+        encoded = [str(doc_id).encode('utf-8') for doc_id in doc_ids]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(e) for e in encoded])
+        blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        return cls(blob, offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode('utf-8')
+
+
+def get_max_scores(matrix: sp.sparse.csr_matrix) -> np.ndarray:
+    """
+    Get the maximum value of every row of a nonnegative CSR matrix (zero for empty rows).
+    For a tfidf matrix it is an upper bound of every term's contribution to a document score.
+    """
+    max_scores = np.zeros(matrix.shape[0], dtype=matrix.dtype)
+    nonempty = np.diff(matrix.indptr) > 0
+    if matrix.nnz:
+        max_scores[nonempty] = np.maximum.reduceat(matrix.data, matrix.indptr[:-1][nonempty])
+    return max_scores
+
+
+def save_shards(path: Union[str, Path], tfidf_matrix: sp.sparse.csr_matrix, opts: Dict,
+                n_shards: int = 1) -> None:
+    """
+    Save a tfidf matrix as a directory of raw `.npy` arrays, splitting it into `n_shards`
+    column (document) ranges. Each shard can be memory-mapped and scored on its own.
+
+    :param path: a directory to save the index to
+    :param tfidf_matrix: a `hash_size x number of documents` tfidf matrix
+    :param opts: vectorizer options, as returned by :meth:`HashingTfIdfVectorizer.load`
+    :param n_shards: a number of document ranges to split the matrix into
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+
+    n_docs = tfidf_matrix.shape[1]
+    bounds = np.linspace(0, n_docs, n_shards + 1).astype(int).tolist()
+    for i, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+        shard = tfidf_matrix[:, start:end].tocsr()
+        shard.sort_indices()
+        np.save(path / 'data_{}.npy'.format(i), shard.data)
+        np.save(path / 'indices_{}.npy'.format(i), shard.indices)
+        np.save(path / 'indptr_{}.npy'.format(i), shard.indptr)
+        np.save(path / 'max_scores_{}.npy'.format(i), get_max_scores(shard))
+
+    doc_ids = DocIdsArray.from_doc_index(opts['doc_index'])
+    np.save(path / 'doc_ids.npy', doc_ids.blob)
+    np.save(path / 'doc_offsets.npy', doc_ids.offsets)
+    np.save(path / 'term_freqs.npy', np.asarray(opts['term_freqs']))
+
+    meta = {'hash_size': opts['hash_size'],
+            'ngram_range': list(opts['ngram_range']),
+            'shard_bounds': bounds,
+            'sorted_indices': True}
+    with (path / 'meta.json').open('w') as f:
+        json.dump(meta, f)
+
+
+def load_shards(path: Union[str, Path]) -> Tuple[List[sp.sparse.csr_matrix], Dict]:
+    """
+    Memory-map a tfidf index saved with :func:`save_shards`.
+
+    :param path: a directory with the index
+    :return: a list of tfidf matrix shards (ordered by document ranges) and vectorizer options
+    """
+    path = Path(path)
+    with (path / 'meta.json').open() as f:
+        meta = json.load(f)
+
+    def _load(name):
+        return np.load(path / name, mmap_mode='r')
+
+    bounds = meta['shard_bounds']
+    shards = []
+    for i, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+        shard = sp.sparse.csr_matrix((_load('data_{}.npy'.format(i)),
+                                      _load('indices_{}.npy'.format(i)),
+                                      _load('indptr_{}.npy'.format(i))),
+                                     shape=(meta['hash_size'], end - start), copy=False)
+        if meta.get('sorted_indices'):
+            # avoid scanning the whole mapped array to check it
+            shard.has_sorted_indices = True
+        shards.append(shard)
+
+    opts = {'hash_size': meta['hash_size'],
+            'ngram_range': tuple(meta['ngram_range']),
+            'index2doc': DocIdsArray(_load('doc_ids.npy'), _load('doc_offsets.npy')),
+            'term_freqs': _load('term_freqs.npy'),
+            'shard_bounds': bounds}
+    if all((path / 'max_scores_{}.npy'.format(i)).exists() for i in range(len(shards))):
+        opts['max_scores'] = [_load('max_scores_{}.npy'.format(i)) for i in range(len(shards))]
+    return shards, opts
+
+
 @register('hashing_tfidf_vectorizer')
 class HashingTfIdfVectorizer(Component, Serializable):
     """
@@ -43,11 +183,18 @@ class HashingTfIdfVectorizer(Component, Serializable):
     """
 
     def __init__(self, hash_size=2 ** 24, tokenizer: Type = StreamSpacyTokenizer, doc_index: dict =None,
-                 save_path: str = None, load_path: str = None, **kwargs):
+                 save_path: str = None, load_path: str = None, mmap: bool = False,
+                 n_shards: int = 1, n_jobs: int = None, **kwargs):
         """
 
         :param hash_size: a size of hash, power of 2
         :param tokenizer: a tokenizer class
+        :param mmap: whether to save the matrix as a directory of memory-mappable `.npy` shards
+         instead of a single `.npz` file; the format to load is detected from `load_path`
+        :param n_shards: a number of document ranges to split the matrix into when `mmap` is set
+        :param n_jobs: if set, fit batches are tokenized and counted in a pool of `n_jobs` processes
+         and their counts are stored on disk as compact chunks that are merged on save,
+         instead of accumulating Python lists in memory
         """
         super().__init__(save_path=save_path, load_path=load_path, mode=kwargs.get('mode', 'infer'))
 
@@ -55,6 +202,10 @@ class HashingTfIdfVectorizer(Component, Serializable):
         self.tokenizer = tokenizer
         self.term_freqs = None
         self.doc_index = doc_index
+        self.n_docs = None
+        self.mmap = mmap
+        self.n_shards = n_shards
+        self.n_jobs = n_jobs
 
         global TOKENIZER
         TOKENIZER = self.tokenizer
@@ -63,36 +214,42 @@ class HashingTfIdfVectorizer(Component, Serializable):
         self.cols = []
         self.data = []
 
+        self.pool = None
+        self.chunks_dir = None
+        self.chunks = []
+
     def __call__(self, questions: List[str]) -> sp.sparse.csr_matrix:
+        """
+        Vectorize a batch of questions into a single sparse query matrix.
+        :param questions: queries to vectorize
+        :return: a `len(questions) x hash_size` tfidf matrix; questions without known
+         ngrams are represented with empty rows
+        """
+        size = self.n_docs or len(self.doc_index)
+        batch_ngrams = list(self.tokenizer(questions))
 
-        sp_tfidfs = []
+        indptr = [0]
+        indices, data = [], []
 
-        for question in questions:
-            ngrams = list(self.tokenizer([question]))
-            hashes = [hash_(ngram, self.hash_size) for ngram in ngrams[0]]
+        for ngrams in batch_ngrams:
+            hashes = [hash_(ngram, self.hash_size) for ngram in ngrams]
 
-            hashes_unique, q_hashes = np.unique(hashes, return_counts=True)
+            hashes_unique, q_hashes = np.unique(np.array(hashes, dtype=np.int64),
+                                                return_counts=True)
             tfs = np.log1p(q_hashes)
 
-            # TODO revise policy if len(q_hashes) == 0
-
-            if len(q_hashes) == 0:
-                return sp.sparse.csr_matrix((1, self.hash_size))
-
-            size = len(self.doc_index)
             Ns = self.term_freqs[hashes_unique]
             idfs = np.log((size - Ns + 0.5) / (Ns + 0.5))
             idfs[idfs < 0] = 0
 
-            tfidf = np.multiply(tfs, idfs)
+            indices.append(hashes_unique.astype(np.int32))
+            data.append(np.multiply(tfs, idfs))
+            indptr.append(indptr[-1] + len(hashes_unique))
 
-            indptr = np.array([0, len(hashes_unique)])
-            sp_tfidf = sp.sparse.csr_matrix(
-                (tfidf, hashes_unique, indptr), shape=(1, self.hash_size)
-            )
-            sp_tfidfs.append(sp_tfidf)
-
-        transformed = sp.sparse.vstack(sp_tfidfs)
+        transformed = sp.sparse.csr_matrix(
+            (np.concatenate(data), np.concatenate(indices), np.array(indptr, dtype=np.int32)),
+            shape=(len(batch_ngrams), self.hash_size)
+        )
         return transformed
 
     def get_counts(self, docs: List[str], doc_ids: List[Any]) \
@@ -134,15 +291,65 @@ class HashingTfIdfVectorizer(Component, Serializable):
 
     def fit_batch(self, docs, doc_ids) -> None:
 
+        if self.n_jobs:
+            self._fit_batch_parallel(docs, doc_ids)
+            return
+
         for batch_rows, batch_data, batch_cols in self.get_counts(docs, doc_ids):
             self.rows.extend(batch_rows)
             self.cols.extend(batch_cols)
             self.data.extend(batch_data)
 
+    def _fit_batch_parallel(self, docs: List[str], doc_ids: List[Any]) -> None:
+        if self.pool is None:
+            self.pool = Pool(self.n_jobs, initializer=_init_worker, initargs=(self.tokenizer,))
+            self.chunks_dir = Path(tempfile.mkdtemp(prefix='tfidf_chunks_', dir=str(self.save_path.parent)))
+
+        # keep a bounded number of batches in flight
+        pending = [result for _, result in self.chunks if not result.ready()]
+        if len(pending) >= 2 * self.n_jobs:
+            pending[0].wait()
+
+        chunk_path = self.chunks_dir / 'chunk_{}.npz'.format(len(self.chunks))
+        col_ids = [self.doc_index[doc_id] for doc_id in doc_ids]
+        result = self.pool.apply_async(_count_batch, (docs, col_ids, self.hash_size, str(chunk_path)))
+        self.chunks.append((chunk_path, result))
+
+    def _merge_chunks(self) -> sp.sparse.csr_matrix:
+        """
+        Wait for all counting jobs and merge their chunks into a single count matrix.
+        Chunks are copied into preallocated arrays, so peak memory stays close to
+        the size of the resulting matrix.
+        """
+        nnzs = [result.get() for _, result in self.chunks]
+        self.pool.close()
+        self.pool.join()
+        self.pool = None
+
+        logger.info("Merging {} count chunks".format(len(self.chunks)))
+        rows = np.empty(sum(nnzs), dtype=np.int32)
+        cols = np.empty(sum(nnzs), dtype=np.int32)
+        data = np.empty(sum(nnzs), dtype=np.int32)
+        offset = 0
+        for (chunk_path, _), nnz in zip(self.chunks, nnzs):
+            chunk = np.load(chunk_path)
+            rows[offset:offset + nnz] = chunk['row']
+            cols[offset:offset + nnz] = chunk['col']
+            data[offset:offset + nnz] = chunk['data']
+            offset += nnz
+
+        count_matrix = sparse.csr_matrix((data, (rows, cols)), shape=(self.hash_size, len(self.doc_index)))
+        shutil.rmtree(str(self.chunks_dir), ignore_errors=True)
+        self.chunks_dir = None
+        return count_matrix
+
     def save(self) -> None:
         logger.info("Saving tfidf matrix to {}".format(self.save_path))
-        count_matrix = self.get_count_matrix(self.rows, self.cols, self.data,
-                                             size=len(self.doc_index))
+        if self.n_jobs:
+            count_matrix = self._merge_chunks()
+        else:
+            count_matrix = self.get_count_matrix(self.rows, self.cols, self.data,
+                                                 size=len(self.doc_index))
         tfidf_matrix, term_freqs = self.get_tfidf_matrix(count_matrix)
         self.term_freqs = term_freqs
 
@@ -151,6 +358,11 @@ class HashingTfIdfVectorizer(Component, Serializable):
                 'doc_index': self.doc_index,
                 'term_freqs': self.term_freqs}
 
+        if self.mmap:
+            save_shards(self.save_path, tfidf_matrix, opts, n_shards=self.n_shards)
+            self.reset()
+            return
+
         data = {
             'data': tfidf_matrix.data,
             'indices': tfidf_matrix.indices,
@@ -167,10 +379,13 @@ class HashingTfIdfVectorizer(Component, Serializable):
         self.rows.clear()
         self.cols.clear()
         self.data.clear()
+        self.chunks.clear()
 
-    def load(self) -> Tuple[sp.sparse.csr_matrix, Dict]:
+    def load(self) -> Tuple[Union[sp.sparse.csr_matrix, List[sp.sparse.csr_matrix]], Dict]:
         # TODO implement loading from URL
         logger.info("Loading tfidf matrix from {}".format(self.load_path))
+        if self.load_path.is_dir():
+            return load_shards(self.load_path)
         loader = np.load(self.load_path)
         matrix = sp.sparse.csr_matrix((loader['data'], loader['indices'],
                                        loader['indptr']), shape=loader['shape'])
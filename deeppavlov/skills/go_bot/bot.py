@@ -20,6 +20,7 @@ import numpy as np
 from typing import Type
 
 from deeppavlov.core.commands.utils import expand_path
+from deeppavlov.core.common.cache import LRUCache, SessionStore
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.models.nn_model import NNModel
 from deeppavlov.core.common.errors import ConfigError
@@ -50,6 +51,10 @@ class GoalOrientedBot(NNModel):
                  save_path=None,
                  word_vocab=None,
                  vocabs=None,
+                 session_ttl: float = 3600.,
+                 max_sessions: int = 10000,
+                 sessions_path: str = None,
+                 feature_cache_size: int = 0,
                  **kwargs):
 
         super().__init__(save_path=save_path, mode=kwargs['mode'])
@@ -63,6 +68,7 @@ class GoalOrientedBot(NNModel):
         self.use_action_mask = use_action_mask
         self.debug = debug
         self.word_vocab = word_vocab or vocabs['word_vocab']
+        self.utterance_cache = LRUCache(feature_cache_size)
 
         template_path = expand_path(template_path)
         template_type = getattr(templ, template_type)
@@ -81,6 +87,10 @@ class GoalOrientedBot(NNModel):
 
         self.network = self._init_network(network_parameters)
 
+        if sessions_path is not None:
+            sessions_path = expand_path(sessions_path)
+        self.sessions = SessionStore(session_ttl, max_sessions, sessions_path)
+
         self.reset()
 
     def _init_network(self, params):
@@ -116,51 +126,95 @@ class GoalOrientedBot(NNModel):
             params['attention_mechanism'] = attn
         return GoalOrientedBotNetwork(**params)
 
-    def _encode_context(self, context, db_result=None):
+    def _compute_utterance_features(self, texts):
         # tokenize input
-        tokens = self.tokenizer([context.lower().strip()])[0]
-        if self.debug:
-            log.debug("Tokenized text= `{}`".format(' '.join(tokens)))
+        b_tokens = self.tokenizer(texts)
+        features = [{'tokens': tokens,
+                     'bow': [],
+                     'emb': [],
+                     'emb_context': np.array([], dtype=np.float32),
+                     'intent': None,
+                     'intent_features': [],
+                     'slots': None} for tokens in b_tokens]
 
         # Bag of words features
-        bow_features = []
         if callable(self.bow_embedder):
-            bow_features = self.bow_embedder([tokens], self.word_vocab)[0]
-            bow_features = bow_features.astype(np.float32)
+            for f, bow in zip(features, self.bow_embedder(b_tokens, self.word_vocab)):
+                f['bow'] = bow.astype(np.float32)
 
         # Embeddings
-        emb_features = []
-        emb_context = np.array([], dtype=np.float32)
         if callable(self.embedder):
             if self.network.attn:
-                if tokens:
-                    pad = np.zeros((self.network.attn.max_num_tokens,
-                                    self.network.attn.token_size),
-                                   dtype=np.float32)
-                    sen = np.array(self.embedder([tokens])[0])
-                    # TODO : Unsupport of batch_size more than 1
+                pad = np.zeros((self.network.attn.max_num_tokens,
+                                self.network.attn.token_size),
+                               dtype=np.float32)
+                nonempty = [f for f in features if f['tokens']]
+                embeddings = self.embedder([f['tokens'] for f in nonempty]) if nonempty else []
+                for f in features:
+                    f['emb_context'] = pad
+                for f, sen in zip(nonempty, embeddings):
+                    sen = np.array(sen)[:len(f['tokens'])]
                     emb_context = np.concatenate((pad, sen))
-                    emb_context = emb_context[-self.network.attn.max_num_tokens:]
-                else:
-                    emb_context = \
-                        np.zeros((self.network.attn.max_num_tokens,
-                                  self.network.attn.token_size),
-                                 dtype=np.float32)
+                    f['emb_context'] = emb_context[-self.network.attn.max_num_tokens:]
             else:
-                emb_features = self.embedder([tokens], mean=True)[0]
-                # random embedding instead of zeros
-                if np.all(emb_features < 1e-20):
-                    emb_dim = self.embedder.dim
-                    emb_features = np.fabs(np.random.normal(0, 1/emb_dim, emb_dim))
+                for f, emb in zip(features, self.embedder(b_tokens, mean=True)):
+                    # random embedding instead of zeros
+                    if np.all(emb < 1e-20):
+                        emb_dim = self.embedder.dim
+                        emb = np.fabs(np.random.normal(0, 1/emb_dim, emb_dim))
+                    f['emb'] = emb
 
         # Intent features
-        intent_features = []
         if callable(self.intent_classifier):
-            intent, intent_probs = self.intent_classifier([tokens])
-            intent_features = np.array([intent_probs[0][i] for i in self.intents],
-                                       dtype=np.float32)
-            if self.debug:
-                log.debug("Predicted intent = `{}`".format(intent[0]))
+            intents, intent_probs = self.intent_classifier(b_tokens)
+            for f, intent, probs in zip(features, intents, intent_probs):
+                f['intent'] = intent
+                f['intent_features'] = np.array([probs[i] for i in self.intents],
+                                                dtype=np.float32)
+
+        # Text entity features
+        if callable(self.slot_filler):
+            for f, slots in zip(features, self.slot_filler(b_tokens)):
+                f['slots'] = slots
+        return features
+
+    def _encode_utterances(self, texts):
+        """
+        Get features of utterances that don't depend on a dialog state. Every sub-model
+        is called once for all utterances that are not in the features cache.
+        """
+        keys = [text.lower().strip() for text in texts]
+        features = {}
+        missing = []
+        for key in keys:
+            if key not in features:
+                features[key] = self.utterance_cache.get(key)
+                if features[key] is None:
+                    missing.append(key)
+        if missing:
+            for key, f in zip(missing, self._compute_utterance_features(missing)):
+                features[key] = f
+                self.utterance_cache.put(key, f)
+        return [features[key] for key in keys]
+
+    def _encode_dialogs(self, dialogs):
+        utterances = iter(self._encode_utterances([context['text'] for d_contexts in dialogs
+                                                   for context in d_contexts]))
+        return [[next(utterances) for _ in d_contexts] for d_contexts in dialogs]
+
+    def _encode_context(self, context, db_result=None, utterance=None):
+        if utterance is None:
+            utterance = self._encode_utterances([context])[0]
+        tokens = utterance['tokens']
+        if self.debug:
+            log.debug("Tokenized text= `{}`".format(' '.join(tokens)))
+
+        bow_features = utterance['bow']
+        emb_features = utterance['emb']
+        emb_context = utterance['emb_context']
+        intent_features = utterance['intent_features']
+        if self.debug and utterance['intent'] is not None:
+            log.debug("Predicted intent = `{}`".format(utterance['intent']))
 
         attn_key = np.array([], dtype=np.float32)
         if self.network.attn:
@@ -172,10 +226,10 @@ class GoalOrientedBot(NNModel):
                 attn_key = np.array([1], dtype=np.float32)
 
         # Text entity features
-        if callable(self.slot_filler):
-            self.tracker.update_state(self.slot_filler([tokens])[0])
+        if utterance['slots'] is not None:
+            self.tracker.update_state(utterance['slots'])
             if self.debug:
-                log.debug("Slot vals: {}".format(self.slot_filler([tokens])))
+                log.debug("Slot vals: {}".format([utterance['slots']]))
 
         state_features = self.tracker()
 
@@ -235,11 +289,7 @@ class GoalOrientedBot(NNModel):
         mask = np.ones(self.n_actions, dtype=np.float32)
         if self.use_action_mask:
             known_entities = {**self.tracker.get_state(), **(self.db_result or {})}
-            for a_id in range(self.n_actions):
-                tmpl = str(self.templates.templates[a_id])
-                for entity in set(re.findall('#([A-Za-z]+)', tmpl)):
-                    if entity not in known_entities:
-                        mask[a_id] = 0.
+            mask[~self.templates.action_mask(known_entities)] = 0.
         # forbid two api calls in a row
         if np.any(previous_action):
             prev_act_id = np.argmax(previous_action)
@@ -251,17 +301,18 @@ class GoalOrientedBot(NNModel):
         b_features, b_u_masks, b_a_masks, b_actions = [], [], [], []
         b_emb_context, b_keys = [], []  # for attention
         max_num_utter = max(len(d_contexts) for d_contexts in x)
-        for d_contexts, d_responses in zip(x, y):
+        b_utterances = self._encode_dialogs(x)
+        for d_contexts, d_responses, d_utterances in zip(x, y, b_utterances):
             self.reset()
             if self.debug:
-                preds = self._infer_dialog(d_contexts)
+                preds = self._infer_dialog(d_contexts, d_utterances)
             d_features, d_a_masks, d_actions = [], [], []
             d_emb_context, d_key = [], []  # for attention
-            for context, response in zip(d_contexts, d_responses):
+            for context, response, utterance in zip(d_contexts, d_responses, d_utterances):
                 if context.get('db_result') is not None:
                     self.db_result = context['db_result']
                 features, emb_context, key = \
-                    self._encode_context(context['text'], context.get('db_result'))
+                    self._encode_context(context['text'], context.get('db_result'), utterance)
                 d_features.append(features)
                 d_emb_context.append(emb_context)
                 d_key.append(key)
@@ -300,10 +351,10 @@ class GoalOrientedBot(NNModel):
         self.network.train_on_batch(b_features, b_emb_context, b_keys, b_u_masks,
                                     b_a_masks, b_actions)
 
-    def _infer(self, context, db_result=None, prob=False):
+    def _infer(self, context, db_result=None, prob=False, utterance=None):
         if db_result is not None:
             self.db_result = db_result
-        features, emb_context, key = self._encode_context(context, db_result)
+        features, emb_context, key = self._encode_context(context, db_result, utterance)
         action_mask = self._action_mask(self.prev_action)
         probs = self.network(
             [[features]], [[emb_context]], [[key]], [[action_mask]], prob=True
@@ -319,17 +370,19 @@ class GoalOrientedBot(NNModel):
 
         return self._decode_response(pred_id)
 
-    def _infer_dialog(self, contexts):
+    def _infer_dialog(self, contexts, utterances=None):
+        if utterances is None:
+            utterances = self._encode_utterances([context['text'] for context in contexts])
         self.reset()
         res = []
-        for context in contexts:
+        for context, utterance in zip(contexts, utterances):
             if context.get('prev_resp_act') is not None:
                 action_id = self._encode_response(context.get('prev_resp_act'))
                 # previous action is teacher-forced
                 self.prev_action *= 0.
                 self.prev_action[action_id] = 1.
 
-            res.append(self._infer(context['text'], context.get('db_result')))
+            res.append(self._infer(context['text'], context.get('db_result'), utterance=utterance))
         return res
 
     def make_api_call(self, slots):
@@ -349,21 +402,118 @@ class GoalOrientedBot(NNModel):
             db_results = [r for r in db_results if r != self.db_result]
         return db_results[0] if db_results else {}
 
-    def __call__(self, batch):
+    def _respond(self, x, utterance=None):
+        pred = self._infer(x, utterance=utterance)
+        # if made api_call, then respond with next prediction
+        if np.argmax(self.prev_action) == self.api_call_id:
+            db_result = self.make_api_call(self.tracker.get_state())
+            return self._infer(x, db_result=db_result, utterance=utterance)
+        return pred
+
+    def _get_session_state(self):
+        return {
+            'tracker': self.tracker.get_dialog_state(),
+            'db_result': self.db_result,
+            'prev_action': self.prev_action.copy(),
+            'network': self.network.get_state()
+        }
+
+    def _set_session_state(self, state):
+        self.tracker.set_dialog_state(state['tracker'])
+        self.db_result = state['db_result']
+        self.prev_action = state['prev_action'].copy()
+        self.network.set_state(state['network'])
+
+    def __call__(self, batch, session_ids=None):
+        """
+        Respond to a batch of utterances or infer a batch of whole dialogs.
+
+        :param batch: a list of utterances or a list of dialogs
+        :param session_ids: ids of dialogs the utterances belong to. Every dialog continues
+            from its own stored state. If not set, all utterances continue one dialog.
+        """
         if isinstance(batch[0], str):
-            res = []
-            for x in batch:
-                pred = self._infer(x)
-                # if made api_call, then respond with next prediction
-                if np.argmax(self.prev_action) == self.api_call_id:
-                    db_result = self.make_api_call(self.tracker.get_state())
-                    res.append(self._infer(x, db_result=db_result))
-                else:
-                    res.append(pred)
-            return res
-        return [self._infer_dialog(x) for x in batch]
-
-    def reset(self):
+            utterances = self._encode_utterances(batch)
+            if session_ids is None:
+                return [self._respond(x, u) for x, u in zip(batch, utterances)]
+            return self._respond_sessions(batch, session_ids, utterances)
+        return [self._infer_dialog(x, u) for x, u in zip(batch, self._encode_dialogs(batch))]
+
+    def _infer_sessions(self, contexts, utterances, states, db_results=None):
+        """
+        Predict responses of several dialogs with a single network call.
+        `states` of the dialogs are replaced with their new states.
+        """
+        db_results = db_results or [None] * len(contexts)
+        features, emb_context, keys, masks = [], [], [], []
+        for i, (context, utterance, db_result) in enumerate(zip(contexts, utterances, db_results)):
+            self._set_session_state(states[i])
+            if db_result is not None:
+                self.db_result = db_result
+            f, e, k = self._encode_context(context, db_result, utterance)
+            features.append(f)
+            emb_context.append(e)
+            keys.append(k)
+            masks.append(self._action_mask(self.prev_action))
+            states[i] = self._get_session_state()
+
+        probs, lstm_states = self.network.step(features, emb_context, keys, masks,
+                                               [state['network'] for state in states])
+        responses = []
+        for i, pred_id in enumerate(np.argmax(probs, axis=-1)):
+            self._set_session_state(states[i])
+            self.network.set_state(lstm_states[i])
+            self.prev_action *= 0
+            self.prev_action[pred_id] = 1
+            responses.append(self._decode_response(pred_id))
+            states[i] = self._get_session_state()
+        return responses
+
+    def _respond_sessions(self, batch, session_ids, utterances):
+        res = [None] * len(batch)
+        pending = list(range(len(batch)))
+        while pending:
+            # a dialog advances by one utterance per network call
+            turn, seen, pending_next = [], set(), []
+            for i in pending:
+                (pending_next if session_ids[i] in seen else turn).append(i)
+                seen.add(session_ids[i])
+
+            states = []
+            for i in turn:
+                state = self.sessions.get(session_ids[i])
+                if state is None:
+                    self.reset()
+                    state = self._get_session_state()
+                states.append(state)
+            responses = self._infer_sessions([batch[i] for i in turn], [utterances[i] for i in turn], states)
+
+            # if made api_call, then respond with next prediction
+            api_calls = [k for k, state in enumerate(states)
+                         if np.argmax(state['prev_action']) == self.api_call_id]
+            if api_calls:
+                db_results = []
+                for k in api_calls:
+                    self._set_session_state(states[k])
+                    db_results.append(self.make_api_call(self.tracker.get_state()))
+                api_states = [states[k] for k in api_calls]
+                api_responses = self._infer_sessions([batch[turn[k]] for k in api_calls],
+                                                     [utterances[turn[k]] for k in api_calls],
+                                                     api_states, db_results)
+                for k, state, response in zip(api_calls, api_states, api_responses):
+                    states[k] = state
+                    responses[k] = response
+
+            for i, state, response in zip(turn, states, responses):
+                res[i] = response
+                self.sessions.put(session_ids[i], state)
+            pending = pending_next
+        return res
+
+    def reset(self, session_id=None):
+        if session_id is not None:
+            self.sessions.pop(session_id)
+            return
         self.tracker.reset_state()
         self.db_result = None
         self.prev_action = np.zeros(self.n_actions, dtype=np.float32)
@@ -74,11 +74,41 @@ class GoalOrientedBotNetwork(TFModel):
             self.sess.run([self._probs, self._prediction, self._state],
                           feed_dict=feed_dict)
 
-        self.state_c, self._state_h = state
+        self.state_c, self.state_h = state
         if prob:
             return probs
         return prediction
 
+    def step(self, features, emb_context, key, action_mask, states):
+        """
+        Advance a batch of independent dialogs by one turn in a single session run.
+
+        :param features: features of the last utterance of every dialog
+        :param emb_context: token embeddings of the last utterances (used with attention)
+        :param key: attention keys of the last utterances (used with attention)
+        :param action_mask: action masks of every dialog
+        :param states: LSTM states (c, h) of every dialog, each of shape [1, hidden_size]
+        :return: action probabilities of shape [batch_size, action_size] and new LSTM states of the dialogs
+        """
+        batch_size = len(features)
+        state_c = np.concatenate([c for c, _ in states])
+        state_h = np.concatenate([h for _, h in states])
+        feed_dict = {
+            self._features: np.asarray(features, dtype=np.float32)[:, None],
+            self._dropout_keep_prob: 1.,
+            self._learning_rate: 1.,
+            self._utterance_mask: np.ones((batch_size, 1), dtype=np.float32),
+            self._initial_state: (state_c, state_h),
+            self._action_mask: np.asarray(action_mask, dtype=np.float32)[:, None]
+        }
+        if self.attn:
+            feed_dict[self._emb_context] = np.asarray(emb_context, dtype=np.float32)[:, None]
+            feed_dict[self._key] = np.asarray(key, dtype=np.float32)[:, None]
+
+        probs, (state_c, state_h) = self.sess.run([self._probs, self._state], feed_dict=feed_dict)
+        probs = probs.reshape(batch_size, self.action_size)
+        return probs, [(state_c[i:i + 1], state_h[i:i + 1]) for i in range(batch_size)]
+
     def train_on_batch(self, features, emb_context, key, utter_mask, action_mask, action):
         feed_dict = {
             self._dropout_keep_prob: 1 - self.dropout_rate,
@@ -320,5 +350,11 @@ class GoalOrientedBotNetwork(TFModel):
         self.state_c = np.zeros([1, self.hidden_size], dtype=np.float32)
         self.state_h = np.zeros([1, self.hidden_size], dtype=np.float32)
 
+    def get_state(self):
+        return self.state_c, self.state_h
+
+    def set_state(self, state):
+        self.state_c, self.state_h = state
+
     def shutdown(self):
         self.sess.close()
@@ -18,6 +18,8 @@ import copy
 import re
 from abc import ABCMeta, abstractmethod
 
+import numpy as np
+
 
 class Template(metaclass=ABCMeta):
 
@@ -127,6 +129,8 @@ class Templates:
         self.templ2act = {}
         self._actions = []
         self._templates = []
+        self._slots = None
+        self._slot_mask = None
 
     def __contains__(self, key):
         """If key is an str, returns whether the key is in the actions.
@@ -161,6 +165,8 @@ class Templates:
             self.templ2act[value] = key
             self._actions = []
             self._templates = []
+            self._slots = None
+            self._slot_mask = None
 
     @property
     def actions(self):
@@ -174,10 +180,39 @@ class Templates:
             self._templates = [self.act2templ[a] for a in self.actions]
         return self._templates
 
+    @property
+    def slots(self):
+        """A dict of slot names used in templates to their indices."""
+        if self._slots is None:
+            self._compile()
+        return self._slots
+
+    @property
+    def slot_mask(self):
+        """A boolean matrix of shape [number of actions, number of slots]
+        with slots that templates of actions require."""
+        if self._slot_mask is None:
+            self._compile()
+        return self._slot_mask
+
+    def _compile(self):
+        required = [set(re.findall('#([A-Za-z]+)', str(t))) for t in self.templates]
+        self._slots = {slot: i for i, slot in enumerate(sorted(set().union(*required)))}
+        self._slot_mask = np.zeros((len(required), len(self._slots)), dtype=bool)
+        for a_id, slots in enumerate(required):
+            self._slot_mask[a_id, [self._slots[s] for s in slots]] = True
+
+    def action_mask(self, known_slots):
+        """Get a mask of actions whose templates require only slots from `known_slots`."""
+        known = np.zeros(len(self.slots), dtype=bool)
+        known[[self.slots[s] for s in known_slots if s in self.slots]] = True
+        return ~np.any(self.slot_mask & ~known, axis=1)
+
     def load(self, filename):
         for ln in open(filename, 'r'):
             act, template = ln.strip('\n').split('\t', 1)
             self.__setitem__(act, self.ttype.from_str(template))
+        self._compile()
         return self
 
     def save(self, filename):
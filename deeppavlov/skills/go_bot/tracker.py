@@ -25,6 +25,7 @@ class FeaturizedTracker(Component):
 
     def __init__(self, slot_names, *args, **kwargs):
         self.slot_names = list(slot_names)
+        self.slot_ids = {slot: i for i, slot in enumerate(self.slot_names)}
         self.reset_state()
 
     @property
@@ -36,59 +37,52 @@ class FeaturizedTracker(Component):
         return self.state_size * 3 + 3
 
     def reset_state(self):
-        self.history = []
+        self.state = {}
+        self.bin_feats = np.zeros(self.state_size, dtype=np.float32)
         self.curr_feats = np.zeros(self.num_features, dtype=np.float32)
 
     def update_state(self, slots):
-        def _filter(slots):
-            return filter(lambda s: s[0] in self.slot_names, slots)
-        prev_state = self.get_state()
-        if type(slots) == list:
-            self.history.extend(_filter(slots))
-        elif type(slots) == dict:
-            for slot, value in _filter(slots.items()):
-                self.history.append((slot, value))
-        bin_feats = self._binary_features()
-        diff_feats = self._diff_features(prev_state)
-        new_feats = self._new_features(prev_state)
-        self.curr_feats = np.hstack((bin_feats,
+        if type(slots) == dict:
+            slots = slots.items()
+        elif type(slots) != list:
+            slots = []
+        # only slots changed in this turn can be different or new
+        diff_feats = np.zeros(self.state_size, dtype=np.float32)
+        new_feats = np.zeros(self.state_size, dtype=np.float32)
+        prev_values = {}
+        for slot, value in slots:
+            if slot not in self.slot_ids:
+                continue
+            if slot not in prev_values:
+                prev_values[slot] = (slot in self.state, self.state.get(slot))
+            self.state[slot] = value
+        for slot, (was_set, prev_value) in prev_values.items():
+            i = self.slot_ids[slot]
+            if not was_set:
+                new_feats[i] = 1.
+            elif prev_value != self.state[slot]:
+                diff_feats[i] = 1.
+            self.bin_feats[i] = 1.
+        self.curr_feats = np.hstack((self.bin_feats,
                                      diff_feats,
                                      new_feats,
-                                     np.sum(bin_feats),
+                                     np.sum(self.bin_feats),
                                      np.sum(diff_feats),
                                      np.sum(new_feats)))
         return self
 
     def get_state(self):
-        lasts = {}
-        for slot, value in self.history:
-            lasts[slot] = value
-        return lasts
-
-    def _binary_features(self):
-        feats = np.zeros(self.state_size, dtype=np.float32)
-        lasts = self.get_state()
-        for i, slot in enumerate(self.slot_names):
-            if slot in lasts:
-                feats[i] = 1.
-        return feats
-
-    def _diff_features(self, state):
-        feats = np.zeros(self.state_size, dtype=np.float32)
-        curr_state = self.get_state()
-        for i, slot in enumerate(self.slot_names):
-            if (slot in curr_state) and (slot in state) and\
-                    (curr_state[slot] != state[slot]):
-                feats[i] = 1.
-        return feats
-
-    def _new_features(self, state):
-        feats = np.zeros(self.state_size, dtype=np.float32)
-        curr_state = self.get_state()
-        for i, slot in enumerate(self.slot_names):
-            if (slot in curr_state) and (slot not in state):
-                feats[i] = 1.
-        return feats
+        return dict(self.state)
+
+    def get_dialog_state(self):
+        return {'state': dict(self.state),
+                'bin_feats': self.bin_feats.copy(),
+                'curr_feats': self.curr_feats.copy()}
+
+    def set_dialog_state(self, state):
+        self.state = dict(state['state'])
+        self.bin_feats = state['bin_feats'].copy()
+        self.curr_feats = state['curr_feats'].copy()
 
     def __call__(self):
         return self.curr_feats
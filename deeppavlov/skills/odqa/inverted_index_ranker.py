@@ -0,0 +1,150 @@
+"""
+Copyright 2017 Neural Networks and Deep Learning lab, MIPT
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from typing import List, Dict, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from deeppavlov.core.common.registry import register
+from deeppavlov.core.common.log import get_logger
+from deeppavlov.models.vectorizers.hashing_tfidf_vectorizer import get_max_scores
+from deeppavlov.skills.odqa.tfidf_ranker import TfidfRanker
+
+logger = get_logger(__name__)
+
+
+@register("inverted_index_ranker")
+class InvertedIndexRanker(TfidfRanker):
+    """
+    Rank documents with the same hashed tfidf features as :class:`TfidfRanker`,
+    but evaluate only the documents which can still get into the top n.
+
+    Rows of the `hash_size x number of documents` tfidf matrix are used as postings lists
+    (sorted document indices with term weights). Every term also gets an upper bound of its
+    contribution to a document score. Query terms are processed by descending upper bound
+    (MaxScore): while the remaining terms can lift an unseen document above the current
+    n-th best score, their postings are merged into the candidate set; afterwards the remaining
+    (usually long and low-weighted) postings lists are only probed for the existing candidates
+    with a binary search, and candidates that can't reach the top n anymore are dropped.
+    Scores are identical to the exhaustive :class:`TfidfRanker`.
+    """
+
+    def set_index(self, tfidf_matrix, opts: Dict):
+        super().set_index(tfidf_matrix, opts)
+
+        # postings lists are searched with binary search
+        for i, shard in enumerate(self.tfidf_shards):
+            if shard.has_sorted_indices:
+                continue
+            if shard.indices.flags.writeable and shard.data.flags.writeable:
+                shard.sort_indices()
+            else:
+                # shards saved by save_shards() are already sorted, others have to be copied to memory
+                logger.warning("Tfidf shard {} has unsorted indices and is copied to memory to sort them, "
+                               "save the index again to avoid it".format(i))
+                self.tfidf_shards[i] = shard.sorted_indices()
+
+        if opts.get('max_scores') is not None:
+            self.max_scores = opts['max_scores']
+        else:
+            logger.info("Computing term upper bounds for {} tfidf shard(s)".format(len(self.tfidf_shards)))
+            self.max_scores = [get_max_scores(shard) for shard in self.tfidf_shards]
+
+    def search(self, shard: sparse.csr_matrix, max_scores: np.ndarray, terms: np.ndarray,
+               weights: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find k best documents of a single shard for a single query.
+        :param shard: a tfidf matrix shard with sorted indices
+        :param max_scores: upper bounds of term weights in the shard
+        :param terms: query term hashes
+        :param weights: query term weights
+        :param k: a number of documents to return
+        :return: indices of candidate documents and their scores; all documents of the top k
+         with nonzero scores are among them
+        """
+        nonzero = weights > 0
+        terms, weights = terms[nonzero], weights[nonzero]
+        upper_bounds = weights * max_scores[terms]
+        order = np.argsort(-upper_bounds)
+        terms, weights = terms[order], weights[order]
+        # remaining[i] is the best score a document can get from terms i, i+1, ...
+        remaining = np.append(np.cumsum(upper_bounds[order][::-1])[::-1], 0)
+
+        cand_ids = np.array([], dtype=shard.indices.dtype)
+        cand_scores = np.array([], dtype=np.float64)
+
+        for i, (term, weight) in enumerate(zip(terms, weights)):
+            start, end = shard.indptr[term], shard.indptr[term + 1]
+            if start == end:
+                continue
+            postings = shard.indices[start:end]
+
+            threshold = self._kth_score(cand_scores, k)
+            if threshold is None or remaining[i] > threshold:
+                # a document not seen yet can still get into the top k
+                ids = np.concatenate([cand_ids, postings])
+                scores = np.concatenate([cand_scores, shard.data[start:end] * weight])
+                cand_ids, inverse = np.unique(ids, return_inverse=True)
+                cand_scores = np.bincount(inverse, weights=scores)
+            else:
+                pos = np.searchsorted(postings, cand_ids)
+                pos[pos == len(postings)] = 0
+                found = postings[pos] == cand_ids
+                cand_scores[found] += shard.data[start + pos[found]] * weight
+
+                threshold = self._kth_score(cand_scores, k)
+                keep = cand_scores + remaining[i + 1] >= threshold
+                cand_ids, cand_scores = cand_ids[keep], cand_scores[keep]
+
+        return cand_ids, cand_scores
+
+    @staticmethod
+    def _kth_score(scores: np.ndarray, k: int):
+        if len(scores) < k:
+            return None
+        return np.partition(scores, len(scores) - k)[len(scores) - k]
+
+    def __call__(self, questions: List[str]):
+        """
+        Rank documents and return top n document titles with scores.
+        :param questions: queries to search an answer for
+        :return: document ids, document scores
+        """
+        if not self.active:
+            return super().__call__(questions)
+
+        batch_doc_ids, batch_docs_scores = [], []
+
+        q_tfidfs = self.vectorizer(questions)
+
+        for i in range(q_tfidfs.shape[0]):
+            row = slice(q_tfidfs.indptr[i], q_tfidfs.indptr[i + 1])
+            terms, weights = q_tfidfs.indices[row], q_tfidfs.data[row]
+
+            candidates, candidate_scores = [], []
+            for offset, shard, max_scores in zip(self.shard_offsets, self.tfidf_shards,
+                                                 self.max_scores):
+                ids, scores = self.search(shard, max_scores, terms, weights, self.top_n)
+                o, scores = self.get_top_k_sparse(ids, scores, self.top_n, n_docs=shard.shape[1])
+                candidates.append(o + offset)
+                candidate_scores.append(scores)
+
+            candidates = np.concatenate(candidates)
+            candidate_scores = np.concatenate(candidate_scores)
+            o_sort = self.get_top_k(candidate_scores, self.top_n)
+
+            batch_doc_ids.append([self.index2doc[j] for j in candidates[o_sort]])
+            batch_docs_scores.append(candidate_scores[o_sort])
+
+        return batch_doc_ids, batch_docs_scores
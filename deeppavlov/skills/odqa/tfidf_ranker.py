@@ -11,7 +11,7 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-from typing import List
+from typing import List, Tuple, Dict
 
 import numpy as np
 
@@ -45,27 +45,81 @@ class TfidfRanker(Estimator):
 
         if kwargs['mode'] != 'train':
             if self.vectorizer.load_path.exists():
-                self.tfidf_matrix, opts = self.vectorizer.load()
-                self.ngram_range = opts['ngram_range']
-                self.hash_size = opts['hash_size']
-                self.term_freqs = opts['term_freqs'].squeeze()
-                self.doc_index = opts['doc_index']
-
-                self.vectorizer.doc_index = self.doc_index
-                self.vectorizer.term_freqs = self.term_freqs
-                self.vectorizer.hash_size = self.hash_size
-
-                self.index2doc = self.get_index2doc()
+                self.set_index(*self.vectorizer.load())
             else:
                 self.iterator = None
                 logger.warning("TfidfRanker load_path doesn't exist, is waiting for training.")
 
+    def set_index(self, tfidf_matrix, opts: Dict):
+        """
+        Set up the ranker with a loaded tfidf matrix.
+        :param tfidf_matrix: a tfidf matrix or a list of its document range shards
+        :param opts: vectorizer options returned by :meth:`HashingTfIdfVectorizer.load`
+        """
+        self.ngram_range = opts['ngram_range']
+        self.hash_size = opts['hash_size']
+        self.term_freqs = opts['term_freqs'].squeeze()
+        self.doc_index = opts.get('doc_index')
+
+        if isinstance(tfidf_matrix, list):
+            # memory-mapped index, split into document ranges
+            self.tfidf_shards = tfidf_matrix
+            self.shard_offsets = opts['shard_bounds'][:-1]
+            self.index2doc = opts['index2doc']
+        else:
+            self.tfidf_shards = [tfidf_matrix]
+            self.shard_offsets = [0]
+            self.index2doc = self.get_index2doc()
+
+        self.vectorizer.doc_index = self.doc_index
+        self.vectorizer.n_docs = len(self.index2doc)
+        self.vectorizer.term_freqs = self.term_freqs
+        self.vectorizer.hash_size = self.hash_size
+
     def get_index2doc(self):
         return dict(zip(self.doc_index.values(), self.doc_index.keys()))
 
+    @staticmethod
+    def get_top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """
+        Get indices of the k highest scores, sorted by score in descending order.
+        """
+        if len(scores) == 0:
+            return np.array([], dtype=int)
+        if k >= len(scores):
+            o = np.argpartition(-scores, len(scores) - 1)[0:k]
+        else:
+            o = np.argpartition(-scores, k)[0:k]
+        return o[np.argsort(-scores[o])]
+
+    def get_top_k_sparse(self, indices: np.ndarray, scores: np.ndarray, k: int, n_docs: int) \
+            -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the k best documents from a single sparse row of scores without densifying it.
+        If the row has less than k nonzero scores, it is padded with zero-scored documents.
+        :param indices: column indices of the nonzero scores
+        :param scores: nonzero scores
+        :param k: a number of documents to return
+        :param n_docs: a total number of documents (columns) in the row
+        :return: document indices and scores, sorted by score in descending order
+        """
+        scores = scores + 0.0001  # add a small value to eliminate zero scores
+        o = self.get_top_k(scores, k)
+        top_indices, top_scores = indices[o], scores[o]
+
+        n_pad = min(k, n_docs) - len(top_indices)
+        if n_pad > 0:
+            pool = np.arange(min(n_docs, k + len(indices)))
+            pad = np.setdiff1d(pool, indices, assume_unique=True)[:n_pad]
+            top_indices = np.concatenate([top_indices, pad])
+            top_scores = np.concatenate([top_scores, np.full(len(pad), 0.0001)])
+
+        return top_indices, top_scores
+
     def __call__(self, questions: List[str]):
         """
         Rank documents and return top n document titles with scores.
+        All questions of the batch are scored with a single sparse matrix product per shard.
         :param questions: queries to search an answer for
         :param n: a number of documents to return
         :return: document ids, document scores
@@ -75,24 +129,30 @@ class TfidfRanker(Estimator):
 
         q_tfidfs = self.vectorizer(questions)
 
-        for q_tfidf in q_tfidfs:
-            scores = q_tfidf * self.tfidf_matrix
-            scores = np.squeeze(
-                scores.toarray() + 0.0001)  # add a small value to eliminate zero scores
-
-            if self.active:
-                thresh = self.top_n
-            else:
-                thresh = len(self.doc_index)
-
-            if thresh >= len(scores):
-                o = np.argpartition(-scores, len(scores) - 1)[0:thresh]
-            else:
-                o = np.argpartition(-scores, thresh)[0:thresh]
-            o_sort = o[np.argsort(-scores[o])]
-
-            doc_scores = scores[o_sort]
-            doc_ids = [self.index2doc[i] for i in o_sort]
+        if self.active:
+            thresh = self.top_n
+        else:
+            thresh = len(self.index2doc)
+
+        candidates = [[] for _ in range(q_tfidfs.shape[0])]
+        candidate_scores = [[] for _ in range(q_tfidfs.shape[0])]
+
+        for offset, shard in zip(self.shard_offsets, self.tfidf_shards):
+            scores = (q_tfidfs * shard).tocsr()
+            for i in range(scores.shape[0]):
+                row = slice(scores.indptr[i], scores.indptr[i + 1])
+                o, row_scores = self.get_top_k_sparse(scores.indices[row], scores.data[row],
+                                                      thresh, n_docs=shard.shape[1])
+                candidates[i].append(o + offset)
+                candidate_scores[i].append(row_scores)
+
+        for q_candidates, q_scores in zip(candidates, candidate_scores):
+            q_candidates = np.concatenate(q_candidates)
+            q_scores = np.concatenate(q_scores)
+            o_sort = self.get_top_k(q_scores, thresh)
+
+            doc_scores = q_scores[o_sort]
+            doc_ids = [self.index2doc[i] for i in q_candidates[o_sort]]
             batch_doc_ids.append(doc_ids)
             batch_docs_scores.append(doc_scores)
 
@@ -21,6 +21,7 @@ from typing import Type
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.models.nn_model import NNModel
 from deeppavlov.core.data.vocab import DefaultVocabulary
+from deeppavlov.core.data.padding import pad_sequences
 from deeppavlov.models.embedders.fasttext_embedder import FasttextEmbedder
 from deeppavlov.skills.seq2seq_go_bot.network import Seq2SeqGoalOrientedBotNetwork
 from deeppavlov.core.common.log import get_logger
@@ -66,15 +67,10 @@ class Seq2SeqGoalOrientedBot(NNModel):
             b_tgt_weights.append([1] * len(dec_out))
 
         # Sequence padding
-        max_src_len = max(b_src_lens)
-        max_tgt_len = max(b_tgt_lens)
-        for i, (src_len, tgt_len) in enumerate(zip(b_src_lens, b_tgt_lens)):
-            src_padd_len = max_src_len - src_len
-            tgt_padd_len = max_tgt_len - tgt_len
-            b_enc_ins[i].extend([self.src_vocab[self.sos_token]] * src_padd_len)
-            b_dec_ins[i].extend([self.tgt_vocab[self.eos_token]] * tgt_padd_len)
-            b_dec_outs[i].extend([self.tgt_vocab[self.eos_token]] * tgt_padd_len)
-            b_tgt_weights[i].extend([0] * tgt_padd_len)
+        b_enc_ins = pad_sequences(b_enc_ins, value=self.src_vocab[self.sos_token])
+        b_dec_ins = pad_sequences(b_dec_ins, value=self.tgt_vocab[self.eos_token])
+        b_dec_outs = pad_sequences(b_dec_outs, value=self.tgt_vocab[self.eos_token])
+        b_tgt_weights = pad_sequences(b_tgt_weights, value=0)
 
         self.network.train_on_batch(b_enc_ins, b_dec_ins, b_dec_outs,
                                     b_src_lens, b_tgt_lens, b_tgt_weights)
@@ -111,10 +107,7 @@ class Seq2SeqGoalOrientedBot(NNModel):
             b_src_lens.append(len(enc_in))
 
         # Sequence padding
-        max_src_len = max(b_src_lens)
-        for i, src_len in enumerate(b_src_lens):
-            src_padd_len = max_src_len - src_len
-            b_enc_ins[i].extend([self.src_vocab[self.eos_token]] * src_padd_len)
+        b_enc_ins = pad_sequences(b_enc_ins, value=self.src_vocab[self.eos_token])
 
         pred_idxs = self.network(b_enc_ins, b_src_lens)
         preds = [list(_filter(self.tgt_vocab(utter_idxs)))\
@@ -15,7 +15,6 @@ limitations under the License.
 """
 
 import shutil
-from collections import defaultdict
 
 import requests
 from lxml import html
@@ -25,6 +24,7 @@ from deeppavlov.core.common.registry import register
 from deeppavlov.core.data.utils import is_done, mark_done
 from deeppavlov.core.common.file import load_pickle, save_pickle
 from deeppavlov.core.common.log import get_logger
+from deeppavlov.models.spelling_correction.levenstein.compiled_trie import CompiledTrie
 
 
 log = get_logger(__name__)
@@ -43,7 +43,7 @@ class StaticDictionary:
 
         alphabet_path = data_dir / 'alphabet.pkl'
         words_path = data_dir / 'words.pkl'
-        words_trie_path = data_dir / 'words_trie.pkl'
+        words_trie_path = data_dir / 'words_trie'
 
         if not is_done(data_dir):
             log.info('Trying to build a dictionary in {}'.format(data_dir))
@@ -59,25 +59,24 @@ class StaticDictionary:
             alphabet.remove('⟭')
 
             save_pickle(alphabet, alphabet_path)
-            save_pickle(words, words_path)
-
-            words_trie = defaultdict(set)
-            for word in words:
-                for i in range(len(word)):
-                    words_trie[word[:i]].add(word[:i+1])
-                words_trie[word] = set()
-            words_trie = {k: sorted(v) for k, v in words_trie.items()}
-
-            save_pickle(words_trie, words_trie_path)
+            CompiledTrie.build(words).save(words_trie_path)
 
             mark_done(data_dir)
             log.info('built')
         else:
             log.info('Loading a dictionary from {}'.format(data_dir))
 
+        if not CompiledTrie.exists(words_trie_path):
+            # dictionaries built by previous versions only have pickled sets of words
+            log.info('Compiling a words trie in {}'.format(words_trie_path))
+            CompiledTrie.build(load_pickle(words_path)).save(words_trie_path)
+
         self.alphabet = load_pickle(alphabet_path)
-        self.words_set = load_pickle(words_path)
-        self.words_trie = load_pickle(words_trie_path)
+        self.trie = CompiledTrie.load(words_trie_path)
+
+    @property
+    def words_set(self) -> CompiledTrie:
+        return self.trie
 
     @staticmethod
     def _get_source(*args, **kwargs):
@@ -14,13 +14,14 @@ class WikiSQLiteVocab(SQLiteDataIterator):
     Get SQlite documents by ids.
     """
 
-    def __init__(self, data_url, data_dir: str = '', **kwargs):
+    def __init__(self, data_url, data_dir: str = '', cache_size: int = 10000, **kwargs):
         """
         :param data_url: an URL to SQLite DB
         :param data_dir: a directory name where DB is located
+        :param cache_size: a number of recently served documents to keep in memory
         """
 
-        super().__init__(data_dir=data_dir, data_url=data_url)
+        super().__init__(data_dir=data_dir, data_url=data_url, cache_size=cache_size)
 
     def __call__(self, doc_ids: Optional[List[List[Any]]] = None, *args, **kwargs) -> List[str]:
         """
@@ -34,9 +35,16 @@ class WikiSQLiteVocab(SQLiteDataIterator):
             logger.warn('No doc_ids are provided in WikiSqliteVocab, return all docs')
             doc_ids = [self.get_doc_ids()]
 
+        # fetch documents of the whole batch at once
+        flat_ids = [doc_id for ids in doc_ids for doc_id in ids]
+        flat_contents = dict(zip(flat_ids, self.get_docs_content(flat_ids)))
+
         for ids in doc_ids:
-            contents = [self.get_doc_content(doc_id) for doc_id in ids]
+            contents = [flat_contents[doc_id] for doc_id in ids]
             contents = ' '.join(contents)
             all_contents.append(contents)
 
         return all_contents
+
+    def destroy(self) -> None:
+        self.close()
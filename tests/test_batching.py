@@ -0,0 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.server_utils.batching import ModelBatcher
+
+
+class _Model:
+    def __init__(self):
+        self.batch_sizes = []
+
+    def __call__(self, batch):
+        self.batch_sizes.append(len(batch))
+        if any(sample is None for sample in batch):
+            raise ValueError('got an empty sample')
+        return [sample.upper() for sample in batch]
+
+
+def test_concurrent_calls_get_the_same_results_as_direct_calls():
+    model = _Model()
+    batcher = ModelBatcher(model, max_batch_size=8, max_wait=0.05)
+    requests = [['a{}'.format(i), 'b{}'.format(i)] if i % 3 else ['c{}'.format(i)] for i in range(40)]
+
+    with ThreadPoolExecutor(16) as executor:
+        results = list(executor.map(batcher, requests))
+
+    assert results == [_Model()(request) for request in requests]
+    assert max(model.batch_sizes) <= 8
+    # some requests were coalesced
+    assert len(model.batch_sizes) < len(requests)
+
+
+def test_failing_request_does_not_fail_its_batch():
+    batcher = ModelBatcher(_Model(), max_batch_size=8, max_wait=0.2)
+
+    with ThreadPoolExecutor(4) as executor:
+        good = [executor.submit(batcher, ['x{}'.format(i)]) for i in range(3)]
+        bad = executor.submit(batcher, [None])
+
+        assert [future.result() for future in good] == [['X0'], ['X1'], ['X2']]
+        with pytest.raises(ValueError):
+            bad.result()
@@ -0,0 +1,170 @@
+import sqlite3
+import subprocess
+import sys
+from threading import Thread
+
+import numpy as np
+
+from deeppavlov.core.common.cache import LRUCache, ComponentCache, SessionStore, MISSING, stable_hash
+from deeppavlov.core.common.chainer import Chainer
+from deeppavlov.dataset_iterators.sqlite_iterator import SQLiteDataIterator
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert 'b' not in cache
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.get('b', 'missing') == 'missing'
+    assert len(cache) == 2
+
+
+def test_lru_cache_of_zero_size_keeps_nothing():
+    cache = LRUCache(0)
+    cache.put('a', 1)
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+def test_lru_cache_is_thread_safe():
+    cache = LRUCache(50)
+
+    def work(offset):
+        for i in range(2000):
+            cache.put((offset + i) % 100, i)
+            cache.get((offset + i * 7) % 100)
+
+    threads = [Thread(target=work, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(cache) == 50
+
+
+def _make_db(path, n_docs):
+    connection = sqlite3.connect(str(path))
+    connection.execute('CREATE TABLE documents (id PRIMARY KEY, text)')
+    connection.executemany('INSERT INTO documents VALUES (?, ?)',
+                           [('doc{}'.format(i), 'text of {}'.format(i)) for i in range(n_docs)])
+    connection.commit()
+    connection.close()
+
+
+def _get_doc_content(path, doc_id):
+    # the query get_doc_content() used before documents were fetched in bulk
+    connection = sqlite3.connect(str(path))
+    result = connection.execute('SELECT text FROM documents WHERE id = ?', (doc_id,)).fetchone()
+    connection.close()
+    return result if result is None else result[0]
+
+
+def test_get_docs_content_matches_single_queries(tmp_path):
+    db_path = tmp_path / 'test.db'
+    _make_db(db_path, 2500)
+    iterator = SQLiteDataIterator(data_dir=str(tmp_path), data_url='http://localhost/test.db', cache_size=100)
+    try:
+        # more ids than one query can take, with repeated and missing ones
+        doc_ids = ['doc{}'.format(i) for i in range(0, 2600, 2)] + ['doc1', 'doc1', 'nodoc']
+        expected = [_get_doc_content(db_path, doc_id) for doc_id in doc_ids]
+        assert iterator.get_docs_content(doc_ids) == expected
+        # the second call is partly served from the cache
+        assert iterator.get_docs_content(doc_ids) == expected
+        assert [iterator.get_doc_content(doc_id) for doc_id in doc_ids[:10]] == expected[:10]
+    finally:
+        iterator.close()
+
+
+def test_stable_hash_is_stable_and_distinguishes_types():
+    value = ['a', 1, 1.0, None, True, {'b': (2, 'c')}, b'd', np.arange(3)]
+    assert stable_hash(value) == stable_hash(list(value))
+    # the builtin hash() of strings differs between processes
+    code = 'from deeppavlov.core.common.cache import stable_hash; print(stable_hash(["a", {"b": (2, "c")}]))'
+    other = subprocess.run([sys.executable, '-c', code], stdout=subprocess.PIPE, check=True).stdout.decode().strip()
+    assert other == stable_hash(['a', {'b': (2, 'c')}])
+
+    different = [1, '1', 1.0, True, [1], (1, 2), [[1, 2]], ['a', 'b'], ['ab'], np.arange(3, dtype=np.int32)]
+    assert len({stable_hash(v) for v in different}) == len(different)
+
+
+def test_component_cache_returns_copies_and_persists(tmp_path):
+    path = tmp_path / 'cache.sqlite'
+    cache = ComponentCache('tagger', size=2, path=path)
+    key = cache.key(['some', 'tokens'])
+    assert cache.key(['some', 'tokens']) != ComponentCache('parser').key(['some', 'tokens'])
+    assert cache.get(key) is MISSING
+
+    value = [['O', 'B-LOC']]
+    cache.put(key, value)
+    value[0].append('changed')
+    got = cache.get(key)
+    assert got == [['O', 'B-LOC']]
+    got[0].append('changed')
+    assert cache.get(key) == [['O', 'B-LOC']]
+
+    cache.containers = [list]
+    cache.disk.conn.close()
+    restored = ComponentCache('tagger', size=2, path=path)
+    assert restored.get(key) == [['O', 'B-LOC']]
+    assert restored.containers == [list]
+
+
+class _Tagger:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, batch):
+        self.calls.append(list(batch))
+        return [[token.upper() for token in sample] for sample in batch], np.array([len(s) for s in batch])
+
+
+def test_cached_chainer_returns_the_same_as_uncached():
+    chainers = []
+    for cache in (None, ComponentCache('tagger', size=100)):
+        tagger = _Tagger()
+        chainer = Chainer(['x'], ['tags', 'lengths'])
+        chainer.append(tagger, ['x'], ['tags', 'lengths'], cache=cache)
+        chainers.append((chainer, tagger))
+
+    batches = [[['a', 'b'], ['c']], [['c'], ['a', 'b'], ['c'], ['d']], [['d']]]
+    for batch in batches:
+        (uncached, _), (cached, _) = chainers
+        expected, result = uncached(batch), cached(batch)
+        assert [(tags, int(length)) for tags, length in result] == \
+            [(tags, int(length)) for tags, length in expected]
+    # every distinct sample was computed once
+    assert chainers[1][1].calls == [[['a', 'b'], ['c']], [['d']]]
+
+
+def test_session_store_expires_and_spills_sessions(tmp_path, monkeypatch):
+    import deeppavlov.core.common.cache as cache_module
+
+    now = [1000.]
+    monkeypatch.setattr(cache_module.time, 'time', lambda: now[0])
+    store = SessionStore(ttl=10, maxsize=2, path=tmp_path / 'sessions.sqlite')
+
+    store.put('a', {'turn': 1})
+    store.put('b', {'turn': 1})
+    store.put('c', {'turn': 1})
+    # the least recently put session is moved to disk
+    assert len(store) == 2
+    assert store.get('a') == {'turn': 1}
+
+    store.put('a', {'turn': 2})
+    assert store.get('a') == {'turn': 2}
+    assert store.pop('a') == {'turn': 2}
+    assert 'a' not in store
+
+    now[0] += 11
+    assert store.get('b') is None and store.get('c', 'expired') == 'expired'
+
+
+def test_session_store_without_disk_drops_old_sessions():
+    store = SessionStore(maxsize=1)
+    store.put(1, 'first')
+    store.put(2, 'second')
+    assert store.get(1) is None
+    assert store.get(2) == 'second'
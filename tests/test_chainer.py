@@ -0,0 +1,93 @@
+import threading
+import time
+
+from deeppavlov.core.common.chainer import Chainer
+
+
+class _Tokenizer:
+    def __call__(self, batch):
+        return [text.split() for text in batch]
+
+
+class _Upper:
+    def __call__(self, batch):
+        time.sleep(0.01)
+        return [[token.upper() for token in tokens] for tokens in batch]
+
+
+class _Lengths:
+    def __init__(self):
+        self.threads = set()
+
+    def __call__(self, batch):
+        self.threads.add(threading.get_ident())
+        time.sleep(0.01)
+        return [len(tokens) for tokens in batch]
+
+
+class _Join:
+    def __call__(self, upper, lengths):
+        return ['{} {}'.format(' '.join(tokens), n) for tokens, n in zip(upper, lengths)]
+
+
+def _chainer(parallel=False):
+    inner = Chainer(['tokens'], ['upper'], as_component=True)
+    inner.append(_Upper(), ['tokens'], ['upper'])
+
+    chainer = Chainer(['x'], ['y'], parallel=parallel)
+    chainer.append(_Tokenizer(), ['x'], ['tokens'])
+    chainer.append(inner, ['tokens'], ['upper'])
+    chainer.append(_Lengths(), ['tokens'], ['lengths'])
+    chainer.append(_Join(), ['upper', 'lengths'], ['y'])
+    return chainer
+
+
+BATCH = ['a b c', 'hello world', 'x']
+
+
+def test_parallel_chainer_returns_the_same_as_sequential():
+    expected = _chainer()(BATCH)
+    chainer = _chainer(parallel=2)
+    try:
+        for _ in range(5):
+            assert chainer(BATCH) == expected
+        # independent components were run in the pool
+        assert threading.get_ident() not in chainer.pipe[2][2].threads
+    finally:
+        chainer.destroy()
+
+
+def test_instrumentation_records_every_component():
+    chainer = _chainer()
+    expected = chainer(BATCH)
+    instrumentation = chainer.enable_instrumentation()
+    assert chainer(BATCH) == expected
+    chainer(BATCH[:1])
+
+    summary = instrumentation.summary()
+    assert list(summary) == ['0 _Tokenizer', '1.0 _Upper', '1 Chainer', '2 _Lengths', '3 _Join']
+    assert summary['1.0 _Upper']['calls'] == 2
+    assert summary['1.0 _Upper']['samples'] == 4
+    assert summary['1.0 _Upper']['p50_seconds'] >= 0.01
+
+    text = instrumentation.to_prometheus()
+    assert 'deeppavlov_component_latency_seconds_count{index="2",component="_Lengths"} 2' in text
+    assert 'deeppavlov_component_samples_total{index="1.0",component="_Upper"} 4' in text
+
+
+def test_tracing_keeps_nesting_in_parallel_chainers(tmp_path):
+    for parallel in (False, 2):
+        chainer = _chainer(parallel)
+        tracer = chainer.enable_tracing()
+        try:
+            chainer(BATCH)
+        finally:
+            chainer.destroy()
+
+        stacks = {line.rsplit(' ', 1)[0] for line in tracer.to_collapsed_stacks().splitlines()}
+        assert stacks == {'Chainer', 'Chainer;0 _Tokenizer', 'Chainer;1 Chainer', 'Chainer;1 Chainer;1.0 _Upper',
+                          'Chainer;2 _Lengths', 'Chainer;3 _Join'}
+        assert len(tracer.to_chrome_trace()['traceEvents']) == 6
+
+        trace_path, folded_path = tracer.save(tmp_path / 'profile')
+        assert trace_path.is_file() and folded_path.is_file()
@@ -0,0 +1,45 @@
+import random
+
+from deeppavlov.models.spelling_correction.levenstein.compiled_trie import CompiledTrie
+from deeppavlov.models.spelling_correction.levenstein.levenstein_searcher import LevensteinSearcher
+from deeppavlov.models.spelling_correction.levenstein.tabled_trie import make_trie
+
+ALPHABET = 'abcdeё '
+
+
+def _random_words(rng, n):
+    return [''.join(rng.choice(ALPHABET[:-1]) for _ in range(rng.randint(1, 8))) for _ in range(n)]
+
+
+def test_compiled_trie_matches_tabled_trie():
+    rng = random.Random(0)
+    words = _random_words(rng, 500)
+    trie = make_trie(ALPHABET[:-1], words)
+    compiled = CompiledTrie.build(words, ALPHABET[:-1])
+
+    assert list(compiled.words()) == sorted(set(words))
+    # a minimal automaton has no more nodes than the minimized tabled trie
+    assert len(compiled) <= len(trie)
+    for query in words + _random_words(rng, 500) + ['', 'x']:
+        assert (query in compiled) == (query in trie) == (query in set(words)), query
+
+
+def test_save_and_load(tmp_path):
+    words = ['cat', 'cart', 'car', 'dog', 'кот']
+    compiled = CompiledTrie.build(words)
+    compiled.save(tmp_path / 'trie')
+    assert CompiledTrie.exists(tmp_path / 'trie')
+    for mmap in (True, False):
+        loaded = CompiledTrie.load(tmp_path / 'trie', mmap=mmap)
+        assert list(loaded.words()) == sorted(words)
+        assert loaded.alphabet == compiled.alphabet
+        assert [letter for letter, _ in loaded.children(loaded.descend(loaded.root, 'ca'))] == ['r', 't']
+
+
+def test_searcher_finds_the_same_words_in_both_tries():
+    rng = random.Random(1)
+    words = _random_words(rng, 300)
+    tabled = LevensteinSearcher(ALPHABET, make_trie(ALPHABET, words), allow_spaces=True, euristics=2)
+    compiled = LevensteinSearcher(ALPHABET, CompiledTrie.build(words, ALPHABET), allow_spaces=True, euristics=2)
+    for query in words[:50] + _random_words(rng, 50):
+        assert sorted(compiled.search(query, d=1)) == sorted(tabled.search(query, d=1)), query
@@ -0,0 +1,74 @@
+import random
+
+import numpy as np
+
+from deeppavlov.models.embedders.embedding_store import EmbeddingStore
+
+
+def _encode(tok2emb, tokens, dim, mean):
+    # GloVeEmbedder._encode before embedders were backed by a store
+    embedded_tokens = [tok2emb[t][:dim] if t in tok2emb else np.zeros(dim, dtype=np.float32) for t in tokens]
+    if mean:
+        filtered = [et for et in embedded_tokens if np.any(et)]
+        if filtered:
+            return np.mean(filtered, axis=0)
+        return np.zeros(dim, dtype=np.float32)
+    return embedded_tokens
+
+
+def _store(tmp_path, n_tokens=500, dim=8):
+    rng = random.Random(0)
+    tokens = list(dict.fromkeys(''.join(rng.choice('abcяё') for _ in range(rng.randint(1, 6)))
+                                for _ in range(n_tokens)))
+    vectors = np.random.RandomState(0).rand(len(tokens), dim).astype(np.float32)
+    vectors[0] = 0
+    EmbeddingStore.build(tmp_path / 'store', tokens, vectors)
+    return EmbeddingStore(tmp_path / 'store'), dict(zip(tokens, vectors)), rng
+
+
+def test_index_matches_dict(tmp_path):
+    store, tok2emb, rng = _store(tmp_path)
+    tokens = list(tok2emb)
+    assert list(store) == tokens
+    for row, token in enumerate(tokens):
+        assert store.index(token) == row
+    assert store.index('unknown') == -1 and 'unknown' not in store
+
+
+def test_embed_matches_token_by_token_lookup(tmp_path):
+    store, tok2emb, rng = _store(tmp_path)
+    words = list(tok2emb)[:50] + ['oov1', 'oov2']
+    batch = [[rng.choice(words) for _ in range(rng.randint(0, 6))] for _ in range(30)] + [['oov1']]
+
+    for dim in (None, 5):
+        d = dim or store.dim
+        tokens = store.embed(batch, dim=dim)
+        for sample, expected in zip(tokens, (_encode(tok2emb, s, d, False) for s in batch)):
+            assert len(sample) == len(expected)
+            assert all(np.array_equal(a, b) for a, b in zip(sample, expected))
+
+        means = store.embed(batch, dim=dim, mean=True)
+        for result, sample in zip(means, batch):
+            assert result.dtype == np.float32
+            assert np.allclose(result, _encode(tok2emb, sample, d, True), atol=1e-6)
+
+        padded = store.embed(batch, dim=dim, pad=True)
+        assert padded.shape == (len(batch), max(map(len, batch)), d)
+        for row, sample in zip(padded, tokens):
+            assert np.array_equal(row[:len(sample)], np.array(sample).reshape(len(sample), d))
+            assert not row[len(sample):].any()
+
+
+def test_embed_uses_oov_vectors_and_empty_batches(tmp_path):
+    store, tok2emb, _ = _store(tmp_path)
+    result = store.embed([['oov', list(tok2emb)[1]]], oov=lambda token: np.ones(store.dim, dtype=np.float32))
+    assert np.array_equal(result[0][0], np.ones(store.dim)) and np.array_equal(result[0][1], tok2emb[list(tok2emb)[1]])
+    assert store.embed([]) == [] and store.embed([], pad=True).shape == (0, 0, store.dim)
+
+
+def test_from_text(tmp_path):
+    src = tmp_path / 'vectors.txt'
+    src.write_text('2 3\nhello 0.1 0.2 0.3\nмир 1 2 3\n', encoding='utf8')
+    store = EmbeddingStore.from_text(src, tmp_path / 'store')
+    assert list(store) == ['hello', 'мир']
+    assert np.allclose(store.vectors[store.index('мир')], [1, 2, 3])
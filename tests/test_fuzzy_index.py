@@ -0,0 +1,56 @@
+import json
+import random
+
+from deeppavlov.models.slotfill.fuzzy_index import NgramIndex
+from deeppavlov.models.slotfill.slotfill_raw import SlotFillingComponent
+
+WORDS = ['cheap', 'moderate', 'expensive', 'north', 'south', 'centre', 'italian', 'indian', 'thai',
+         'chinese', 'european', 'modern', 'food', 'bar', 'a', 'in']
+
+
+def _typo(rng, word):
+    if len(word) < 2:
+        return word
+    i = rng.randrange(len(word))
+    edit = rng.randrange(3)
+    if edit == 0:
+        return word[:i] + word[i + 1:]
+    if edit == 1:
+        return word[:i] + rng.choice('aeiostn') + word[i + 1:]
+    return word[:i] + rng.choice('aeiostn') + word[i:]
+
+
+def test_overlap_matches_counting_ngrams():
+    rng = random.Random(0)
+    strings = [' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 3))) for _ in range(200)] + ['', 'ab']
+    index = NgramIndex(strings)
+    for _ in range(50):
+        query = ' '.join(_typo(rng, rng.choice(WORDS)) for _ in range(rng.randint(1, 6)))
+        query_grams = set(index.ngrams(query))
+        expected = [sum(gram in query_grams for gram in index.ngrams(s)) for s in strings]
+        assert index.overlap(query).tolist() == expected
+
+        best = index.most_similar(query, 5)
+        assert set(i for i, s in enumerate(strings) if len(s) < index.n) <= set(best.tolist())
+        assert len([i for i in best if len(strings[i]) >= index.n]) <= 5
+
+
+def test_indexed_slot_filling_matches_full_scan(tmp_path):
+    rng = random.Random(1)
+    slot_vals = {
+        'pricerange': {'cheap': ['cheap', 'inexpensive'], 'moderate': ['moderate', 'moderately priced'],
+                       'expensive': ['expensive', 'pricey']},
+        'area': {'north': ['north'], 'south': ['south'], 'centre': ['centre', 'center', 'city centre']},
+        'food': {word: [word, word + ' food'] for word in ['italian', 'indian', 'thai', 'chinese', 'european',
+                                                           'modern european', 'a']},
+    }
+    path = tmp_path / 'slot_vals.json'
+    with path.open('w') as f:
+        json.dump(slot_vals, f)
+    component = SlotFillingComponent(threshold=0.7, return_all=True, save_path=str(path), load_path=str(path))
+
+    for _ in range(300):
+        tokens = [_typo(rng, rng.choice(WORDS)) if rng.random() < 0.3 else rng.choice(WORDS)
+                  for _ in range(rng.randint(1, 8))]
+        # a copy of the slot values is searched without the index
+        assert component._fuzzy_finder(slot_vals, tokens) == component._fuzzy_finder(component._slot_vals, tokens)
@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+inverted_index_ranker = pytest.importorskip('deeppavlov.skills.odqa.inverted_index_ranker')
+from deeppavlov.models.vectorizers.hashing_tfidf_vectorizer import get_max_scores  # noqa: E402
+
+
+def _ranker():
+    # search() doesn't use the vectorizer, so the ranker is not loaded from disk
+    return inverted_index_ranker.InvertedIndexRanker.__new__(inverted_index_ranker.InvertedIndexRanker)
+
+
+@pytest.mark.parametrize('k', [1, 3, 10])
+def test_search_finds_exhaustive_top_k(k):
+    rng = np.random.RandomState(0)
+    ranker = _ranker()
+    for _ in range(50):
+        shard = sparse.random(200, 300, density=0.05, format='csr', random_state=rng)
+        shard.sort_indices()
+        terms = np.unique(rng.randint(0, 200, size=8)).astype(shard.indices.dtype)
+        weights = rng.rand(len(terms))
+
+        scores = weights @ shard[terms].toarray()
+        ids, found_scores = ranker.search(shard, get_max_scores(shard), terms, weights, k)
+
+        assert np.allclose(scores[ids], found_scores)
+        expected = np.sort(scores[scores > 0])[::-1][:k]
+        assert np.allclose(np.sort(found_scores)[::-1][:len(expected)], expected)
+
+
+def _unsorted_shard(writeable):
+    data, indices, indptr = np.array([1., 2., 3.]), np.array([2, 0, 1], dtype=np.int32), np.array([0, 2, 3])
+    for array in (data, indices, indptr):
+        array.flags.writeable = writeable
+    shard = sparse.csr_matrix((data, indices, indptr), shape=(2, 3), copy=False)
+    assert not shard.has_sorted_indices
+    return shard
+
+
+def test_set_index_sorts_only_unsorted_shards():
+    in_memory, mapped = _unsorted_shard(True), _unsorted_shard(False)
+    ranker = _ranker()
+    ranker.vectorizer = SimpleNamespace()
+    ranker.set_index([in_memory, mapped], {'ngram_range': (1, 1), 'hash_size': 2, 'term_freqs': np.ones(2),
+                                           'shard_bounds': [0, 3, 6], 'index2doc': list('abcdef')})
+
+    # a writeable shard is sorted in place, a read-only (memory-mapped) one is copied
+    assert ranker.tfidf_shards[0] is in_memory
+    assert ranker.tfidf_shards[1] is not mapped
+    for shard in ranker.tfidf_shards:
+        assert shard.has_sorted_indices
+        assert shard.indices.tolist() == [0, 2, 1]
+        assert shard.data.tolist() == [2., 1., 3.]
@@ -0,0 +1,127 @@
+import random
+
+import numpy as np
+import pytest
+
+from deeppavlov.core.data.padding import pad_sequences, pad_nested, bucket_by_length, round_length
+from deeppavlov.core.data.utils import zero_pad, zero_pad_char
+
+
+def _zero_pad(batch, dtype=np.float32):
+    # zero_pad() before it was vectorized
+    batch_size = len(batch)
+    max_len = max(len(utterance) for utterance in batch)
+    if isinstance(batch[0][0], (int, np.integer)):
+        padded_batch = np.zeros([batch_size, max_len], dtype=np.int32)
+        for n, utterance in enumerate(batch):
+            padded_batch[n, :len(utterance)] = utterance
+    else:
+        n_features = len(batch[0][0])
+        padded_batch = np.zeros([batch_size, max_len, n_features], dtype=dtype)
+        for n, utterance in enumerate(batch):
+            for k, token_features in enumerate(utterance):
+                padded_batch[n, k] = token_features
+    return padded_batch
+
+
+def _zero_pad_char(batch, dtype=np.float32):
+    # zero_pad_char() before it was vectorized
+    batch_size = len(batch)
+    max_len = max(len(utterance) for utterance in batch)
+    max_token_len = max(len(ch) for token in batch for ch in token)
+    if isinstance(batch[0][0][0], (int, np.integer)):
+        padded_batch = np.zeros([batch_size, max_len, max_token_len], dtype=np.int32)
+        for n, utterance in enumerate(batch):
+            for k, token in enumerate(utterance):
+                padded_batch[n, k, :len(token)] = token
+    else:
+        n_features = len(batch[0][0][0])
+        padded_batch = np.zeros([batch_size, max_len, max_token_len, n_features], dtype=dtype)
+        for n, utterance in enumerate(batch):
+            for k, token in enumerate(utterance):
+                for q, char_features in enumerate(token):
+                    padded_batch[n, k, q] = char_features
+    return padded_batch
+
+
+def _pad_loop(batch, max_len, value, padding, truncating):
+    padded = np.full((len(batch), max_len), value, dtype=np.int64)
+    for n, sample in enumerate(batch):
+        sample = sample[:max_len] if truncating == 'post' else sample[max(len(sample) - max_len, 0):]
+        if sample:
+            if padding == 'post':
+                padded[n, :len(sample)] = sample
+            else:
+                padded[n, -len(sample):] = sample
+    return padded
+
+
+def _random_batch(rng, size=6, max_len=7, first_nonempty=True):
+    batch = [[rng.randint(1, 100) for _ in range(rng.randint(0, max_len))] for _ in range(size)]
+    if first_nonempty:
+        batch[0].append(1)
+    return batch
+
+
+def test_zero_pad_matches_loops():
+    rng = random.Random(0)
+    for _ in range(100):
+        batch = _random_batch(rng)
+        result, expected = zero_pad(batch), _zero_pad(batch)
+        assert result.dtype == expected.dtype
+        assert np.array_equal(result, expected)
+
+        features = [[[rng.random() for _ in range(3)] for _ in sample] for sample in batch]
+        result, expected = zero_pad(features), _zero_pad(features)
+        assert result.dtype == expected.dtype
+        assert np.array_equal(result, expected)
+
+
+def test_zero_pad_char_matches_loops():
+    rng = random.Random(1)
+    for _ in range(100):
+        batch = [_random_batch(rng, size=rng.randint(1, 5)) for _ in range(4)]
+        result, expected = zero_pad_char(batch), _zero_pad_char(batch)
+        assert result.dtype == expected.dtype
+        assert np.array_equal(result, expected)
+
+        features = [[[[rng.random()] * 2 for _ in token] for token in sample] for sample in batch]
+        result, expected = zero_pad_char(features), _zero_pad_char(features)
+        assert result.dtype == expected.dtype
+        assert np.array_equal(result, expected)
+
+
+@pytest.mark.parametrize('padding', ['post', 'pre'])
+@pytest.mark.parametrize('truncating', ['post', 'pre'])
+@pytest.mark.parametrize('max_len', [None, 0, 3])
+def test_pad_sequences_matches_loops(padding, truncating, max_len):
+    rng = random.Random(2)
+    for _ in range(50):
+        batch = _random_batch(rng, first_nonempty=False)
+        length = max(map(len, batch)) if max_len is None else max_len
+        result = pad_sequences(batch, max_len, value=-1, dtype=np.int64, padding=padding, truncating=truncating)
+        assert np.array_equal(result, _pad_loop(batch, length, -1, padding, truncating))
+
+
+def test_pad_sequences_of_empty_samples():
+    assert pad_sequences([[], []]).shape == (2, 0)
+    assert pad_sequences([[], []], max_len=3, feature_shape=(4,)).shape == (2, 3, 4)
+
+
+def test_pad_sequences_rounds_lengths_to_buckets():
+    assert round_length(5, 4) == 8
+    assert round_length(8, 4) == 8
+    assert round_length(5) == 5
+    assert pad_sequences([[1, 2, 3, 4, 5], [1]], bucket=4).shape == (2, 8)
+
+
+def test_pad_nested_fills_padding_tokens():
+    result = pad_nested([[[1, 2], [3]], [[4]]], token_value=9)
+    assert result.tolist() == [[[1, 2], [3, 0]], [[4, 0], [9, 9]]]
+
+
+def test_bucket_by_length():
+    lengths = [5, 1, 3, 2, 4]
+    batches = bucket_by_length(lengths, 2)
+    assert [sorted(lengths[i] for i in batch) for batch in batches] == [[1, 2], [3, 4], [5]]
+    assert sorted(np.concatenate(bucket_by_length(lengths, -1)).tolist()) == list(range(5))
@@ -0,0 +1,24 @@
+import os
+import time
+
+from utils.server_utils.prefork import PreforkServer
+
+
+def _fork_exiting_child() -> int:
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0)
+    return pid
+
+
+def test_reap_waits_only_for_workers():
+    server = PreforkServer(None, 'localhost', 0, workers=1)
+    worker = _fork_exiting_child()
+    other = _fork_exiting_child()
+    server.workers.add(worker)
+    time.sleep(0.2)
+
+    server._reap()
+    assert not server.workers
+    # a child that isn't a worker is still there to be waited for by its owner
+    assert os.waitpid(other, 0)[0] == other
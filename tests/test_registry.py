@@ -0,0 +1,22 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import deeppavlov
+from deeppavlov.core.common.registry import MANIFESTS, collect_registered, read_manifest
+
+
+def test_manifests_are_up_to_date():
+    package_path = Path(deeppavlov.__file__).parent
+    for kind, (_, decorator) in MANIFESTS.items():
+        assert read_manifest(kind) == collect_registered(package_path, decorator), \
+            'regenerate manifests with `python -m deeppavlov.core.common.registry`'
+
+
+def test_components_are_imported_on_request():
+    code = ('import sys\n'
+            'from deeppavlov.core.common.registry import model\n'
+            'assert "deeppavlov.core.data.simple_vocab" not in sys.modules\n'
+            'cls = model("simple_vocab")\n'
+            'assert cls.__module__ == "deeppavlov.core.data.simple_vocab"\n')
+    subprocess.run([sys.executable, '-c', code], check=True)
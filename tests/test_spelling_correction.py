@@ -0,0 +1,188 @@
+import os
+import random
+import signal
+from collections import Counter
+from math import log
+
+from deeppavlov.models.spelling_correction.batch_corrector import BatchCorrector, PartialCandidates
+from deeppavlov.models.spelling_correction.brillmoore.error_model import ErrorModel, _edit_alignments
+from deeppavlov.models.spelling_correction.levenstein.compiled_trie import CompiledTrie
+from deeppavlov.models.spelling_correction.levenstein.levenstein_searcher import LevensteinSearcher
+from deeppavlov.models.spelling_correction.levenstein.searcher_component import LevensteinSearcherComponent
+
+WORDS = ['cat', 'cart', 'car', 'cast', 'hat', 'bat']
+
+
+def test_search_is_truncated_by_max_expansions():
+    trie = CompiledTrie.build(WORDS)
+    searcher = LevensteinSearcher(trie.alphabet, trie, allow_spaces=True, euristics=2, max_expansions=2)
+    found, truncated = searcher.search('cat', d=1, return_truncated=True)
+    assert truncated
+    assert isinstance(found, list)
+
+    searcher.max_expansions = None
+    found, truncated = searcher.search('cat', d=1, return_truncated=True)
+    assert not truncated
+    assert {word for word, _ in found} == {'cat', 'cart', 'car', 'cast', 'hat', 'bat'}
+
+
+def test_truncated_candidates_are_not_memoized():
+    component = LevensteinSearcherComponent(WORDS, cache_size=10, max_expansions=2)
+    try:
+        assert isinstance(component._find_candidates('cat'), PartialCandidates)
+        component([['cat']])
+        assert component.corrector.memo.get('cat') is None
+
+        component.searcher.max_expansions = None
+        component([['cat']])
+        assert component.corrector.memo.get('cat') is not None
+    finally:
+        component.destroy()
+
+
+def test_batch_corrector_memoizes_complete_candidates_only():
+    corrector = BatchCorrector(lambda word: PartialCandidates([word]) if word == 'zz' else [word], cache_size=10)
+    assert corrector([['zz', 'ab']]) == [[['zz'], ['ab']]]
+    assert corrector.memo.get('zz') is None
+    assert corrector.memo.get('ab') == ['ab']
+
+
+def _reversed_word(word):
+    return [word[::-1]]
+
+
+def test_batch_corrector_starts_pool_in_forked_process():
+    corrector = BatchCorrector(_reversed_word, n_jobs=2, chunk_size=2)
+    batch = [['ab', 'cd', 'ef', 'gh', 'ij']]
+    expected = [[['ba'], ['dc'], ['fe'], ['hg'], ['ji']]]
+    try:
+        assert corrector.pool is None
+        assert corrector(batch) == expected
+        assert corrector.pool is not None
+
+        pid = os.fork()
+        if pid == 0:
+            signal.alarm(10)
+            try:
+                code = 0 if corrector(batch) == expected and corrector.pool_pid == os.getpid() else 1
+                corrector.close()
+            except BaseException:
+                code = 1
+            os._exit(code)
+        _, status = os.waitpid(pid, 0)
+        assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+        assert corrector(batch) == expected
+    finally:
+        corrector.close()
+    assert corrector.pool is None
+
+
+def _distance_edits(seq1, seq2):
+    l1, l2 = len(seq1), len(seq2)
+    d = [[(i, ()) for i in range(l2 + 1)]]
+    d += [[(i, ())] + [(0, ())] * l2 for i in range(1, l1 + 1)]
+
+    for i in range(1, l1 + 1):
+        for j in range(1, l2 + 1):
+            edits = [
+                (d[i - 1][j][0] + 1, d[i - 1][j][1] + ((seq1[i - 1], ''),)),
+                (d[i][j - 1][0] + 1, d[i][j - 1][1] + (('', seq2[j - 1]),)),
+                (d[i - 1][j - 1][0] + (seq1[i - 1] != seq2[j - 1]),
+                 d[i - 1][j - 1][1] + ((seq1[i - 1], seq2[j - 1]),))
+            ]
+            if i > 1 and j > 1 and seq1[i - 1] == seq2[j - 2] and seq1[i - 2] == seq2[j - 1]:
+                edits.append((d[i - 2][j - 2][0] + (seq1[i - 1] != seq2[j - 1]),
+                              d[i - 2][j - 2][1] + ((seq1[i - 2:i], seq2[j - 2:j]),)))
+            d[i][j] = min(edits, key=lambda x: x[0])
+
+    return d[-1][-1]
+
+
+def _fit_costs(x, y, window=4):
+    changes = []
+    entries = []
+    for error, correct in zip(x, y):
+        correct = '⟬{}⟭'.format(' '.join(correct))
+        error = '⟬{}⟭'.format(' '.join(error))
+        d, ops = _distance_edits(correct, error)
+        if d <= 2:
+            w_ops = set()
+            for pos in range(len(ops)):
+                left, right = list(zip(*ops))
+                for l in range(pos, max(0, pos - window) - 1, -1):
+                    for r in range(pos + 1, min(len(ops), l + 2 + window)):
+                        w_ops.add(((''.join(left[l:r]), ''.join(right[l:r])), l, r))
+            ops = [x[0] for x in w_ops]
+            entries += [op[0] for op in ops]
+            changes += ops
+
+    e_count = Counter(entries)
+    costs = {}
+    for (w, s), c in Counter(changes).items():
+        c = c + (1 if w != s else 19)
+        costs[(w, s)] = log(c / (e_count[w] + 20))
+    return costs
+
+
+def _random_pairs(n, seed=0):
+    rng = random.Random(seed)
+    return [(''.join(rng.choice('ab') for _ in range(rng.randint(0, 7))),
+             ''.join(rng.choice('ab') for _ in range(rng.randint(0, 7)))) for _ in range(n)]
+
+
+def test_edit_alignments_match_distance_edits():
+    pairs = _random_pairs(2000) + [('baaaaa', 'baa'), ('abbaaa', 'bab'), ('ab', 'ba'), ('', 'ab')]
+    expected = [_distance_edits(a, b) for a, b in pairs]
+    # pairs are aligned both one by one and in a batch padded to the longest pair
+    for pair, (distance, ops) in zip(pairs, expected):
+        assert _edit_alignments([pair]) == [(distance, list(ops))], pair
+    for pair, (distance, ops), found in zip(pairs, expected, _edit_alignments(pairs)):
+        assert found == (distance, list(ops)), pair
+
+
+class _Dictionary:
+    def __init__(self, words):
+        self.trie = CompiledTrie.build(['⟬{}⟭'.format(word) for word in words])
+        self.alphabet = {c for word in words for c in word}
+
+
+def test_error_model_fit_matches_reference(tmp_path):
+    rng = random.Random(1)
+    words = ['cat', 'cart', 'dog', 'bird', 'horse']
+    y = [[rng.choice(words)] for _ in range(300)]
+    x = []
+    for (word,) in y:
+        chars = list(word)
+        pos = rng.randrange(len(chars))
+        edit = rng.randrange(3)
+        if edit == 0:
+            chars[pos] = rng.choice('acdeghiorst')
+        elif edit == 1:
+            del chars[pos]
+        elif pos + 1 < len(chars):
+            chars[pos], chars[pos + 1] = chars[pos + 1], chars[pos]
+        x.append([''.join(chars)])
+
+    model = ErrorModel(_Dictionary(words), save_path=str(tmp_path / 'error_model.tsv'), mode='train')
+    model.fit_chunk_size = 64
+    try:
+        model.fit(x, y)
+        expected = _fit_costs(x, y)
+        for change, cost in expected.items():
+            assert abs(model.costs[change] - cost) < 1e-9, change
+        assert model([['cta']])[0][0][0][1] == 'cat'
+    finally:
+        model.destroy()
+
+
+def test_error_model_binary_costs_are_saved_next_to_tsv_path(tmp_path):
+    words = ['cat', 'dog']
+    path = tmp_path / 'error_model.tsv'
+    model = ErrorModel(_Dictionary(words), save_path=str(path), mode='train', binary=True)
+    model.fit([['cta'], ['dgo']], [['cat'], ['dog']])
+    model.save()
+    assert not path.exists()
+    assert (tmp_path / 'error_model.npz').is_file()
+
+    loaded = ErrorModel(_Dictionary(words), save_path=str(path), load_path=str(path), binary=True)
+    assert dict(loaded.costs) == dict(model.costs)
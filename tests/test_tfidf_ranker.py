@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+from scipy import sparse
+
+tfidf_ranker = pytest.importorskip('deeppavlov.skills.odqa.tfidf_ranker')
+from deeppavlov.models.vectorizers.hashing_tfidf_vectorizer import (  # noqa: E402
+    HashingTfIdfVectorizer, save_shards, load_shards)
+
+HASH_SIZE = 64
+
+
+class _Queries:
+    def __init__(self, matrix):
+        self.matrix = matrix
+
+    def __call__(self, questions):
+        return self.matrix
+
+
+class _Tokenizer:
+    ngram_range = (1, 1)
+
+    def __call__(self, docs):
+        for doc in docs:
+            yield doc.split()
+
+
+def _index(n_docs=300, seed=0):
+    rng = np.random.RandomState(seed)
+    matrix = sparse.random(HASH_SIZE, n_docs, density=0.1, format='csr', random_state=rng)
+    doc_index = {'doc{}'.format(i): i for i in range(n_docs)}
+    opts = {'hash_size': HASH_SIZE, 'ngram_range': (1, 1), 'doc_index': doc_index,
+            'term_freqs': np.asarray((matrix > 0).sum(1)).ravel()}
+    queries = sparse.random(20, HASH_SIZE, density=0.2, format='csr', random_state=rng)
+    return matrix, opts, queries
+
+
+def _ranker(matrix, opts, queries, top_n=5, active=True):
+    ranker = tfidf_ranker.TfidfRanker.__new__(tfidf_ranker.TfidfRanker)
+    ranker.top_n, ranker.active = top_n, active
+    ranker.vectorizer = _Queries(queries)
+    ranker.set_index(matrix, opts)
+    return ranker
+
+
+def test_shards_are_loaded_as_the_same_matrix(tmp_path):
+    matrix, opts, queries = _index()
+    save_shards(tmp_path / 'index', matrix, opts, n_shards=3)
+    shards, loaded_opts = load_shards(tmp_path / 'index')
+
+    assert len(shards) == 3
+    assert all(shard.has_sorted_indices for shard in shards)
+    assert (sparse.hstack(shards).tocsr() != matrix).nnz == 0
+    assert [loaded_opts['index2doc'][i] for i in range(matrix.shape[1])] == list(opts['doc_index'])
+    assert np.array_equal(loaded_opts['term_freqs'], opts['term_freqs'])
+
+    single = _ranker(matrix, opts, queries)(['q'] * queries.shape[0])
+    sharded = _ranker(shards, loaded_opts, queries)(['q'] * queries.shape[0])
+    assert single[0] == sharded[0]
+    assert all(np.allclose(a, b) for a, b in zip(single[1], sharded[1]))
+
+
+def _rank_one_by_one(matrix, index2doc, queries, thresh):
+    # TfidfRanker.__call__ before queries were scored in batches
+    batch_doc_ids, batch_docs_scores = [], []
+    for q_tfidf in queries:
+        scores = np.squeeze((q_tfidf * matrix).toarray() + 0.0001)
+        if thresh >= len(scores):
+            o = np.argpartition(-scores, len(scores) - 1)[0:thresh]
+        else:
+            o = np.argpartition(-scores, thresh)[0:thresh]
+        o_sort = o[np.argsort(-scores[o])]
+        batch_doc_ids.append([index2doc[i] for i in o_sort])
+        batch_docs_scores.append(scores[o_sort])
+    return batch_doc_ids, batch_docs_scores
+
+
+@pytest.mark.parametrize('top_n', [1, 5, 50])
+def test_batched_scoring_matches_one_by_one(top_n):
+    matrix, opts, queries = _index()
+    ranker = _ranker(matrix, opts, queries, top_n=top_n)
+    doc_ids, scores = ranker(['q'] * queries.shape[0])
+    expected_ids, expected_scores = _rank_one_by_one(matrix, ranker.index2doc, queries, top_n)
+
+    for ids, s, e_ids, e_s in zip(doc_ids, scores, expected_ids, expected_scores):
+        assert np.allclose(s, e_s)
+        # documents with equal (e.g. zero) scores may come in any order
+        nonzero = e_s > 0.0001
+        assert ids[:nonzero.sum()] == e_ids[:nonzero.sum()]
+        assert len(ids) == len(e_ids)
+
+
+def test_inactive_ranker_returns_all_documents():
+    matrix, opts, queries = _index(n_docs=30)
+    doc_ids, scores = _ranker(matrix, opts, queries, active=False)(['q'] * queries.shape[0])
+    assert all(sorted(ids) == sorted(opts['doc_index']) for ids in doc_ids)
+
+
+def test_parallel_fit_matches_sequential_fit(tmp_path):
+    rng = np.random.RandomState(0)
+    words = ['w{}'.format(i) for i in range(200)]
+    docs = [' '.join(rng.choice(words, size=rng.randint(0, 30))) for _ in range(500)]
+    doc_index = {'doc{}'.format(i): i for i in range(len(docs))}
+
+    matrices = []
+    for n_jobs in (None, 2):
+        vectorizer = HashingTfIdfVectorizer(hash_size=2 ** 10, tokenizer=_Tokenizer(), doc_index=doc_index,
+                                            save_path=str(tmp_path / 'tfidf_{}'.format(n_jobs)),
+                                            mmap=True, n_shards=2, n_jobs=n_jobs, mode='train')
+        for start in range(0, len(docs), 64):
+            vectorizer.fit_batch(docs[start:start + 64], list(doc_index)[start:start + 64])
+        vectorizer.save()
+        vectorizer.load_path = vectorizer.save_path
+        matrices.append(vectorizer.load())
+
+    (sequential, sequential_opts), (parallel, parallel_opts) = matrices
+    assert abs(sparse.hstack(sequential) - sparse.hstack(parallel)).max() < 1e-9
+    assert np.array_equal(sequential_opts['term_freqs'], parallel_opts['term_freqs'])
@@ -0,0 +1,72 @@
+import io
+import random
+from collections import Counter
+
+from deeppavlov.core.data.simple_vocab import SimpleVocabulary
+from deeppavlov.core.data.token_index import TokenIndex
+
+
+def _random_tokens(rng, n):
+    alphabet = 'abcxyzабв日本\x00 '
+    return [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 40))) for _ in range(n)]
+
+
+def test_lookup_matches_dict():
+    rng = random.Random(0)
+    tokens = list(dict.fromkeys(_random_tokens(rng, 2000) + ['', 'a\x00', 'a', 'a' * 33]))
+    index = TokenIndex.from_tokens(tokens, default=-1, max_width=8)
+    t2i = {token: i for i, token in enumerate(tokens)}
+
+    queries = tokens + _random_tokens(rng, 2000) + ['a\x00\x00', 'a' * 32, 'a' * 34]
+    assert index.lookup(queries).tolist() == [t2i.get(token, -1) for token in queries]
+    assert [index[i] for i in range(len(tokens))] == tokens
+    assert list(index) == tokens
+    assert all(token in index for token in tokens)
+    assert 'a' * 34 not in index
+
+
+def test_lookup_nested():
+    index = TokenIndex.from_tokens(['<UNK>', 'a', 'b', 'c'])
+    assert index.lookup_nested([['a', 'x'], [], ['c']]) == [[1, 0], [], [3]]
+    assert index.lookup_nested([[['a', 'b'], []], [['c']]], depth=3) == [[[1, 2], []], [[3]]]
+
+
+def test_save_and_load():
+    tokens = ['<UNK>', 'the', 'a', 'длинное слово' * 5]
+    index = TokenIndex.from_tokens(tokens, counts=[0, 10, 5, 7])
+    f = io.BytesIO()
+    index.save(f)
+    f.seek(0)
+    loaded = TokenIndex.load(f)
+    assert list(loaded) == tokens
+    assert loaded.lookup(tokens + ['unknown']).tolist() == [0, 1, 2, 3, 0]
+    assert loaded.most_common() == Counter(dict(zip(tokens, [0, 10, 5, 7]))).most_common()
+
+
+def test_compact_vocabulary_matches_dict_vocabulary(tmp_path):
+    rng = random.Random(1)
+    words = _random_tokens(rng, 300)
+    data = [[rng.choice(words) for _ in range(rng.randint(0, 10))] for _ in range(200)]
+    batch = data[:20] + [['unknown token', words[0]]]
+
+    vocabs = {}
+    for compact in (False, True):
+        vocab = SimpleVocabulary(special_tokens=('<PAD>', '<UNK>'), unk_token='<UNK>', min_freq=2,
+                                 compact=compact, save_path=str(tmp_path / 'vocab_{}.dict'.format(compact)))
+        vocab.fit(data)
+        vocabs[compact] = vocab
+
+    assert vocabs[True](batch) == vocabs[False](batch)
+    assert len(vocabs[True]) == len(vocabs[False])
+    assert [vocabs[True][i] for i in range(len(vocabs[True]))] == [vocabs[False][i] for i in range(len(vocabs[False]))]
+
+    # a binary vocabulary is loaded by both modes
+    vocabs[True].save()
+    for compact in (False, True):
+        loaded = SimpleVocabulary(special_tokens=('<PAD>', '<UNK>'), unk_token='<UNK>', compact=compact,
+                                  save_path=str(tmp_path / 'vocab_True.dict'),
+                                  load_path=str(tmp_path / 'vocab_True.dict'))
+        assert loaded(batch) == vocabs[False](batch)
+        # frequencies are only kept for tokens of the vocabulary
+        tokens = [vocabs[False][i] for i in range(len(vocabs[False]))]
+        assert dict(loaded.items()) == {token: vocabs[False].freqs[token] for token in tokens}
@@ -0,0 +1,105 @@
+import time
+from queue import Queue, Empty
+from threading import Thread, Event
+from typing import Callable, List, Any
+
+from deeppavlov.core.common.log import get_logger
+
+
+log = get_logger(__name__)
+
+
+class _Request:
+    def __init__(self, batch: list):
+        self.batch = batch
+        self.result = None
+        self.error = None
+        self.done = Event()
+
+
+class ModelBatcher:
+    """
+    Coalesce concurrent model calls into a single batch.
+
+    Calls from request handler threads are put into a queue. A single worker thread takes
+    the first waiting request, keeps collecting more of them for up to `max_wait` seconds or
+    until `max_batch_size` samples are collected, calls the model once on all samples and
+    scatters the results back to the waiting threads.
+    """
+
+    def __init__(self, model: Callable, max_batch_size: int = 32, max_wait: float = 0.01):
+        """
+        :param model: a model to call, e.g. a :class:`~deeppavlov.core.common.chainer.Chainer`
+        :param max_batch_size: a maximum number of samples in a single model call
+        :param max_wait: a maximum time in seconds to wait for more requests after the first one
+        """
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.queue = Queue()
+        self._carry = None
+
+        self.worker = Thread(target=self._loop, daemon=True)
+        self.worker.start()
+
+    def __call__(self, batch: list) -> List[Any]:
+        request = _Request(batch)
+        self.queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _collect(self) -> List[_Request]:
+        if self._carry is not None:
+            requests, self._carry = [self._carry], None
+        else:
+            requests = [self.queue.get()]
+        size = len(requests[0].batch)
+        deadline = time.monotonic() + self.max_wait
+
+        while size < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                request = self.queue.get(timeout=timeout)
+            except Empty:
+                break
+            if size + len(request.batch) > self.max_batch_size:
+                self._carry = request
+                break
+            requests.append(request)
+            size += len(request.batch)
+
+        return requests
+
+    def _loop(self) -> None:
+        while True:
+            requests = self._collect()
+            batch = [sample for request in requests for sample in request.batch]
+            try:
+                results = self.model(batch)
+            except Exception as e:
+                if len(requests) == 1:
+                    requests[0].error = e
+                    requests[0].done.set()
+                else:
+                    # don't let a single malformed request fail the whole batch
+                    log.warning('Batch of {} requests failed, processing them one by one'.format(len(requests)))
+                    for request in requests:
+                        self._run_single(request)
+                continue
+
+            offset = 0
+            for request in requests:
+                request.result = results[offset:offset + len(request.batch)]
+                offset += len(request.batch)
+                request.done.set()
+
+    def _run_single(self, request: _Request) -> None:
+        try:
+            request.result = self.model(request.batch)
+        except Exception as e:
+            request.error = e
+        request.done.set()
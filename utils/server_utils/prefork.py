@@ -0,0 +1,151 @@
+import os
+import signal
+import socket
+import time
+from threading import Thread
+from typing import Callable, Optional
+
+from werkzeug.serving import make_server
+
+from deeppavlov.core.common.log import get_logger
+
+
+log = get_logger(__name__)
+
+
+def _serve_worker(app, host: str, port: int, listener: socket.socket, threaded: bool,
+                  post_fork: Optional[Callable]) -> None:
+    """Run a WSGI server on an inherited listening socket until SIGTERM is received."""
+    signal.signal(signal.SIGHUP, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    if post_fork is not None:
+        post_fork()
+
+    server = make_server(host, port, app, threaded=threaded, fd=listener.fileno())
+
+    def graceful_stop(signum, frame):
+        # serve_forever() has to be stopped from another thread; the current request is finished first
+        Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, graceful_stop)
+    server.serve_forever()
+
+
+class PreforkServer:
+    """
+    Serve a WSGI application with several forked worker processes.
+
+    The application (with an already built model) is created in the parent process, so
+    the workers share its memory pages (weights, embeddings, indexes) copy-on-write.
+    The parent only supervises the workers: a worker that dies is replaced, SIGHUP replaces
+    all workers one by one without dropping the listening socket, SIGTERM and SIGINT
+    stop the workers gracefully and exit.
+    """
+
+    def __init__(self, app, host: str, port: int, workers: int, threaded: bool = False,
+                 post_fork: Optional[Callable] = None, graceful_timeout: float = 30):
+        """
+        :param app: a WSGI application
+        :param host: a host to listen on
+        :param port: a port to listen on
+        :param workers: a number of worker processes
+        :param threaded: whether every worker handles requests in separate threads
+        :param post_fork: a function to call in every worker right after fork, e.g. to start threads
+        :param graceful_timeout: seconds to wait for a worker to finish its requests before killing it
+        """
+        self.app = app
+        self.host = host
+        self.port = port
+        self.n_workers = workers
+        self.threaded = threaded
+        self.post_fork = post_fork
+        self.graceful_timeout = graceful_timeout
+
+        self.listener = None
+        self.workers = set()
+        self._restart = False
+        self._stop = False
+
+    def _spawn(self) -> int:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _serve_worker(self.app, self.host, self.port, self.listener, self.threaded, self.post_fork)
+            except Exception:
+                log.exception('Worker {} failed'.format(os.getpid()))
+                code = 1
+            finally:
+                os._exit(code)
+        self.workers.add(pid)
+        log.info('Started worker {}'.format(pid))
+        return pid
+
+    def _stop_workers(self, pids) -> None:
+        stopping = set(pids)
+        pids = set(stopping)
+        for pid in list(pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pids.discard(pid)
+
+        deadline = time.monotonic() + self.graceful_timeout
+        while pids and time.monotonic() < deadline:
+            for pid in list(pids):
+                done, _ = os.waitpid(pid, os.WNOHANG)
+                if done:
+                    pids.discard(pid)
+            time.sleep(0.1)
+
+        for pid in pids:
+            log.warning('Worker {} did not stop in {} seconds, killing it'.format(pid, self.graceful_timeout))
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self.workers.difference_update(stopping)
+
+    def _on_restart(self, signum, frame):
+        self._restart = True
+
+    def _on_stop(self, signum, frame):
+        self._stop = True
+
+    def _reap(self) -> None:
+        # only our workers are waited for, other children (e.g. pools of model components) are left to their owners
+        for pid in list(self.workers):
+            try:
+                done, status = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                done, status = pid, None
+            if done:
+                self.workers.discard(pid)
+                if not self._stop:
+                    log.warning('Worker {} exited with status {}, starting a new one'.format(pid, status))
+
+    def serve_forever(self) -> None:
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind((self.host, self.port))
+        self.listener.listen(128)
+        log.info('Serving on {}:{} with {} workers'.format(self.host, self.port, self.n_workers))
+
+        signal.signal(signal.SIGHUP, self._on_restart)
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+
+        try:
+            while not self._stop:
+                self._reap()
+                while len(self.workers) < self.n_workers and not self._stop:
+                    self._spawn()
+                if self._restart:
+                    self._restart = False
+                    log.info('Restarting workers')
+                    for pid in list(self.workers):
+                        self._spawn()
+                        self._stop_workers([pid])
+                time.sleep(0.5)
+        finally:
+            self._stop_workers(self.workers)
+            self.listener.close()
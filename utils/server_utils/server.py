@@ -1,7 +1,7 @@
 import sys
 from pathlib import Path
 
-from flask import Flask, request, jsonify, redirect
+from flask import Flask, request, jsonify, redirect, Response
 from flasgger import Swagger
 from flask_cors import CORS
 
@@ -9,6 +9,8 @@ from deeppavlov.core.common.file import read_json
 from deeppavlov.core.commands.infer import build_model_from_config
 from deeppavlov.core.data.utils import check_nested_dict_keys, jsonify_data
 from deeppavlov.core.common.log import get_logger
+from utils.server_utils.batching import ModelBatcher
+from utils.server_utils.prefork import PreforkServer
 
 
 SERVER_CONFIG_FILENAME = 'server_config.json'
@@ -88,7 +90,8 @@ def start_model_server(model_config_path):
     server_config_dir = Path(__file__).resolve().parent
     server_config_path = Path(server_config_dir, SERVER_CONFIG_FILENAME).resolve()
 
-    model = init_model(model_config_path)
+    base_model = init_model(model_config_path)
+    model = base_model
 
     server_params = get_server_params(server_config_path, model_config_path)
     host = server_params['host']
@@ -96,6 +99,28 @@ def start_model_server(model_config_path):
     model_endpoint = server_params['model_endpoint']
     model_args_names = server_params['model_args_names']
 
+    max_batch_size = server_params.get('max_batch_size', 1)
+    workers = server_params.get('workers', 1)
+
+    metrics_endpoint = server_params.get('metrics_endpoint')
+    if metrics_endpoint and workers > 1:
+        # every forked worker would report only its own statistics
+        log.warning('"metrics_endpoint" is not supported with several workers and is disabled')
+    elif metrics_endpoint:
+        instrumentation = base_model.enable_instrumentation()
+
+        @app.route(metrics_endpoint, methods=['GET'])
+        def metrics():
+            return Response(instrumentation.to_prometheus(), mimetype='text/plain; version=0.0.4')
+
+    def start_batching():
+        # requests are served concurrently and coalesced into batches by a single model thread,
+        # which has to be started in the process that serves them
+        nonlocal model
+        if max_batch_size > 1:
+            model = ModelBatcher(base_model, max_batch_size=max_batch_size,
+                                 max_wait=server_params.get('max_batch_wait', 0.01))
+
     @app.route('/')
     def index():
         return redirect('/apidocs/')
@@ -113,4 +138,9 @@ def start_model_server(model_config_path):
         """
         return interact(model, model_args_names)
 
-    app.run(host=host, port=port)
+    if workers > 1:
+        PreforkServer(app, host, port, workers, threaded=max_batch_size > 1,
+                      post_fork=start_batching).serve_forever()
+    else:
+        start_batching()
+        app.run(host=host, port=port, threaded=max_batch_size > 1)